@@ -0,0 +1,223 @@
+"""
+Offline throughput benchmark.
+
+Starts a local stand-in for Product Hunt and for lead websites of every kind
+(fast, slow, 404, parked, huge, JS-only), then runs WebsiteAnalyzer,
+ProductHuntBot and main.process_products against it with Telegram stubbed
+out. Reports products/minute, p50/p95 latency per stage and peak RSS, so a
+change can be measured before and after:
+
+    python bench/run_bench.py --products 30 --output before.json
+
+The verdicts never include 'Good': the analyzer scores every reachable page
+'Potentially Bad' or worse, so the mix has no Good case to time.
+
+Product Hunt is read over the HTTP-first path; pass --browser to load it in
+Chromium instead (needs `playwright install chromium`).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sites import StandInSite, SITE_KINDS
+from telegram_dispatcher import SENT
+
+class StageTimer:
+    """Collects per-call durations by stage name"""
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.samples[stage].append(time.monotonic() - started)
+        return timed
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def report(self):
+        return {stage: summarize(values) for stage, values in sorted(self.samples.items())}
+
+class StubNotifier:
+    """Stands in for TelegramNotifier; counts messages instead of sending them"""
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, text, on_sent=None):
+        self.messages.append(text)
+        if on_sent:
+            on_sent(SENT)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 1),
+        'total_s': round(sum(values), 3),
+    }
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def bench_analyzer(site, repeat):
+    """Latency per site kind (sequential, no cache) and analyze_many throughput"""
+    from website_analyzer import WebsiteAnalyzer
+
+    analyzer = WebsiteAnalyzer()
+    timer = StageTimer()
+    verdicts = {}
+    for kind in SITE_KINDS:
+        for n in range(repeat):
+            started = time.monotonic()
+            result = analyzer.analyze(f"{site.base_url}/site/{kind}/{n}")
+            timer.add(f"analyze:{kind}", time.monotonic() - started)
+        verdicts[kind] = result['status']
+
+    # Every URL is on 127.0.0.1, so lift the per-host cap that real leads (distinct hosts) never hit
+    analyzer = WebsiteAnalyzer(max_per_host=analyzer.max_workers)
+    urls = [f"{site.base_url}/site/{site.kind_of(i)}/{i}" for i in range(site.products)]
+    started = time.monotonic()
+    done = sum(1 for _ in analyzer.analyze_many(urls))
+    elapsed = time.monotonic() - started
+    return {
+        'verdicts': verdicts,
+        'stages': timer.report(),
+        'analyze_many': {'sites': done, 'seconds': round(elapsed, 3), 'sites_per_min': round(done / elapsed * 60, 1)},
+    }
+
+def new_ph_bot(args, timer=None):
+    from pacing import PacingScheduler
+    from producthunt_bot import ProductHuntBot
+
+    bot = ProductHuntBot(
+        headless=True,
+        concurrency=args.concurrency,
+        pacer=PacingScheduler(min_interval=args.pacing),
+        http_first=not args.browser
+    )
+    bot.auth_file = os.path.join(os.environ["DATA_DIR"], "ph_auth.json")  # Keep the real session file untouched
+    if timer and bot.http:
+        bot.http.get_product_details = timer.wrap('product_details', bot.http.get_product_details)
+        bot.http.get_maker_details = timer.wrap('maker_details', bot.http.get_maker_details)
+    bot.start()
+    return bot
+
+def bench_producthunt(site, args):
+    """Launch list plus one-at-a-time product pages (makers included)"""
+    timer = StageTimer()
+    bot = new_ph_bot(args)
+    try:
+        launches = timer.wrap('launches', bot.get_daily_launches)()
+        for product in launches[:args.products]:
+            timer.wrap('product_with_makers', bot.get_product_details)(product['url'])
+    finally:
+        bot.close()
+    return {'launches': len(launches), 'stages': timer.report()}
+
+def bench_cycle(site, args):
+    """main.process_products end to end, Telegram stubbed"""
+    import main
+    from website_analyzer import WebsiteAnalyzer
+    from crawl_state import CrawlState
+    from cache_store import data_path
+
+    timer = StageTimer()
+    bot = new_ph_bot(args, timer)
+    analyzer = WebsiteAnalyzer(max_workers=args.analyzer_workers, max_per_host=args.analyzer_workers)
+    analyzer.analyze = timer.wrap('analyze', analyzer.analyze)
+    notifier = StubNotifier()
+    notifier.send_message = timer.wrap('notify', notifier.send_message)
+    crawl_state = CrawlState(data_path("bench_crawl_state.db"))
+    try:
+        products = bot.get_daily_launches()
+        started = time.monotonic()
+        leads = main.process_products(bot, None, analyzer, notifier, products, crawl_state=crawl_state)
+        elapsed = time.monotonic() - started
+    finally:
+        bot.close()
+        crawl_state.close()
+    return {
+        'products': len(products),
+        'leads': len(leads),
+        'notified': len(notifier.messages),
+        'seconds': round(elapsed, 3),
+        'products_per_min': round(len(products) / elapsed * 60, 1) if elapsed else None,
+        'stages': timer.report(),
+    }
+
+def print_stages(stages):
+    for stage, stats in stages.items():
+        print(f"  {stage:<22} n={stats['count']:<4} p50={stats['p50_ms']:>8.1f}ms  p95={stats['p95_ms']:>8.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=30, help="launches on the stand-in homepage")
+    parser.add_argument("--repeat", type=int, default=5, help="analyzer calls per site kind")
+    parser.add_argument("--slow-delay", type=float, default=3.0, help="seconds the slow site stalls")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every Product Hunt page")
+    parser.add_argument("--pacing", type=float, default=0.0, help="per-domain pacing interval (production uses 1.0)")
+    parser.add_argument("--concurrency", type=int, default=3, help="ProductHuntBot tabs")
+    parser.add_argument("--analyzer-workers", type=int, default=10)
+    parser.add_argument("--browser", action="store_true", help="load Product Hunt pages in Chromium")
+    parser.add_argument("--only", choices=("analyzer", "producthunt", "cycle"), help="run a single section")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    site = StandInSite(products=args.products, slow_delay=args.slow_delay, latency=args.latency).start()
+    # Must be set before the bots are imported; they read it at import time
+    os.environ["PH_BASE_URL"] = site.base_url
+    os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="bench-data-"))
+
+    results = {'config': vars(args)}
+    try:
+        if args.only in (None, "analyzer"):
+            results['analyzer'] = bench_analyzer(site, args.repeat)
+            print("WebsiteAnalyzer")
+            print(f"  verdicts: {results['analyzer']['verdicts']}")
+            print_stages(results['analyzer']['stages'])
+            many = results['analyzer']['analyze_many']
+            print(f"  analyze_many: {many['sites']} sites in {many['seconds']}s ({many['sites_per_min']}/min)")
+        if args.only in (None, "producthunt"):
+            results['producthunt'] = bench_producthunt(site, args)
+            print(f"ProductHuntBot ({results['producthunt']['launches']} launches)")
+            print_stages(results['producthunt']['stages'])
+        if args.only in (None, "cycle"):
+            results['cycle'] = bench_cycle(site, args)
+            cycle = results['cycle']
+            print(f"process_products: {cycle['products']} products in {cycle['seconds']}s "
+                  f"= {cycle['products_per_min']} products/min, {cycle['notified']} notified")
+            print_stages(cycle['stages'])
+    finally:
+        site.stop()
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    results['requests_served'] = site.requests
+    print(f"Peak RSS: {results['peak_rss_mb']} MB, {site.requests} requests served")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Local stand-ins for everything a cycle talks to: Product Hunt pages in the
+markup the scrapers read, and lead websites of each kind the analyzer has to
+classify. Nothing here touches the network.
+"""
+import sys
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Lead website kinds, assigned round-robin to products.
+# None of them scores 'Good': the analyzer's heuristics start every page at 0
+# and only subtract, so a healthy page like 'fast' lands on 'Potentially Bad'.
+SITE_KINDS = ('fast', 'slow', 'missing', 'parked', 'huge', 'jsonly')
+
+FILLER = (
+    "We help small teams ship faster with simple tools for planning, tracking and "
+    "reviewing work. Trusted by thousands of companies around the world. "
+)
+
+def site_body(kind):
+    """(status, content_type, body) for a synthetic lead website"""
+    if kind == 'missing':
+        return 404, 'text/html', b"<html><head><title>Not Found</title></head><body>Not Found</body></html>"
+    if kind == 'parked':
+        body = "<html><head><title>example.com</title></head><body><h1>This domain for sale</h1>" \
+               "<p>Buy this domain today. Contact the owner for pricing.</p></body></html>"
+        return 200, 'text/html', body.encode()
+    if kind == 'jsonly':
+        body = "<!doctype html><html><head><title>App</title><script src=\"/static/app.js\"></script>" \
+               "</head><body><div id=\"root\"></div></body></html>"
+        return 200, 'text/html', body.encode()
+    if kind == 'huge':
+        # Several MB of real text; the analyzer should stop reading early
+        body = "<html><head><title>Huge page</title></head><body>" + ("<p>" + FILLER * 20 + "</p>") * 2000 + "</body></html>"
+        return 200, 'text/html', body.encode()
+    body = "<html><head><title>Acme - plan your work</title></head><body><h1>Acme</h1>" + \
+           ("<p>" + FILLER + "</p>") * 10 + "</body></html>"
+    return 200, 'text/html', body.encode()
+
+class QuietServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that doesn't print a traceback when a client hangs up early"""
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return  # The analyzer stops reading once it has seen enough
+        super().handle_error(request, client_address)
+
+class StandInSite:
+    """
+    Serves `products` launches under /, /posts/<slug> and /@<maker>, plus the
+    lead websites under /site/<kind>/<n>. `slow_delay` is how long the slow
+    site holds the response; `latency` is added to every Product Hunt page.
+    """
+    def __init__(self, products=30, slow_delay=3.0, latency=0.0):
+        self.products = products
+        self.slow_delay = slow_delay
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._bodies = {kind: site_body(kind) for kind in SITE_KINDS}
+        self.server = QuietServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="bench-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def kind_of(self, index):
+        return SITE_KINDS[index % len(SITE_KINDS)]
+
+    def homepage(self):
+        cards = "".join(
+            f'<div data-test="post-item"><a href="/posts/product-{i}"><h3>Product {i}</h3></a>'
+            f'<p class="tagline">Tagline for product {i}</p></div>'
+            for i in range(self.products)
+        )
+        return f"<html><head><title>Product Hunt</title></head><body><main>{cards}</main></body></html>"
+
+    def product_page(self, index):
+        website = f"{self.base_url}/site/{self.kind_of(index)}/{index}"
+        return (
+            f"<html><head><title>Product {index}</title></head><body><h1>Product {index}</h1>"
+            f'<p data-test="product-description">Product {index} does useful things.</p>'
+            f'<a data-test="product-website" href="{website}">Visit website</a>'
+            f'<div data-test="makers-list"><a href="/@maker{index}">Maker {index}</a>'
+            f'<a href="/@maker{index + 1}">Maker {index + 1}</a></div>'
+            f'<a href="https://twitter.com/product{index}">Twitter</a>'
+            "</body></html>"
+        )
+
+    def maker_page(self, name):
+        return (
+            f'<html><head><title>{name}</title><link rel="canonical" href="{self.base_url}/@{name}"></head>'
+            f"<body><h1>{name}</h1>"
+            f'<a href="https://twitter.com/{name}">Twitter</a>'
+            f'<a href="https://www.linkedin.com/in/{name}">LinkedIn</a>'
+            f'<a href="https://{name}.example.com">Website</a>'
+            "</body></html>"
+        )
+
+    def respond(self, path):
+        """(status, content_type, body, delay) for a request path"""
+        path = path.split('?', 1)[0]
+        if path.startswith('/site/'):
+            kind = path.split('/')[2]
+            if kind not in self._bodies:
+                return 404, 'text/plain', b"unknown site", 0
+            status, content_type, body = self._bodies[kind]
+            return status, content_type, body, self.slow_delay if kind == 'slow' else 0
+        if path == '/':
+            return 200, 'text/html; charset=utf-8', self.homepage().encode(), self.latency
+        if path.startswith('/posts/product-'):
+            return 200, 'text/html; charset=utf-8', self.product_page(int(path.rsplit('-', 1)[1])).encode(), self.latency
+        if path.startswith('/@'):
+            return 200, 'text/html; charset=utf-8', self.maker_page(path[2:]).encode(), self.latency
+        return 404, 'text/plain', b"not found", 0
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                try:
+                    status, content_type, body, delay = site.respond(self.path)
+                except ValueError:
+                    status, content_type, body, delay = 400, 'text/plain', b"bad request", 0
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The analyzer hangs up once it has seen enough
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
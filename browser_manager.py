@@ -0,0 +1,170 @@
+from playwright.sync_api import sync_playwright
+from metrics import NAVIGATION_SECONDS
+import time
+import har
+
+def wait_for_ready(page, selector=None, timeout=10000, network_quiet=2000):
+    """
+    Wait for concrete readiness signals instead of a fixed sleep: the target
+    selector (if any) and then a short window for the network to go quiet.
+    Returns False if the selector never appeared.
+    """
+    ready = True
+    if selector:
+        try:
+            page.wait_for_selector(selector, timeout=timeout)
+        except Exception:
+            ready = False
+    if network_quiet:
+        try:
+            page.wait_for_load_state("networkidle", timeout=network_quiet)
+        except Exception:
+            # Pages with polling or websockets never go fully idle
+            pass
+    return ready
+
+def visit_batch(pages, urls, extract, ready_selector=None, pacer=None, source="browser", network_quiet=1500):
+    """
+    Load one url per page and run extract(page, url) on each once
+    ready_selector is present. Every tab is navigated (paced) up to its first
+    response before any is waited on, so the browser loads the rest of the
+    pages in parallel. Returns results aligned with urls, None where a page
+    failed to load or extract, or ready_selector never appeared (a login
+    wall or bot check is a failed load, not an empty page).
+    """
+    started = []
+    for page, url in zip(pages, urls):
+        try:
+            if pacer:
+                # Tabs already navigating need the event loop: route handlers run in Python
+                pacer.wait(url, sleep=pacer.browser_sleep(page))
+            navigated_at = time.monotonic()
+            # "commit" returns once the response starts; a tab already on url navigates again all the same
+            page.goto(url, wait_until="commit")
+            started.append((page, url, navigated_at))
+        except Exception as e:
+            print(f"Error opening {url}: {e}", flush=True)
+            started.append((page, url, None))
+    
+    loaded = []
+    for page, url, navigated_at in started:
+        if navigated_at is None:
+            loaded.append(False)
+            continue
+        try:
+            page.wait_for_load_state("domcontentloaded")
+            ready = wait_for_ready(page, ready_selector, network_quiet=network_quiet)
+            NAVIGATION_SECONDS.observe(time.monotonic() - navigated_at, source=source, transport="browser")
+            if not ready:
+                print(f"{url} never showed {ready_selector} (landed on {page.url})", flush=True)
+            loaded.append(ready)
+        except Exception as e:
+            print(f"Error loading {url}: {e}", flush=True)
+            loaded.append(False)
+    
+    results = []
+    for (page, url, _), ok in zip(started, loaded):
+        if not ok:
+            results.append(None)
+            continue
+        try:
+            results.append(extract(page, url))
+        except Exception as e:
+            print(f"Error extracting {url}: {e}", flush=True)
+            results.append(None)
+    return results
+
+class BrowserManager:
+    """
+    Owns a single long-lived Chromium shared by all bots.
+    Each source (producthunt, crunchbase, linkedin) gets its own isolated
+    context with its own storage state, and pages() hands out its tabs. If
+    the browser crashes it is relaunched on the next request for a context.
+    Like all Playwright sync objects, a manager must stay on the thread that created it.
+    """
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.playwright = None
+        self.browser = None
+        self.contexts = {}
+        self.tabs = {}  # source -> pages opened in its context by pages()
+        self.launches = 0
+
+    def is_connected(self):
+        return self.browser is not None and self.browser.is_connected()
+
+    def ensure_browser(self):
+        """Return a connected browser, launching or relaunching it if needed"""
+        if self.is_connected():
+            return self.browser
+        
+        if self.browser is not None:
+            print("Browser disconnected. Relaunching Chromium...", flush=True)
+            self.contexts = {}
+            self.tabs = {}
+        if self.playwright is None:
+            self.playwright = sync_playwright().start()
+        
+        self.browser = self.playwright.chromium.launch(headless=self.headless)
+        self.launches += 1
+        return self.browser
+
+    def new_context(self, source, storage_state=None, **options):
+        """
+        Open a fresh context for source, replacing any previous one. With
+        HAR_MODE=record its traffic is saved to HAR_DIR/<source>.har when the
+        context closes; with HAR_MODE=replay it is served from that file.
+        """
+        browser = self.ensure_browser()
+        self.close_context(source)
+        context = browser.new_context(storage_state=storage_state, **har.context_options(source), **options)
+        har.attach_replay(context, source)
+        self.contexts[source] = context
+        return context
+
+    def pages(self, source, count=1, resource_policy=None, **options):
+        """
+        Return count tabs in source's context for reuse across calls. The
+        context is opened with options (as for new_context) on first use and
+        again after the browser was relaunched; resource_policy, if given, is
+        attached to it. Tabs beyond those already open are added as needed.
+        """
+        self.ensure_browser()
+        if source not in self.contexts:
+            context = self.new_context(source, **options)
+            if resource_policy:
+                resource_policy.attach(context)
+        pages = self.tabs.setdefault(source, [])
+        while len(pages) < count:
+            pages.append(self.contexts[source].new_page())
+        return pages[:count]
+
+    def close_context(self, source, storage_path=None):
+        """Close source's context, saving its storage state first if storage_path is given"""
+        self.tabs.pop(source, None)
+        context = self.contexts.pop(source, None)
+        if context is None:
+            return
+        if storage_path:
+            try:
+                context.storage_state(path=storage_path)
+            except:
+                pass
+        try:
+            context.close()
+        except:
+            pass
+
+    def close(self):
+        """Close every context and shut the browser down"""
+        for source in list(self.contexts):
+            self.close_context(source)
+        if self.browser:
+            try:
+                self.browser.close()
+            except:
+                pass
+            self.browser = None
+        if self.playwright:
+            self.playwright.stop()
+            self.playwright = None
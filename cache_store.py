@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+# Directory for persistent state (point at a mounted disk on Render to survive redeploys)
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+
+CacheEntry = namedtuple("CacheEntry", ["value", "stored_at", "age"])
+
+def data_path(filename):
+    """Return a path inside DATA_DIR, creating the directory if needed"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+class PersistentCache:
+    """
+    SQLite-backed key/value cache shared across threads and process restarts.
+    Values are stored as JSON. Entries older than max_age are dropped and,
+    once more than max_entries are stored, the least recently used ones are
+    evicted.
+    """
+    def __init__(self, path, table="cache", max_entries=5000, max_age=None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+        self._conn.commit()
+
+    def get_entry(self, key):
+        """Return a CacheEntry for key (fresh or stale), or None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.max_age is not None and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return CacheEntry(json.loads(row[0]), row[1], now - row[1])
+
+    def get(self, key, ttl=None):
+        """Return the cached value if present and younger than ttl seconds"""
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        if ttl is not None and entry.age > ttl:
+            # Stale entries count as misses for callers that need fresh data
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return entry.value
+
+    def put(self, key, value):
+        """Store value under key, resetting its age"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def keys_older_than(self, seconds):
+        """Return keys whose value was stored more than seconds ago"""
+        cutoff = time.time() - seconds
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key FROM {self.table} WHERE stored_at < ? ORDER BY stored_at", (cutoff,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def evict(self):
+        """Drop expired entries and trim to max_entries"""
+        with self._lock:
+            self._evict(time.time())
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.max_age is not None:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (now - self.max_age,))
+        if self.max_entries:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,79 @@
+import json
+import time
+import sqlite3
+import threading
+
+class CycleCheckpoint:
+    """
+    Progress of the cycle in flight, so a restarted process can pick up
+    where the previous one stopped. Holds the launch list the cycle started
+    from and, per product, the last stage completed:
+
+      scraped - details, makers and Crunchbase data are in the stored lead
+      done    - analyzed, notified and marked in CrawlState
+
+    finish() clears it once a cycle completes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cycle ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), started_at REAL NOT NULL, launches TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            "url TEXT PRIMARY KEY, stage TEXT NOT NULL, lead TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def resume(self, max_age):
+        """Launch list of an unfinished cycle started within max_age seconds, else None"""
+        with self._lock:
+            row = self._conn.execute("SELECT started_at, launches FROM cycle WHERE id = 1").fetchone()
+        if row is None or time.time() - row[0] > max_age:
+            return None
+        return json.loads(row[1])
+
+    def begin(self, launches):
+        """Start tracking a new cycle, discarding any previous progress"""
+        with self._lock:
+            self._conn.execute("DELETE FROM progress")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cycle (id, started_at, launches) VALUES (1, ?, ?)",
+                (time.time(), json.dumps(launches))
+            )
+            self._conn.commit()
+
+    def save(self, url, stage, lead_data=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO progress (url, stage, lead, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET stage = excluded.stage, "
+                "lead = COALESCE(excluded.lead, progress.lead), updated_at = excluded.updated_at",
+                (url, stage, json.dumps(lead_data) if lead_data is not None else None, time.time())
+            )
+            self._conn.commit()
+
+    def scraped_lead(self, url):
+        """The stored lead for a product that got past scraping, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT lead FROM progress WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def stages(self):
+        """Count of products per completed stage"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT stage, COUNT(*) FROM progress GROUP BY stage").fetchall())
+
+    def finish(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM progress")
+            self._conn.execute("DELETE FROM cycle")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,65 @@
+import time
+import sqlite3
+import hashlib
+import threading
+
+class CrawlState:
+    """
+    Persistent record of launches already processed, indexed by product URL.
+    Each row keeps a fingerprint of the listing (name + tagline) so a launch
+    that was edited since it was last processed is picked up again.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            "url TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+            "first_seen REAL NOT NULL, last_processed REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def fingerprint(product):
+        """Stable hash of the listing fields that matter for a lead"""
+        content = "\x1f".join([
+            product.get('name', '').strip().lower(),
+            product.get('tagline', '').strip().lower()
+        ])
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def filter_new(self, products):
+        """Return only products that are unseen or whose fingerprint changed"""
+        if not products:
+            return []
+        urls = [p['url'] for p in products]
+        with self._lock:
+            placeholders = ",".join("?" * len(urls))
+            rows = self._conn.execute(
+                f"SELECT url, fingerprint FROM products WHERE url IN ({placeholders})", urls
+            ).fetchall()
+        known = dict(rows)
+        return [p for p in products if known.get(p['url']) != self.fingerprint(p)]
+
+    def mark_processed(self, product):
+        """Record that product went through detail, enrichment and analysis"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO products (url, fingerprint, first_seen, last_processed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET fingerprint = excluded.fingerprint, last_processed = excluded.last_processed",
+                (product['url'], self.fingerprint(product), now, now)
+            )
+            self._conn.commit()
+
+    def forget_older_than(self, seconds):
+        """Drop launches not processed for the given number of seconds"""
+        with self._lock:
+            self._conn.execute("DELETE FROM products WHERE last_processed < ?", (time.time() - seconds,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,21 +1,124 @@
-from playwright.sync_api import sync_playwright
-import time
-import random
+from browser_manager import BrowserManager, wait_for_ready
+from pacing import PacingScheduler
+from link_classifier import classify_links
+from metrics import STAGE_SECONDS, NAVIGATION_SECONDS
 import os
+import re
+
+COMPANY_SUFFIXES = ('inc', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'gmbh', 'sas', 'bv')
+
+COMPANY_SCRIPT = """() => {
+    const text = el => el ? el.innerText.trim() : null;
+    return {
+        body: document.body ? document.body.innerText : '',
+        location: text(document.querySelector('[class*="location"], [class*="headquarters"]')),
+        description: text(document.querySelector('[class*="description"]')),
+        hrefs: [...document.querySelectorAll('a[href]')].map(a => a.getAttribute('href'))
+    };
+}"""
+
+# State of a text-search page, polled in the page for up to `timeout` ms:
+# {href} for the first company hit, {href: null} once the page says nothing
+# matched, null if it shows neither (bot check, login wall, still loading)
+SEARCH_STATE_SCRIPT = """async (timeout) => {
+    const state = () => {
+        const link = document.querySelector('a[href^="/organization/"]');
+        if (link) return {href: link.getAttribute('href')};
+        const text = document.body ? document.body.innerText : '';
+        if (document.querySelector('[class*="no-results"]') || /\\bno (matching )?results\\b|\\b0 results\\b/i.test(text)) return {href: null};
+        return null;
+    };
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+        const found = state();
+        if (found) return found;
+        await new Promise(resolve => setTimeout(resolve, 250));
+    }
+    return state();
+}"""
+
+class SearchNotLoaded(Exception):
+    """A Crunchbase page never showed what the lookup waits for (results, a no-results message or a company heading)"""
+
+def parse_search(state, search_url):
+    """Company URL from SEARCH_STATE_SCRIPT output, None if nothing matched; raises if the page never loaded"""
+    if state is None:
+        raise SearchNotLoaded(f"{search_url} showed neither results nor a no-results message")
+    return "https://www.crunchbase.com" + state['href'] if state.get('href') else None
+
+def parse_company(data, company_url):
+    """Turn COMPANY_SCRIPT output into the company details dict"""
+    details = {
+        'crunchbase_url': company_url,
+        'funding': None,
+        'employees': None,
+        'location': data.get('location'),
+        'founded': None,
+        'phone': None,
+        'email': None,
+        'linkedin': None,
+        'description': None
+    }
+    page_text = data.get('body', '')
+    
+    # Try to extract funding (look for patterns like "$1.5M", "$500K", etc.)
+    funding_match = re.search(r'\$[\d.]+[KMB]', page_text)
+    if funding_match:
+        details['funding'] = funding_match.group()
+    
+    # Try to extract employee count
+    emp_match = re.search(r'(\d+-\d+)\s+Employees', page_text, re.IGNORECASE)
+    if emp_match:
+        details['employees'] = emp_match.group(1)
+    
+    # Get founded year
+    founded_match = re.search(r'Founded\s+(\d{4})', page_text, re.IGNORECASE)
+    if founded_match:
+        details['founded'] = founded_match.group(1)
+    
+    # Get description
+    desc_text = data.get('description')
+    if desc_text and len(desc_text) < 500:  # Reasonable description length
+        details['description'] = desc_text
+    
+    # Get contact info from links
+    links = classify_links(data.get('hrefs', []))
+    company_pages = [href for href in links.get('linkedin', []) if '/company' in href]
+    if company_pages:
+        details['linkedin'] = company_pages[-1]
+    if links.get('email'):
+        details['email'] = links['email'][-1]
+    if links.get('phone'):
+        details['phone'] = links['phone'][-1].replace('-', '').replace(' ', '')
+    
+    return details
+
+def normalize_company_name(name):
+    """Cache key for a company name: lowercase words without punctuation or legal suffixes"""
+    words = re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
 
 class CrunchbaseBot:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, resource_policy=None, pacer=None, cache=None, found_ttl=14 * 24 * 3600, not_found_ttl=3 * 24 * 3600):
         self.headless = headless
-        self.playwright = None
-        self.browser = None
-        self.context = None
-        self.page = None
+        self.cache = cache  # Optional PersistentCache keyed by normalize_company_name()
+        self.found_ttl = found_ttl
+        self.not_found_ttl = not_found_ttl
+        self.stale_names = {}  # Stale cache keys awaiting refresh_stale() -> original name
+        self.pacer = pacer or PacingScheduler(min_interval=2.0)  # Shared per-domain request pacing
+        self.resource_policy = resource_policy  # Optional ResourcePolicy applied to the context
+        self.browser_manager = None
+        self._owns_browser = False
+        self.storage_state = None
         self.auth_file = "cb_auth.json"
         
-    def start(self, auth_content=None):
-        """Initialize browser with optional authentication"""
+    def start(self, auth_content=None, browser_manager=None):
+        """Open a browser context with optional authentication (on a shared browser if given)"""
         print("Initializing Crunchbase bot...", flush=True)
-        self.playwright = sync_playwright().start()
+        self._owns_browser = browser_manager is None
+        self.browser_manager = browser_manager or BrowserManager(headless=self.headless)
         
         # Load authentication if available
         storage_state = None
@@ -30,37 +133,23 @@ class CrunchbaseBot:
         elif os.path.exists(self.auth_file):
             storage_state = self.auth_file
         
-        # Launch browser
-        self.browser = self.playwright.chromium.launch(headless=self.headless)
-        self.context = self.browser.new_context(
-            storage_state=storage_state,
+        self.storage_state = storage_state
+        # The context is opened on first lookup; cache hits never need it
+    
+    def _page(self):
+        """Return the tab in the crunchbase context, opened on first use (see BrowserManager.pages)"""
+        return self.browser_manager.pages(
+            "crunchbase",
+            resource_policy=self.resource_policy,
+            storage_state=self.storage_state,
             viewport={"width": 1920, "height": 1080},
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        )
-        self.page = self.context.new_page()
+        )[0]
         
     def search_company(self, company_name):
         """Search for a company on Crunchbase and return URL if found"""
         try:
-            # Clean company name
-            search_query = company_name.replace(' ', '+')
-            search_url = f"https://www.crunchbase.com/textsearch?q={search_query}"
-            
-            print(f"Searching Crunchbase for: {company_name}", flush=True)
-            self.page.goto(search_url, wait_until="domcontentloaded", timeout=15000)
-            time.sleep(random.uniform(2, 3))
-            
-            # Look for first company result
-            company_link = self.page.query_selector('a[href^="/organization/"]')
-            if company_link:
-                href = company_link.get_attribute('href')
-                company_url = "https://www.crunchbase.com" + href
-                print(f"  Found on Crunchbase: {company_url}", flush=True)
-                return company_url
-            else:
-                print(f"  Not found on Crunchbase.", flush=True)
-                return None
-                
+            return self._search(company_name)
         except Exception as e:
             print(f"Error searching Crunchbase: {e}", flush=True)
             return None
@@ -68,80 +157,116 @@ class CrunchbaseBot:
     def get_company_details(self, company_url):
         """Extract company details from Crunchbase page"""
         try:
-            self.page.goto(company_url, wait_until="domcontentloaded", timeout=15000)
-            time.sleep(random.uniform(3, 4))
-            
-            details = {
-                'crunchbase_url': company_url,
-                'funding': None,
-                'employees': None,
-                'location': None,
-                'founded': None,
-                'phone': None,
-                'email': None,
-                'linkedin': None,
-                'description': None
-            }
-            
-            # Get all text content for parsing
-            page_text = self.page.inner_text('body')
-            
-            # Try to extract funding (look for patterns like "$1.5M", "$500K", etc.)
-            import re
-            funding_match = re.search(r'\$[\d.]+[KMB]', page_text)
-            if funding_match:
-                details['funding'] = funding_match.group()
-            
-            # Try to extract employee count
-            emp_match = re.search(r'(\d+-\d+)\s+Employees', page_text, re.IGNORECASE)
-            if emp_match:
-                details['employees'] = emp_match.group(1)
-            
-            # Get location (look for common patterns)
-            location_elem = self.page.query_selector('[class*="location"], [class*="headquarters"]')
-            if location_elem:
-                details['location'] = location_elem.inner_text().strip()
-            
-            # Get founded year
-            founded_match = re.search(r'Founded\s+(\d{4})', page_text, re.IGNORECASE)
-            if founded_match:
-                details['founded'] = founded_match.group(1)
-            
-            # Get description
-            desc_elem = self.page.query_selector('[class*="description"]')
-            if desc_elem:
-                desc_text = desc_elem.inner_text().strip()
-                if len(desc_text) < 500:  # Reasonable description length
-                    details['description'] = desc_text
-            
-            # Get contact info from links
-            all_links = self.page.query_selector_all('a[href]')
-            for link in all_links:
-                href = link.get_attribute('href')
-                if not href:
-                    continue
-                
-                if 'linkedin.com/company' in href:
-                    details['linkedin'] = href
-                elif href.startswith('mailto:'):
-                    details['email'] = href.replace('mailto:', '')
-                elif href.startswith('tel:'):
-                    details['phone'] = href.replace('tel:', '').replace('-', '').replace(' ', '')
-            
-            return details
-            
+            return self._company_details(company_url)
         except Exception as e:
             print(f"Error getting Crunchbase details: {e}", flush=True)
             return None
     
-    def close(self):
-        """Close browser"""
-        if self.context:
+    def enrich(self, company_name):
+        """
+        Crunchbase details for company_name, or None if it isn't on Crunchbase.
+        Served from the cache when possible: found and not-found results have
+        separate TTLs, and stale entries are returned as-is and queued for
+        refresh_stale() instead of being looked up again mid-cycle.
+        """
+        hit, details = self.cached(company_name)
+        if hit:
+            return details
+        
+        try:
+            details = self._lookup(company_name)
+        except Exception as e:
+            # Failures are not cached so the next cycle tries again
+            print(f"Error looking up {company_name} on Crunchbase: {e}", flush=True)
+            return None
+        
+        self.remember(company_name, details)
+        return details
+    
+    def cached(self, company_name):
+        """Return (hit, details) from the cache, queueing stale hits for refresh"""
+        key = normalize_company_name(company_name)
+        if self.cache is None or not key:
+            return False, None
+        entry = self.cache.get_entry(key)
+        if entry is None:
+            return False, None
+        ttl = self.found_ttl if entry.value['found'] else self.not_found_ttl
+        if entry.age > ttl:
+            self.stale_names[key] = company_name
+        return True, entry.value['details']
+    
+    def remember(self, company_name, details):
+        """Cache a completed lookup (details None means not on Crunchbase)"""
+        key = normalize_company_name(company_name)
+        if self.cache is not None and key:
+            self.cache.put(key, {'name': company_name, 'found': details is not None, 'details': details})
+            self.stale_names.pop(key, None)
+    
+    def refresh_stale(self, limit=10):
+        """
+        Re-run lookups for up to limit stale cache entries (call outside a
+        cycle). Each entry tried leaves the queue, so a failure doesn't hold
+        up the rest; it is queued again the next time a cycle reads it.
+        """
+        refreshed = 0
+        for key, company_name in list(self.stale_names.items())[:limit]:
+            self.stale_names.pop(key, None)
             try:
-                self.context.storage_state(path=self.auth_file)
-            except:
-                pass
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
+                details = self._lookup(company_name)
+            except Exception as e:
+                print(f"Error refreshing {company_name} on Crunchbase: {e}", flush=True)
+                continue
+            self.remember(company_name, details)
+            refreshed += 1
+        return refreshed
+    
+    def _lookup(self, company_name):
+        """Search and read details, raising on navigation errors; None means not on Crunchbase"""
+        company_url = self._search(company_name)
+        if not company_url:
+            return None
+        return self._company_details(company_url)
+    
+    @STAGE_SECONDS.time(stage="crunchbase_search")
+    def _search(self, company_name):
+        # Clean company name
+        search_query = company_name.replace(' ', '+')
+        search_url = f"https://www.crunchbase.com/textsearch?q={search_query}"
+        
+        print(f"Searching Crunchbase for: {company_name}", flush=True)
+        page = self._page()
+        self.pacer.wait(search_url)
+        with NAVIGATION_SECONDS.time(source="crunchbase", transport="browser"):
+            page.goto(search_url, wait_until="domcontentloaded", timeout=15000)
+            state = page.evaluate(SEARCH_STATE_SCRIPT, 8000)
+        
+        # Raises unless the page really loaded, so bot checks aren't cached as "not on Crunchbase"
+        company_url = parse_search(state, search_url)
+        if company_url:
+            print(f"  Found on Crunchbase: {company_url}", flush=True)
+        else:
+            print(f"  Not found on Crunchbase.", flush=True)
+        return company_url
+    
+    @STAGE_SECONDS.time(stage="crunchbase_company")
+    def _company_details(self, company_url):
+        page = self._page()
+        self.pacer.wait(company_url)
+        with NAVIGATION_SECONDS.time(source="crunchbase", transport="browser"):
+            page.goto(company_url, wait_until="domcontentloaded", timeout=15000)
+            ready = wait_for_ready(page, 'h1', timeout=8000)
+        if not ready:
+            # Raising keeps a bot check or login wall out of the cache as an empty "found" record
+            raise SearchNotLoaded(f"{company_url} never showed its heading (landed on {page.url})")
+        
+        # One round-trip for the page text, the few targeted elements and every href
+        data = page.evaluate(COMPANY_SCRIPT)
+        return parse_company(data, company_url)
+    
+    def close(self):
+        """Save the session and close this bot's context (and the browser if the bot owns it)"""
+        if self.browser_manager:
+            self.browser_manager.close_context("crunchbase", storage_path=self.auth_file)
+            if self._owns_browser:
+                self.browser_manager.close()
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import base64
+import threading
+from urllib.parse import urlparse
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from cache_store import DATA_DIR
+
+# HAR record/replay (override through environment variables)
+#   record - save every browser context's and the HTTP session's traffic to HAR_DIR
+#   replay - serve navigations and HTTP requests from those archives instead of the network
+HAR_MODE = os.environ.get("HAR_MODE", "off").lower()
+HAR_DIR = os.environ.get("HAR_DIR", os.path.join(DATA_DIR, "har"))
+HAR_NOT_FOUND = os.environ.get("HAR_NOT_FOUND", "abort")  # Replay misses: "abort" (deterministic) or "fallback" (network)
+# Never recorded: Telegram calls carry the bot token. While replaying they get a
+# local stub answer instead, so a replayed cycle never messages the real chat
+HAR_SKIP_HOSTS = tuple(h.strip() for h in os.environ.get("HAR_SKIP_HOSTS", "api.telegram.org").split(",") if h.strip())
+
+HTTP_ARCHIVE = "http"  # Archive name for the shared requests session
+
+def har_path(source):
+    return os.path.join(HAR_DIR, f"{source}.har")
+
+def recording():
+    return HAR_MODE == "record"
+
+def replaying():
+    return HAR_MODE == "replay"
+
+def context_options(source):
+    """Extra new_context() options: record_har_path while recording (written when the context closes)"""
+    if not recording():
+        return {}
+    os.makedirs(HAR_DIR, exist_ok=True)
+    return {"record_har_path": har_path(source), "record_har_content": "embed"}
+
+def replay_path(source):
+    """Archive to replay for source, or None when not replaying or nothing was recorded"""
+    if not replaying():
+        return None
+    path = har_path(source)
+    if not os.path.exists(path):
+        print(f"No HAR recording for {source} at {path}; using the network.", flush=True)
+        return None
+    return path
+
+def attach_replay(context, source):
+    """Serve context's requests from source's recording (sync Playwright)"""
+    path = replay_path(source)
+    if path:
+        context.route_from_har(path, not_found=HAR_NOT_FOUND)
+
+async def attach_replay_async(context, source):
+    """attach_replay for the async API"""
+    path = replay_path(source)
+    if path:
+        await context.route_from_har(path, not_found=HAR_NOT_FOUND)
+
+def _skipped(url):
+    host = (urlparse(url).hostname or '').lower()
+    return any(host == skip or host.endswith("." + skip) for skip in HAR_SKIP_HOSTS)
+
+def _headers(pairs):
+    return [{"name": name, "value": value} for name, value in pairs.items()]
+
+class HarRecorder:
+    """
+    Collects requests-session responses as HAR 1.2 entries. save() writes
+    them as a fresh archive and starts collecting anew, so each cycle's
+    archive holds that cycle's traffic, like the browser contexts' archives.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def hook(self, response, *args, **kwargs):
+        """requests response hook; reads the body so it can be archived"""
+        if _skipped(response.url):
+            return response
+        request = response.request
+        body = response.content or b''
+        try:
+            content = {"text": body.decode(response.encoding or 'utf-8')}
+        except (UnicodeDecodeError, LookupError):
+            content = {"text": base64.b64encode(body).decode('ascii'), "encoding": "base64"}
+        content.update(size=len(body), mimeType=response.headers.get('Content-Type', ''))
+        entry = {
+            "startedDateTime": time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+            "time": response.elapsed.total_seconds() * 1000,
+            "request": {
+                "method": request.method, "url": request.url, "httpVersion": "HTTP/1.1",
+                "headers": _headers(request.headers), "queryString": [], "cookies": [],
+                "headersSize": -1, "bodySize": 0
+            },
+            "response": {
+                "status": response.status_code, "statusText": response.reason or '', "httpVersion": "HTTP/1.1",
+                "headers": _headers(response.headers), "cookies": [], "content": content,
+                "redirectURL": response.headers.get('Location', ''), "headersSize": -1, "bodySize": len(body)
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": response.elapsed.total_seconds() * 1000, "receive": 0}
+        }
+        with self._lock:
+            self.entries.append(entry)
+        return response
+
+    def save(self):
+        with self._lock:
+            if not self.entries:
+                return
+            entries, self.entries = self.entries, []
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            archive = {"log": {"version": "1.2", "creator": {"name": "leadbot", "version": "1"}, "entries": entries}}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(archive, f)
+            os.replace(tmp_path, self.path)
+
+class HarReplayAdapter(BaseAdapter):
+    """
+    requests adapter answering from a HAR archive, matched on method and URL.
+    Repeated requests get the recorded responses in order, then the last one
+    again. Misses raise ConnectionError, or go to `fallback` when given and
+    HAR_NOT_FOUND is "fallback". Calls to HAR_SKIP_HOSTS are answered with a
+    stub {"ok": true} and counted in `stubbed`; they never leave the process.
+    """
+    def __init__(self, path, fallback=None):
+        super().__init__()
+        self.fallback = fallback
+        self.stubbed = 0
+        self.responses = {}
+        self._served = {}
+        self._lock = threading.Lock()
+        with open(path, encoding="utf-8") as f:
+            for entry in json.load(f)["log"]["entries"]:
+                key = (entry["request"]["method"].upper(), entry["request"]["url"])
+                self.responses.setdefault(key, []).append(entry["response"])
+
+    def send(self, request, **kwargs):
+        if _skipped(request.url):
+            with self._lock:
+                self.stubbed += 1
+            return self._stub_response(request)
+        key = (request.method.upper(), request.url)
+        if key not in self.responses:
+            if self.fallback and HAR_NOT_FOUND == "fallback":
+                return self.fallback.send(request, **kwargs)
+            raise RequestsConnectionError(f"{request.url} is not in the HAR recording", request=request)
+        with self._lock:
+            recorded = self.responses[key]
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+        return self._build_response(request, recorded[min(index, len(recorded) - 1)])
+
+    def _stub_response(self, request):
+        """Bot API success with nothing in it: no updates for getUpdates, True for the rest"""
+        result = [] if urlparse(request.url).path.endswith("/getUpdates") else True
+        return self._build_response(request, {
+            "status": 200, "statusText": "OK",
+            "headers": [{"name": "Content-Type", "value": "application/json"}],
+            "content": {"text": json.dumps({"ok": True, "result": result})}
+        })
+
+    def _build_response(self, request, recorded):
+        content = recorded.get("content", {})
+        text = content.get("text", "")
+        response = Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded.get("statusText", "")
+        # Bodies are stored decoded, so drop encodings and lengths that no longer apply
+        response.headers = CaseInsensitiveDict({
+            h["name"]: h["value"] for h in recorded.get("headers", [])
+            if h["name"].lower() not in ("content-encoding", "transfer-encoding", "content-length")
+        })
+        response.encoding = get_encoding_from_headers(response.headers)
+        if content.get("encoding") == "base64":
+            body = base64.b64decode(text)
+        else:
+            # Same charset the recorder decoded with, so response.text round-trips
+            body = text.encode(response.encoding or 'utf-8', errors='replace')
+        response._content = body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        if self.fallback:
+            self.fallback.close()
+
+def install(session, adapter):
+    """Apply HAR_MODE to the shared requests session; returns the recorder when recording"""
+    if recording():
+        recorder = HarRecorder(har_path(HTTP_ARCHIVE))
+        session.hooks["response"].append(recorder.hook)
+        return recorder
+    if replaying():
+        path = replay_path(HTTP_ARCHIVE)
+        if path:
+            replay = HarReplayAdapter(path, fallback=adapter)
+            session.mount("https://", replay)
+            session.mount("http://", replay)
+    return None
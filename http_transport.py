@@ -0,0 +1,50 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import har
+
+# Shared HTTP settings (override through environment variables)
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "32"))  # Hosts kept in the pool cache
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))  # Keep-alive sockets per host
+
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+_har_recorder = None
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use"""
+    global _session, _har_recorder
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                # HAR_MODE=record archives responses, HAR_MODE=replay answers from the archive
+                _har_recorder = har.install(session, adapter)
+                _session = session
+    return _session
+
+def timeout(read=None):
+    """Build a (connect, read) timeout tuple, optionally with a longer read budget"""
+    return (CONNECT_TIMEOUT, READ_TIMEOUT if read is None else read)
+
+def save_recording():
+    """Write the HTTP traffic recorded since the last save (HAR_MODE=record) as a fresh archive"""
+    if _har_recorder:
+        _har_recorder.save()
+
+def close_session():
+    """Close all pooled connections"""
+    global _session
+    save_recording()
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,151 @@
+import os
+import csv
+import glob
+import json
+import time
+import threading
+from openpyxl import Workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet is optional; CSV needs nothing extra
+    pa = None
+    pq = None
+
+LEAD_COLUMNS = [
+    'recorded_at', 'is_target', 'name', 'tagline', 'product_url', 'website',
+    'website_status', 'website_score', 'website_notes',
+    'twitter', 'linkedin', 'facebook', 'instagram', 'email', 'makers',
+    'crunchbase_url', 'funding', 'employees', 'location', 'founded',
+    'company_phone', 'company_email', 'company_linkedin'
+]
+
+def flatten_lead(lead_data, is_target=None):
+    """One flat row per lead: makers become a JSON string and missing values empty strings"""
+    row = {column: lead_data.get(column) for column in LEAD_COLUMNS}
+    row['recorded_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    row['is_target'] = '' if is_target is None else bool(is_target)
+    row['makers'] = json.dumps(lead_data.get('makers') or [], ensure_ascii=False)
+    return {column: '' if value is None else value for column, value in row.items()}
+
+class LeadLog:
+    """
+    Append-only record of every lead, partitioned into one file per day
+    (leads-YYYY-MM-DD.csv). Each row is flushed as soon as it is appended,
+    so a crash loses nothing already processed and memory use does not grow
+    with the number of leads.
+
+    With format="parquet" (needs pyarrow), rows are buffered and written as
+    leads-YYYY-MM-DD-<n>.parquet parts every `parquet_batch` rows and on
+    flush()/close(), since Parquet files can't be appended to once written.
+    """
+    def __init__(self, directory, format="csv", parquet_batch=50):
+        if format == "parquet" and pa is None:
+            print("pyarrow is not installed, writing the lead log as CSV.", flush=True)
+            format = "csv"
+        self.directory = directory
+        self.format = format
+        self.parquet_batch = parquet_batch
+        self.appended = 0
+        self._lock = threading.Lock()
+        self._day = None
+        self._file = None
+        self._writer = None
+        self._buffer = []
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, lead_data, is_target=None):
+        row = flatten_lead(lead_data, is_target)
+        with self._lock:
+            day = time.strftime('%Y-%m-%d')
+            if day != self._day:
+                self._rotate(day)
+            if self.format == "parquet":
+                self._buffer.append(row)
+                if len(self._buffer) >= self.parquet_batch:
+                    self._write_parquet()
+            else:
+                self._writer.writerow(row)
+                self._file.flush()
+            self.appended += 1
+
+    def _rotate(self, day):
+        """Start the partition for a new day"""
+        if self.format == "parquet":
+            self._write_parquet()
+        elif self._file:
+            self._file.close()
+        self._day = day
+        if self.format == "csv":
+            path = os.path.join(self.directory, f"leads-{day}.csv")
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._file = open(path, "a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=LEAD_COLUMNS)
+            if is_new:
+                self._writer.writeheader()
+                self._file.flush()
+
+    def _write_parquet(self):
+        if not self._buffer:
+            return
+        part = len(glob.glob(os.path.join(self.directory, f"leads-{self._day}-*.parquet")))
+        path = os.path.join(self.directory, f"leads-{self._day}-{part:04d}.parquet")
+        # Every column as text so parts always share one schema
+        rows = [{column: str(value) for column, value in row.items()} for row in self._buffer]
+        pq.write_table(pa.Table.from_pylist(rows), path)
+        self._buffer = []
+
+    def flush(self):
+        with self._lock:
+            if self.format == "parquet":
+                self._write_parquet()
+            elif self._file:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self.format == "parquet":
+                self._write_parquet()
+            elif self._file:
+                self._file.close()
+            self._file = None
+            self._writer = None
+            self._day = None
+
+    def files(self):
+        """Every partition in the log, oldest first"""
+        return sorted(glob.glob(os.path.join(self.directory, "leads-*.csv")) +
+                      glob.glob(os.path.join(self.directory, "leads-*.parquet")))
+
+    def iter_rows(self, since=None):
+        """Yield logged rows one at a time, optionally only from partitions dated since (YYYY-MM-DD) onwards"""
+        self.flush()
+        for path in self.files():
+            day = os.path.basename(path)[len("leads-"):len("leads-YYYY-MM-DD")]
+            if since and day < since:
+                continue
+            if path.endswith(".csv"):
+                with open(path, newline="", encoding="utf-8") as f:
+                    yield from csv.DictReader(f)
+            elif pq is not None:
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=500):
+                    yield from batch.to_pylist()
+
+def export_xlsx(lead_log, path, since=None, targets_only=False):
+    """
+    Write the lead log to an XLSX file using openpyxl's write-only mode, which
+    streams rows to disk instead of building the workbook in memory.
+    Returns the number of rows written.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Leads")
+    sheet.append(LEAD_COLUMNS)
+    count = 0
+    for row in lead_log.iter_rows(since=since):
+        if targets_only and str(row.get('is_target')) != 'True':
+            continue
+        sheet.append([row.get(column) for column in LEAD_COLUMNS])
+        count += 1
+    workbook.save(path)
+    return count
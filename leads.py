@@ -0,0 +1,148 @@
+# Lead records shared by process_products and the async pipeline
+from telegram_dispatcher import REJECTED, UNDELIVERED
+
+TARGET_STATUSES = ['No Website', 'Bad', 'Potentially Bad']
+
+def new_lead(product, details):
+    """Build the lead record for a scraped product"""
+    return {
+        'name': details['name'],
+        'tagline': product.get('tagline', ''),
+        'product_url': details['url'],
+        'website': details.get('website'),
+        'makers': details.get('makers', []),
+        'twitter': details.get('twitter'),
+        'linkedin': details.get('linkedin'),
+        'facebook': details.get('facebook'),
+        'instagram': details.get('instagram'),
+        'email': details.get('email'),
+        'website_status': 'N/A',
+        'website_score': 0,
+        'website_notes': '',
+        # Crunchbase data (optional)
+        'crunchbase_url': None,
+        'funding': None,
+        'employees': None,
+        'location': None,
+        'founded': None,
+        'company_phone': None,
+        'company_email': None,
+        'company_linkedin': None
+    }
+
+def add_crunchbase(lead_data, cb_details):
+    """Copy Crunchbase company details onto a lead"""
+    lead_data['crunchbase_url'] = cb_details.get('crunchbase_url')
+    lead_data['funding'] = cb_details.get('funding')
+    lead_data['employees'] = cb_details.get('employees')
+    lead_data['location'] = cb_details.get('location')
+    lead_data['founded'] = cb_details.get('founded')
+    lead_data['company_phone'] = cb_details.get('phone')
+    lead_data['company_email'] = cb_details.get('email')
+    lead_data['company_linkedin'] = cb_details.get('linkedin')
+
+def add_analysis(lead_data, analysis):
+    """Copy a WebsiteAnalyzer result onto a lead; returns True if it makes the lead a target"""
+    lead_data['website_status'] = analysis['status']
+    lead_data['website_score'] = analysis['score']
+    lead_data['website_notes'] = "; ".join(analysis['details'])
+    return analysis['status'] in ['Bad', 'Potentially Bad'] or analysis['score'] < 50
+
+def mark_no_website(lead_data):
+    lead_data['website_status'] = "No Website"
+    lead_data['website_score'] = 0
+
+def format_lead_message(lead_data):
+    """Telegram message for a target lead"""
+    # Format makers info
+    makers_text = ""
+    for i, maker in enumerate(lead_data['makers'], 1):
+        makers_text += f"\n**Maker {i}:** {maker['name']}"
+        if maker.get('profile_url'):
+            makers_text += f"\n  - Product Hunt: {maker['profile_url']}"
+        if maker.get('twitter'):
+            makers_text += f"\n  - Twitter: {maker['twitter']}"
+        if maker.get('linkedin'):
+            makers_text += f"\n  - LinkedIn: {maker['linkedin']}"
+        if maker.get('website'):
+            makers_text += f"\n  - Website: {maker['website']}"
+        if maker.get('email'):
+            makers_text += f"\n  - Email: {maker['email']}"
+        makers_text += "\n"
+    
+    # Build social links section
+    social_links = []
+    if lead_data.get('twitter'):
+        social_links.append(f"Twitter: {lead_data['twitter']}")
+    if lead_data.get('linkedin'):
+        social_links.append(f"LinkedIn: {lead_data['linkedin']}")
+    if lead_data.get('facebook'):
+        social_links.append(f"Facebook: {lead_data['facebook']}")
+    if lead_data.get('instagram'):
+        social_links.append(f"Instagram: {lead_data['instagram']}")
+    if lead_data.get('email'):
+        social_links.append(f"Email: {lead_data['email']}")
+    
+    social_text = "\n".join(social_links) if social_links else "No social links found"
+    
+    # Build Crunchbase section (if data available)
+    crunchbase_section = ""
+    if lead_data.get('crunchbase_url'):
+        crunchbase_section = f"""
+**🏢 Company Info (Crunchbase):**
+Crunchbase: {lead_data['crunchbase_url']}"""
+        if lead_data.get('funding'):
+            crunchbase_section += f"\nFunding: {lead_data['funding']}"
+        if lead_data.get('employees'):
+            crunchbase_section += f"\nEmployees: {lead_data['employees']}"
+        if lead_data.get('location'):
+            crunchbase_section += f"\nLocation: {lead_data['location']}"
+        if lead_data.get('founded'):
+            crunchbase_section += f"\nFounded: {lead_data['founded']}"
+        
+        # Company contact
+        company_contact = []
+        if lead_data.get('company_phone'):
+            company_contact.append(f"📞 Phone: {lead_data['company_phone']}")
+        if lead_data.get('company_email'):
+            company_contact.append(f"📧 Email: {lead_data['company_email']}")
+        if lead_data.get('company_linkedin'):
+            company_contact.append(f"🔗 LinkedIn: {lead_data['company_linkedin']}")
+        
+        if company_contact:
+            crunchbase_section += "\n\n**📞 Company Contact:**\n" + "\n".join(company_contact)
+        
+        crunchbase_section += "\n"
+    
+    # Format message for Telegram
+    message = f"""
+🚀 **NEW LEAD - Startup Founder**
+
+**Product:** {lead_data['name']}
+**Tagline:** {lead_data['tagline']}
+**Product Hunt:** {lead_data['product_url']}
+
+**📱 Product Social:**
+{social_text}
+{crunchbase_section}
+**👥 Founders/Makers:**{makers_text}
+
+**🌐 Website Analysis:**
+**Status:** {lead_data['website_status']}
+**URL:** {lead_data.get('website') or 'None'}
+**Score:** {lead_data['website_score']}/100
+**Notes:** {lead_data['website_notes'] or 'No website - perfect opportunity to offer your services!'}
+
+---
+💡 **Action:** Contact founders and offer website/app development services!
+"""
+    return message
+
+def lead_settled(lead_data, outcome):
+    """
+    True once a target lead's notification needs no retry: it was sent, or
+    Telegram rejected it for good (sending it again every cycle won't help).
+    """
+    if outcome == REJECTED:
+        print(f"  Telegram rejected the lead for {lead_data['name']}; it stays in the lead log.", flush=True)
+    return outcome != UNDELIVERED
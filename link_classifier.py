@@ -0,0 +1,52 @@
+from urllib.parse import urlparse
+
+# Link kinds matched on the host (exact host or any subdomain of it)
+SOCIAL_HOSTS = {
+    'twitter': ('twitter.com', 'x.com'),
+    'linkedin': ('linkedin.com', 'lnkd.in'),
+    'facebook': ('facebook.com', 'fb.com', 'fb.me'),
+    'instagram': ('instagram.com', 'instagr.am'),
+}
+
+def host_matches(host, suffix):
+    """True if host is suffix or a subdomain of it ('box.com' does not match 'x.com')"""
+    return host == suffix or host.endswith('.' + suffix)
+
+def classify_link(href, ignore_hosts=()):
+    """
+    Classify one href as (kind, value). kind is one of twitter, linkedin,
+    facebook, instagram, email, phone, website, or None for relative,
+    in-page and ignored links. value is the address for email/phone and
+    the href otherwise.
+    """
+    if not href:
+        return None, None
+    href = href.strip()
+    lowered = href.lower()
+
+    if lowered.startswith('mailto:'):
+        address = href[len('mailto:'):].split('?', 1)[0].strip()
+        return ('email', address) if address else (None, None)
+    if lowered.startswith('tel:'):
+        return 'phone', href[len('tel:'):].strip()
+    if not lowered.startswith(('http://', 'https://', '//')):
+        return None, None
+
+    host = (urlparse(href if not href.startswith('//') else 'https:' + href).hostname or '').lower()
+    if not host:
+        return None, None
+    for kind, suffixes in SOCIAL_HOSTS.items():
+        if any(host_matches(host, s) for s in suffixes):
+            return kind, href
+    if any(host_matches(host, s) for s in ignore_hosts):
+        return None, None
+    return 'website', href
+
+def classify_links(hrefs, ignore_hosts=()):
+    """Group hrefs by kind, keeping page order: {'twitter': [...], 'email': [...], ...}"""
+    groups = {}
+    for href in hrefs:
+        kind, value = classify_link(href, ignore_hosts)
+        if kind:
+            groups.setdefault(kind, []).append(value)
+    return groups
@@ -1,35 +1,65 @@
 import time
 import random
 import os
-from playwright.sync_api import sync_playwright
+from urllib.parse import urlparse
+from browser_manager import BrowserManager, visit_batch
+from cache_store import PersistentCache, data_path
+from pacing import PacingScheduler
+from metrics import NAVIGATION_SECONDS, STAGE_SECONDS
+
+CONTACT_INFO_SELECTOR = ".pv-contact-info__contact-type"
+
+# Website links from the contact-info overlay, read in one round-trip
+CONTACT_WEBSITES_SCRIPT = """() => [...document.querySelectorAll('.pv-contact-info__contact-type.ci-websites a')]
+    .map(a => a.getAttribute('href')).filter(Boolean)"""
+
+def normalize_profile_url(profile_url):
+    """Cache key for a profile: search results add tracking query strings to the same profile"""
+    parsed = urlparse(profile_url)
+    return f"https://www.linkedin.com{parsed.path.rstrip('/')}"
 
 class LinkedInBot:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, resource_policy=None, profile_cache=None, profile_cache_ttl=14 * 24 * 3600, concurrency=3, pacer=None):
         self.headless = headless
-        self.browser = None
-        self.context = None
-        self.page = None
-        self.playwright = None
+        self.resource_policy = resource_policy  # Optional ResourcePolicy applied to the context
+        # PersistentCache keyed by normalized profile URL, kept under DATA_DIR unless one is given
+        self.profile_cache = profile_cache if profile_cache is not None else PersistentCache(
+            data_path("linkedin_cache.db"),
+            table="profiles",
+            max_age=profile_cache_ttl
+        )
+        self.profile_cache_ttl = profile_cache_ttl
+        self.profile_cache_hits = 0
+        self.profile_cache_misses = 0
+        self.concurrency = max(1, concurrency)  # Tabs used by get_profiles_details
+        self.pacer = pacer or PacingScheduler(min_interval=2.0, jitter=0.5)  # LinkedIn is quick to flag fast clients
+        self.browser_manager = None
+        self._owns_browser = False
+        self.storage_state = None
         self.auth_file = 'auth.json'
 
-    def start(self, auth_content=None):
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=self.headless)
+    def start(self, auth_content=None, browser_manager=None):
+        self._owns_browser = browser_manager is None
+        self.browser_manager = browser_manager or BrowserManager(headless=self.headless)
         
         if auth_content:
              print("Loading authentication from Environment Variable...")
              # Create a temporary auth file from the env content
              with open(self.auth_file, 'w') as f:
                  f.write(auth_content)
-             self.context = self.browser.new_context(storage_state=self.auth_file)
+             self.storage_state = self.auth_file
         elif os.path.exists(self.auth_file):
             print(f"Loading authentication from {self.auth_file}...")
-            self.context = self.browser.new_context(storage_state=self.auth_file)
+            self.storage_state = self.auth_file
         else:
             print("No authentication found. Starting fresh context.")
-            self.context = self.browser.new_context()
+            self.storage_state = None
         
-        self.page = self.context.new_page()
+        self._pages()
+    
+    def _pages(self, count=1):
+        """Return count tabs in the linkedin context (see BrowserManager.pages)"""
+        return self.browser_manager.pages("linkedin", count, resource_policy=self.resource_policy, storage_state=self.storage_state)
 
     def login(self):
         """
@@ -39,17 +69,18 @@ class LinkedInBot:
         print("Logging into LinkedIn...", flush=True)
         
         # Go to LinkedIn homepage
-        self.page.goto("https://www.linkedin.com/", wait_until="domcontentloaded")
+        page = self._pages()[0]
+        page.goto("https://www.linkedin.com/", wait_until="domcontentloaded")
         time.sleep(random.uniform(2, 4))
         
         # Check if logged in successfully
         try:
-            self.page.wait_for_selector(".global-nav__content", timeout=10000)
+            page.wait_for_selector(".global-nav__content", timeout=10000)
             print("✅ Successfully logged in via cookies!", flush=True)
             
             # Save session state for future use
             try:
-                self.context.storage_state(path=self.auth_file)
+                page.context.storage_state(path=self.auth_file)
                 print("Session state saved.", flush=True)
             except Exception as e:
                 print(f"Warning: Could not save session state: {e}", flush=True)
@@ -77,24 +108,26 @@ class LinkedInBot:
             geo_param = "&geoUrn=%5B%22103644278%22%2C%22101165590%22%2C%22101174742%22%2C%22101452733%22%5D"
             
         search_url = f"https://www.linkedin.com/search/results/people/?keywords={keyword}{geo_param}&origin=SWITCH_SEARCH_VERTICAL"
-        self.page.goto(search_url)
+        page = self._pages()[0]
+        with NAVIGATION_SECONDS.time(source="linkedin", transport="browser"):
+            page.goto(search_url)
         
         leads = []
         
         for i in range(pages):
             print(f"Scraping page {i+1}...")
             try:
-                self.page.wait_for_selector(".reusable-search__result-container", timeout=10000)
+                page.wait_for_selector(".reusable-search__result-container", timeout=10000)
             except:
                 print("No results found or timeout.")
                 break
             
             # Scroll down to load all results
             for _ in range(3):
-                self.page.mouse.wheel(0, 1000)
+                page.mouse.wheel(0, 1000)
                 time.sleep(random.uniform(1, 2))
             
-            results = self.page.query_selector_all(".reusable-search__result-container")
+            results = page.query_selector_all(".reusable-search__result-container")
             
             for result in results:
                 try:
@@ -119,7 +152,7 @@ class LinkedInBot:
             
             # Go to next page if requested and available
             if i < pages - 1:
-                next_button = self.page.query_selector("button[aria-label='Next']")
+                next_button = page.query_selector("button[aria-label='Next']")
                 if next_button and next_button.is_enabled():
                     next_button.click()
                     time.sleep(random.uniform(3, 5))
@@ -134,45 +167,63 @@ class LinkedInBot:
         Visits a profile and tries to find a website in the Contact Info.
         """
         print(f"Visiting profile: {profile_url}")
-        try:
-            self.page.goto(profile_url)
-            time.sleep(random.uniform(2, 4))
-            
-            # Click "Contact info" if available
-            # The selector for contact info link usually contains 'contact-info' in href or id
-            contact_link = self.page.query_selector("a[id='top-card-text-details-contact-info']")
-            
-            website = None
-            
-            if contact_link:
-                contact_link.click()
-                time.sleep(random.uniform(1, 2))
-                
-                # Wait for modal
-                self.page.wait_for_selector(".pv-contact-info__contact-type", timeout=5000)
-                
-                # Look for website section
-                # This is tricky as structure changes. We look for links in the modal.
-                links = self.page.query_selector_all(".pv-contact-info__contact-type.ci-websites a")
-                for link in links:
-                    href = link.get_attribute("href")
-                    if href:
-                        website = href
-                        break # Just take the first one for now
-                
-                # Close modal
-                close_btn = self.page.query_selector("button[aria-label='Dismiss']")
-                if close_btn:
-                    close_btn.click()
-            
-            return website
-            
-        except Exception as e:
-            print(f"Error getting details for {profile_url}: {e}")
+        return self.get_profiles_details([profile_url])[0]
+    
+    @STAGE_SECONDS.time(stage="linkedin_profiles")
+    def get_profiles_details(self, profile_urls):
+        """
+        Websites for many profiles (e.g. the profile_urls of search_leads
+        results), aligned with profile_urls; None where there is none or the
+        page failed. Cached profiles cost no navigation; the rest are loaded
+        across a pool of self.concurrency tabs.
+        """
+        keys = [normalize_profile_url(url) if url else None for url in profile_urls]
+        websites = {}
+        pending = []
+        for key in keys:
+            if not key or key in websites or key in pending:
+                continue
+            cached = self._cached_profile(key)
+            if cached is not None:
+                websites[key] = cached['website']
+            else:
+                pending.append(key)
+        
+        if pending:
+            print(f"Fetching {len(pending)} LinkedIn profiles ({self.concurrency} at a time)...", flush=True)
+        for i in range(0, len(pending), self.concurrency):
+            batch = pending[i:i + self.concurrency]
+            pages = self._pages(len(batch))
+            # The contact-info overlay has its own URL: one navigation instead of visit, click and modal wait
+            overlay_urls = [f"{key}/overlay/contact-info/" for key in batch]
+            results = visit_batch(pages, overlay_urls, self._extract_website, CONTACT_INFO_SELECTOR, pacer=self.pacer, source="linkedin")
+            for key, result in zip(batch, results):
+                if result is None:
+                    continue  # Load failures aren't cached, so a later call retries them
+                websites[key] = result['website']
+                if self.profile_cache is not None:
+                    self.profile_cache.put(key, result)
+        
+        return [websites.get(key) for key in keys]
+    
+    def _cached_profile(self, key):
+        """Return cached {'website': ...} for a profile, counting the hit or miss"""
+        if self.profile_cache is None:
             return None
+        cached = self.profile_cache.get(key, ttl=self.profile_cache_ttl)
+        if cached is not None:
+            self.profile_cache_hits += 1
+        else:
+            self.profile_cache_misses += 1
+        return cached
+    
+    def _extract_website(self, page, url):
+        """First website listed in a loaded contact-info overlay (None when it lists none)"""
+        links = page.evaluate(CONTACT_WEBSITES_SCRIPT)
+        return {'website': links[0] if links else None}
 
     def close(self):
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
+        if self.browser_manager:
+            self.browser_manager.close_context("linkedin")
+            if self._owns_browser:
+                self.browser_manager.close()
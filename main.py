@@ -2,14 +2,31 @@ import pandas as pd
 from producthunt_bot import ProductHuntBot
 from crunchbase_bot import CrunchbaseBot
 from website_analyzer import WebsiteAnalyzer
+from page_renderer import PageRenderer
+from reachability import ReachabilityProbe, parse_networks, DEFAULT_PARKED_NETWORKS
+from cache_store import PersistentCache, data_path, DATA_DIR
+from crawl_state import CrawlState
+from checkpoint import CycleCheckpoint
+from lead_log import LeadLog, export_xlsx
+from leads import new_lead, add_crunchbase, add_analysis, mark_no_website, format_lead_message, lead_settled, TARGET_STATUSES
+from browser_manager import BrowserManager
+from resource_policy import ResourcePolicy
+from pacing import PacingScheduler
+from pipeline import LeadPipeline
 from telegram_notifier import TelegramNotifier
 from telegram_bot import TelegramBot
+from telegram_dispatcher import TelegramDispatcher
+from http_transport import close_session, save_recording
+from scheduler import BotState, Scheduler
+from metrics import REGISTRY, CYCLE_SECONDS, LEADS_PER_CYCLE, LEADS_TOTAL
+import har
 import time
 import os
 import sys
-import requests
+import hmac
+import signal
 import threading
-from flask import Flask
+from flask import Flask, Response, request
 
 # CONFIGURATION
 # ==========================================
@@ -18,250 +35,432 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "-1003210356607")
 PRODUCTHUNT_COOKIES = os.environ.get("PRODUCTHUNT_COOKIES", None)
 CRUNCHBASE_COOKIES = os.environ.get("CRUNCHBASE_COOKIES", None)  # Optional
 USE_CRUNCHBASE = os.environ.get("USE_CRUNCHBASE", "false").lower() == "true"  # Disabled by default (set to "true" to enable)
+ANALYZER_WORKERS = int(os.environ.get("ANALYZER_WORKERS", "10"))  # Websites checked at once
+ANALYZER_PER_HOST = int(os.environ.get("ANALYZER_PER_HOST", "2"))  # Concurrent checks per host
+ANALYSIS_CACHE_TTL = int(os.environ.get("ANALYSIS_CACHE_TTL", str(24 * 3600)))  # Reuse website verdicts without a request for this long
+ANALYSIS_CACHE_MAX_AGE = int(os.environ.get("ANALYSIS_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # Drop entries older than this
+ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", "5000"))  # LRU limit
+USE_PROBE = os.environ.get("USE_PROBE", "true").lower() == "true"  # DNS + TCP check before fetching a website
+PROBE_DNS_TIMEOUT = float(os.environ.get("PROBE_DNS_TIMEOUT", "1.5"))  # Seconds before an unresolved host counts as dead
+PROBE_CONNECT_TIMEOUT = float(os.environ.get("PROBE_CONNECT_TIMEOUT", "2"))  # Seconds before a silent port counts as dead
+DNS_CACHE_TTL = int(os.environ.get("DNS_CACHE_TTL", "300"))  # Reuse resolved addresses for this long
+DEAD_HOST_TTL = int(os.environ.get("DEAD_HOST_TTL", str(6 * 3600)))  # Skip hosts found dead or parked for this long
+SILENT_HOST_TTL = int(os.environ.get("SILENT_HOST_TTL", str(4 * 3600)))  # Skip hosts neither the probe nor the GET reached for this long
+PARKED_NETWORKS = os.environ.get("PARKED_NETWORKS")  # "cidr=label,..." of parking networks (defaults: Sedo, Bodis)
+USE_RENDER = os.environ.get("USE_RENDER", "true").lower() == "true"  # Render JavaScript-only lead websites in Chromium before scoring
+RENDER_POOL_SIZE = int(os.environ.get("RENDER_POOL_SIZE", "2"))  # Tabs rendering lead websites at once
+# Request blocking per bot: comma-separated resource types / domains ("" disables, unset keeps defaults)
+PH_BLOCK_TYPES = os.environ.get("PH_BLOCK_TYPES")
+PH_BLOCK_DOMAINS = os.environ.get("PH_BLOCK_DOMAINS")
+CB_BLOCK_TYPES = os.environ.get("CB_BLOCK_TYPES")
+CB_BLOCK_DOMAINS = os.environ.get("CB_BLOCK_DOMAINS")
+PACING_MIN_INTERVAL = float(os.environ.get("PACING_MIN_INTERVAL", "1.0"))  # Seconds between requests to one domain
+PACING_INTERVALS = os.environ.get("PACING_INTERVALS", "crunchbase.com=2.5")  # Per-domain overrides
+TELEGRAM_MESSAGES_PER_MINUTE = float(os.environ.get("TELEGRAM_MESSAGES_PER_MINUTE", "20"))  # Per-chat limit (Telegram allows ~20/min in groups)
+PH_HTTP_FIRST = os.environ.get("PH_HTTP_FIRST", "true").lower() == "true"  # Read Product Hunt over plain HTTP, browser only as fallback
+USE_PIPELINE = os.environ.get("USE_PIPELINE", "false").lower() == "true"  # Overlap scrape/enrich/analyze/notify with asyncio stages
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "5"))  # Bound on items waiting between stages
+PH_CONCURRENCY = int(os.environ.get("PH_CONCURRENCY", "3"))  # Product Hunt tabs loaded at once
+MAKER_CACHE_TTL = int(os.environ.get("MAKER_CACHE_TTL", str(7 * 24 * 3600)))  # Reuse maker contact links for this long
+MAKER_CACHE_SIZE = int(os.environ.get("MAKER_CACHE_SIZE", "10000"))  # LRU limit
+CB_FOUND_TTL = int(os.environ.get("CB_FOUND_TTL", str(14 * 24 * 3600)))  # Refresh Crunchbase matches after this long
+CB_NOT_FOUND_TTL = int(os.environ.get("CB_NOT_FOUND_TTL", str(3 * 24 * 3600)))  # Retry "not on Crunchbase" after this long
+CB_REFRESH_PER_RUN = int(os.environ.get("CB_REFRESH_PER_RUN", "10"))  # Stale entries refreshed per background run
+CB_REFRESH_INTERVAL = int(os.environ.get("CB_REFRESH_INTERVAL", "1800"))  # Seconds between background refreshes of stale Crunchbase entries
+TELEGRAM_WEBHOOK_URL = os.environ.get("TELEGRAM_WEBHOOK_URL")  # Public base URL of this service; unset uses long polling
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")  # Required with a webhook; Telegram sends it back in a header
+TELEGRAM_WEBHOOK_PATH = os.environ.get("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+LEAD_LOG_FORMAT = os.environ.get("LEAD_LOG_FORMAT", "csv")  # "csv" or "parquet" (needs pyarrow), one partition per day
+SHUTDOWN_TIMEOUT = float(os.environ.get("SHUTDOWN_TIMEOUT", "25"))  # Seconds to wind down after SIGTERM (Render kills at 30)
+SOURCE_INTERVALS = os.environ.get("SOURCE_INTERVALS", "producthunt=14400")  # Seconds between runs of each source, e.g. "producthunt=14400"
+CRAWL_STATE_RETENTION = int(os.environ.get("CRAWL_STATE_RETENTION", str(30 * 24 * 3600)))  # Forget processed launches after this long
 # ==========================================
 
-# Global state
-bot_state = {
-    "paused": False,
-    "total_cycles": 0,
-    "total_leads_found": 0,
-    "last_cycle_time": None,
-    "force_run": False
-}
-
-def process_products(bot, cb_bot, analyzer, notifier, products):
-    """Process Product Hunt launches and identify leads"""
-    results = []
+# Global state (thread-safe; read by Flask and the command handlers, updated by the cycle)
+bot_state = BotState()
+scheduler = Scheduler(bot_state)
+shutdown = threading.Event()  # Set on SIGTERM/SIGINT; cycles stop taking new work
+shutdown_deadline = None  # time.monotonic() by which the process must have exited
+
+# Persistent caches (created on first use, shared across cycles)
+caches = {}
+
+def get_analysis_cache():
+    if "analysis" not in caches:
+        caches["analysis"] = PersistentCache(
+            data_path("website_cache.db"),
+            table="website_analysis",
+            max_entries=ANALYSIS_CACHE_SIZE,
+            max_age=ANALYSIS_CACHE_MAX_AGE
+        )
+    return caches["analysis"]
+
+def get_maker_cache():
+    if "maker" not in caches:
+        caches["maker"] = PersistentCache(
+            data_path("maker_cache.db"),
+            table="makers",
+            max_entries=MAKER_CACHE_SIZE,
+            max_age=MAKER_CACHE_TTL
+        )
+    return caches["maker"]
+
+def parse_intervals(value):
+    """Parse "domain=seconds,domain=seconds" into a dict"""
+    intervals = {}
+    for item in value.split(","):
+        if "=" in item:
+            domain, seconds = item.split("=", 1)
+            intervals[domain.strip().lower()] = float(seconds)
+    return intervals
+
+pacer = PacingScheduler(min_interval=PACING_MIN_INTERVAL, intervals=parse_intervals(PACING_INTERVALS), jitter=0.25)
+
+# Shared by every cycle's analyzer so the DNS and dead-host caches outlive a cycle
+probe = ReachabilityProbe(
+    dns_timeout=PROBE_DNS_TIMEOUT,
+    connect_timeout=PROBE_CONNECT_TIMEOUT,
+    dns_ttl=DNS_CACHE_TTL,
+    dead_ttl=DEAD_HOST_TTL,
+    timeout_ttl=SILENT_HOST_TTL,
+    resolver_workers=max(16, ANALYZER_WORKERS),
+    parked_networks=parse_networks(PARKED_NETWORKS) if PARKED_NETWORKS else DEFAULT_PARKED_NETWORKS
+) if USE_PROBE else None
+
+# All Telegram sends go through one background queue so scraping never waits on them
+dispatcher = TelegramDispatcher(TELEGRAM_TOKEN, per_chat_rate=TELEGRAM_MESSAGES_PER_MINUTE / 60)
+
+# Replies to webhook commands (queued on the dispatcher, so handlers return at once)
+webhook_bot = TelegramBot(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, dispatcher=dispatcher)
+
+# One warm Chromium for the whole process (owned by the cycle thread)
+browser_manager = None
+
+def get_browser_manager():
+    global browser_manager
+    if browser_manager is None:
+        browser_manager = BrowserManager(headless=True)
+    return browser_manager
+
+def get_crunchbase_cache():
+    if "crunchbase" not in caches:
+        caches["crunchbase"] = PersistentCache(
+            data_path("crunchbase_cache.db"),
+            table="companies",
+            max_entries=10000,
+            max_age=4 * max(CB_FOUND_TTL, CB_NOT_FOUND_TTL)
+        )
+    return caches["crunchbase"]
+
+# Stale Crunchbase entries seen by cycles, refreshed a batch at a time by refresh_crunchbase()
+stale_companies = {}
+
+def new_crunchbase_bot():
+    return CrunchbaseBot(
+        headless=True,
+        resource_policy=ResourcePolicy.from_config("Crunchbase", CB_BLOCK_TYPES, CB_BLOCK_DOMAINS),
+        pacer=pacer,
+        cache=get_crunchbase_cache(),
+        found_ttl=CB_FOUND_TTL,
+        not_found_ttl=CB_NOT_FOUND_TTL
+    )
+
+def get_crawl_state():
+    if "crawl" not in caches:
+        caches["crawl"] = CrawlState(data_path("crawl_state.db"))
+        caches["crawl"].forget_older_than(CRAWL_STATE_RETENTION)
+    return caches["crawl"]
+
+def get_checkpoint():
+    if "checkpoint" not in caches:
+        caches["checkpoint"] = CycleCheckpoint(data_path("checkpoint.db"))
+    return caches["checkpoint"]
+
+def get_lead_log():
+    if "leads" not in caches:
+        caches["leads"] = LeadLog(os.path.join(DATA_DIR, "leads"), format=LEAD_LOG_FORMAT)
+    return caches["leads"]
+
+def export_leads(path, since=None):
+    """Write every logged lead (optionally from a YYYY-MM-DD date on) to an XLSX file"""
+    count = export_xlsx(get_lead_log(), path, since=since)
+    print(f"Exported {count} leads to {path}", flush=True)
+    return count
+
+def process_products(bot, cb_bot, analyzer, notifier, products, crawl_state=None, lead_log=None, checkpoint=None, should_stop=None):
+    """
+    Process Product Hunt launches and identify leads. With a checkpoint,
+    products already scraped by an interrupted run are reused instead of
+    visited again; should_stop() is checked between batches so a shutdown
+    only waits for the work in flight.
+    """
+    should_stop = should_stop or (lambda: False)
+    products_by_url = {product['url']: product for product in products}
+    scraped = {}
+    if checkpoint:
+        for product in products:
+            lead_data = checkpoint.scraped_lead(product['url'])
+            if lead_data:
+                scraped[product['url']] = lead_data
+        if scraped:
+            print(f"Reusing {len(scraped)} products scraped before the restart.", flush=True)
+    pending = [product for product in products if product['url'] not in scraped]
     
-    for product in products:
-        print(f"Processing {product['name']}...", flush=True)
-        
-        # Get detailed product info
-        details = bot.get_product_details(product['url'])
-        
-        if not details:
-            continue
+    # Scrape product pages (and their makers) in parallel tabs, a batch at a time
+    for i in range(0, len(pending), bot.concurrency):
+        if should_stop():
+            print("Shutdown requested, not scraping further products.", flush=True)
+            break
+        batch = pending[i:i + bot.concurrency]
+        all_details = bot.get_products_details([product['url'] for product in batch])
         
-        lead_data = {
-            'name': details['name'],
-            'tagline': product.get('tagline', ''),
-            'product_url': details['url'],
-            'website': details.get('website'),
-            'makers': details.get('makers', []),
-            'twitter': details.get('twitter'),
-            'linkedin': details.get('linkedin'),
-            'facebook': details.get('facebook'),
-            'instagram': details.get('instagram'),
-            'email': details.get('email'),
-            'website_status': 'N/A',
-            'website_score': 0,
-            'website_notes': '',
-            # Crunchbase data (optional)
-            'crunchbase_url': None,
-            'funding': None,
-            'employees': None,
-            'location': None,
-            'founded': None,
-            'company_phone': None,
-            'company_email': None,
-            'company_linkedin': None
-        }
-        
-        # Try to enrich with Crunchbase data (optional, non-blocking)
-        if cb_bot:
-            try:
-                print(f"  Checking Crunchbase...", flush=True)
-                cb_url = cb_bot.search_company(details['name'])
-                if cb_url:
-                    cb_details = cb_bot.get_company_details(cb_url)
-                    if cb_details:
-                        lead_data['crunchbase_url'] = cb_details.get('crunchbase_url')
-                        lead_data['funding'] = cb_details.get('funding')
-                        lead_data['employees'] = cb_details.get('employees')
-                        lead_data['location'] = cb_details.get('location')
-                        lead_data['founded'] = cb_details.get('founded')
-                        lead_data['company_phone'] = cb_details.get('phone')
-                        lead_data['company_email'] = cb_details.get('email')
-                        lead_data['company_linkedin'] = cb_details.get('linkedin')
-                        print(f"  ✅ Crunchbase data added!", flush=True)
-            except Exception as e:
-                print(f"  ⚠️ Crunchbase lookup failed (non-critical): {e}", flush=True)
-        
-        is_target = False
-        
-        if details.get('website'):
-            print(f"  Found website: {details['website']}", flush=True)
-            analysis = analyzer.analyze(details['website'])
-            lead_data['website_status'] = analysis['status']
-            lead_data['website_score'] = analysis['score']
-            lead_data['website_notes'] = "; ".join(analysis['details'])
-            print(f"  Status: {analysis['status']} (Score: {analysis['score']})", flush=True)
-            
-            if analysis['status'] in ['Bad', 'Potentially Bad'] or analysis['score'] < 50:
-                is_target = True
-        else:
-            print("  No website found (High Potential Lead!)", flush=True)
-            lead_data['website_status'] = "No Website"
-            lead_data['website_score'] = 0
-            is_target = True
-        
-        results.append(lead_data)
-        
-        if is_target:
-            print("  >>> TARGET FOUND! Sending to Telegram...", flush=True)
-            
-            # Format makers info
-            makers_text = ""
-            for i, maker in enumerate(lead_data['makers'], 1):
-                makers_text += f"\n**Maker {i}:** {maker['name']}"
-                if maker.get('profile_url'):
-                    makers_text += f"\n  - Product Hunt: {maker['profile_url']}"
-                if maker.get('twitter'):
-                    makers_text += f"\n  - Twitter: {maker['twitter']}"
-                if maker.get('linkedin'):
-                    makers_text += f"\n  - LinkedIn: {maker['linkedin']}"
-                if maker.get('website'):
-                    makers_text += f"\n  - Website: {maker['website']}"
-                if maker.get('email'):
-                    makers_text += f"\n  - Email: {maker['email']}"
-                makers_text += "\n"
+        for product, details in zip(batch, all_details):
+            print(f"Processing {product['name']}...", flush=True)
             
-            # Build social links section
-            social_links = []
-            if lead_data.get('twitter'):
-                social_links.append(f"Twitter: {lead_data['twitter']}")
-            if lead_data.get('linkedin'):
-                social_links.append(f"LinkedIn: {lead_data['linkedin']}")
-            if lead_data.get('facebook'):
-                social_links.append(f"Facebook: {lead_data['facebook']}")
-            if lead_data.get('instagram'):
-                social_links.append(f"Instagram: {lead_data['instagram']}")
-            if lead_data.get('email'):
-                social_links.append(f"Email: {lead_data['email']}")
+            if not details:
+                continue
             
-            social_text = "\n".join(social_links) if social_links else "No social links found"
+            lead_data = new_lead(product, details)
             
-            # Build Crunchbase section (if data available)
-            crunchbase_section = ""
-            if lead_data.get('crunchbase_url'):
-                crunchbase_section = f"""
-**🏢 Company Info (Crunchbase):**
-Crunchbase: {lead_data['crunchbase_url']}"""
-                if lead_data.get('funding'):
-                    crunchbase_section += f"\nFunding: {lead_data['funding']}"
-                if lead_data.get('employees'):
-                    crunchbase_section += f"\nEmployees: {lead_data['employees']}"
-                if lead_data.get('location'):
-                    crunchbase_section += f"\nLocation: {lead_data['location']}"
-                if lead_data.get('founded'):
-                    crunchbase_section += f"\nFounded: {lead_data['founded']}"
-                
-                # Company contact
-                company_contact = []
-                if lead_data.get('company_phone'):
-                    company_contact.append(f"📞 Phone: {lead_data['company_phone']}")
-                if lead_data.get('company_email'):
-                    company_contact.append(f"📧 Email: {lead_data['company_email']}")
-                if lead_data.get('company_linkedin'):
-                    company_contact.append(f"🔗 LinkedIn: {lead_data['company_linkedin']}")
-                
-                if company_contact:
-                    crunchbase_section += "\n\n**📞 Company Contact:**\n" + "\n".join(company_contact)
-                
-                crunchbase_section += "\n"
+            # Try to enrich with Crunchbase data (optional, non-blocking)
+            if cb_bot:
+                try:
+                    print(f"  Checking Crunchbase...", flush=True)
+                    cb_details = cb_bot.enrich(details['name'])
+                    if cb_details:
+                        add_crunchbase(lead_data, cb_details)
+                        print(f"  ✅ Crunchbase data added!", flush=True)
+                except Exception as e:
+                    print(f"  ⚠️ Crunchbase lookup failed (non-critical): {e}", flush=True)
             
-            # Format message for Telegram
-            message = f"""
-🚀 **NEW LEAD - Startup Founder**
-
-**Product:** {lead_data['name']}
-**Tagline:** {lead_data['tagline']}
-**Product Hunt:** {lead_data['product_url']}
-
-**📱 Product Social:**
-{social_text}
-{crunchbase_section}
-**👥 Founders/Makers:**{makers_text}
-
-**🌐 Website Analysis:**
-**Status:** {lead_data['website_status']}
-**URL:** {lead_data.get('website') or 'None'}
-**Score:** {lead_data['website_score']}/100
-**Notes:** {lead_data['website_notes'] or 'No website - perfect opportunity to offer your services!'}
-
----
-💡 **Action:** Contact founders and offer website/app development services!
-"""
-            notifier.send_message(message)
-            time.sleep(1)
+            scraped[product['url']] = lead_data
+            if checkpoint:
+                checkpoint.save(product['url'], 'scraped', lead_data)
+    
+    leads = [scraped[product['url']] for product in products if product['url'] in scraped]
+    if should_stop():
+        # Scraped leads stay checkpointed and are analyzed after the restart
+        return leads
     
-    return results
+    def mark_done(lead_data):
+        if crawl_state:
+            crawl_state.mark_processed(products_by_url[lead_data['product_url']])
+        if checkpoint:
+            checkpoint.save(lead_data['product_url'], 'done')
+    
+    def finish(lead_data, is_target):
+        if lead_log:
+            lead_log.append(lead_data, is_target)
+        if is_target:
+            # Done once Telegram has the message (or refused it for good), so leads
+            # still queued at shutdown are sent after the restart
+            def on_sent(outcome):
+                if lead_settled(lead_data, outcome):
+                    mark_done(lead_data)
+            notify_target(notifier, lead_data, on_sent)
+        else:
+            mark_done(lead_data)
+    
+    # Analyze all websites concurrently and notify as each verdict arrives
+    leads_by_website = {}
+    for lead_data in leads:
+        if lead_data['website']:
+            leads_by_website.setdefault(lead_data['website'], []).append(lead_data)
+        else:
+            print(f"  {lead_data['name']}: No website found (High Potential Lead!)", flush=True)
+            mark_no_website(lead_data)
+            finish(lead_data, True)
+    
+    for website, analysis in analyzer.analyze_many(leads_by_website):
+        for lead_data in leads_by_website[website]:
+            is_target = add_analysis(lead_data, analysis)
+            print(f"  {lead_data['name']}: {website} -> {analysis['status']} (Score: {analysis['score']})", flush=True)
+            finish(lead_data, is_target)
+        if should_stop():
+            # Leaving the generator cancels the analyses that haven't started
+            print("Shutdown requested, leaving remaining websites for the next run.", flush=True)
+            break
+    
+    return leads
+
+def notify_target(notifier, lead_data, on_sent=None):
+    """Format a target lead and queue it for Telegram; on_sent(outcome) runs once it is delivered or given up on"""
+    print(f"  >>> TARGET FOUND ({lead_data['name']})! Sending to Telegram...", flush=True)
+    notifier.send_message(format_lead_message(lead_data), on_sent=on_sent)
+
+def cycle_interval():
+    """Seconds between Product Hunt cycles"""
+    return parse_intervals(SOURCE_INTERVALS).get("producthunt", 4 * 3600)
 
 def run_cycle():
-    global bot_state
-    
-    if bot_state["paused"]:
+    if bot_state.paused:
         print("Bot is paused. Skipping cycle.", flush=True)
         return
         
-    bot_state["total_cycles"] += 1
-    bot_state["last_cycle_time"] = time.strftime('%H:%M:%S')
+    cycle_number = bot_state.begin_cycle()
+    cycle_started = time.monotonic()
+    pacer.reset()
+    next_cycle_hours = f"{cycle_interval() / 3600:g} hours"
     
-    print(f"--- Starting Cycle #{bot_state['total_cycles']} at {time.ctime()} ---", flush=True)
+    print(f"--- Starting Cycle #{cycle_number} at {time.ctime()} ---", flush=True)
     
-    telegram_bot = TelegramBot(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+    telegram_bot = TelegramBot(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, dispatcher=dispatcher)
     
     telegram_bot.send_status_with_buttons(
-        f"🔄 *Cycle #{bot_state['total_cycles']} Started*\n"
+        f"🔄 *Cycle #{cycle_number} Started*\n"
         f"⏰ Time: {time.strftime('%H:%M:%S')}\n"
-        f"📊 Total Leads Found So Far: {bot_state['total_leads_found']}"
+        f"📊 Total Leads Found So Far: {bot_state.total_leads_found}"
     )
     
-    ph_bot = ProductHuntBot(headless=True)
+    ph_policy = ResourcePolicy.from_config("Product Hunt", PH_BLOCK_TYPES, PH_BLOCK_DOMAINS)
+    ph_bot = ProductHuntBot(
+        headless=True,
+        maker_cache=get_maker_cache(),
+        maker_cache_ttl=MAKER_CACHE_TTL,
+        concurrency=PH_CONCURRENCY,
+        resource_policy=ph_policy,
+        pacer=pacer,
+        http_first=PH_HTTP_FIRST
+    )
     cb_bot = None
     if USE_CRUNCHBASE:
-        cb_bot = CrunchbaseBot(headless=True)
-    analyzer = WebsiteAnalyzer()
-    notifier = TelegramNotifier(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+        cb_bot = new_crunchbase_bot()
+    analyzer = WebsiteAnalyzer(
+        max_workers=ANALYZER_WORKERS,
+        max_per_host=ANALYZER_PER_HOST,
+        cache=get_analysis_cache(),
+        cache_ttl=ANALYSIS_CACHE_TTL,
+        probe=probe
+    )
+    notifier = TelegramNotifier(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, dispatcher=dispatcher)
     
     try:
-        telegram_bot.send_message("🌐 Launching browser...")
-        ph_bot.start(auth_content=PRODUCTHUNT_COOKIES)
+        manager = get_browser_manager()
+        if not manager.is_connected():
+            telegram_bot.send_message("🌐 Launching browser...")
+        ph_bot.start(auth_content=PRODUCTHUNT_COOKIES, browser_manager=manager)
+        if USE_RENDER and not USE_PIPELINE:
+            # The pipeline analyzes in worker threads, which can't drive the sync browser
+            analyzer.renderer = PageRenderer(manager, pool_size=RENDER_POOL_SIZE, resource_policy=ResourcePolicy.from_config("Renderer"))
         
         if cb_bot:
             telegram_bot.send_message("🏢 Starting Crunchbase enrichment...")
-            cb_bot.start(auth_content=CRUNCHBASE_COOKIES)
+            cb_bot.start(auth_content=CRUNCHBASE_COOKIES, browser_manager=manager)
         
-        telegram_bot.send_message("🔍 Scraping Product Hunt launches...")
-        products = ph_bot.get_daily_launches()
-        print(f"Found {len(products)} products.", flush=True)
+        checkpoint = get_checkpoint()
+        products = checkpoint.resume(max_age=cycle_interval())
+        if products is not None:
+            print(f"Resuming interrupted cycle: {len(products)} launches, progress {checkpoint.stages()}", flush=True)
+            telegram_bot.send_message("♻️ Resuming the interrupted cycle...")
+        else:
+            telegram_bot.send_message("🔍 Scraping Product Hunt launches...")
+            products = ph_bot.get_daily_launches()
+            checkpoint.begin(products)
+        crawl_state = get_crawl_state()
+        new_products = crawl_state.filter_new(products)
+        print(f"Found {len(products)} products ({len(products) - len(new_products)} already processed).", flush=True)
         
-        telegram_bot.send_message(f"🎯 Found {len(products)} products. Analyzing websites...")
-        results = process_products(ph_bot, cb_bot, analyzer, notifier, products)
+        telegram_bot.send_message(f"🎯 Found {len(products)} products, {len(new_products)} new. Analyzing websites...")
+        if USE_PIPELINE:
+            # The pipeline launches its own Chromium; release the shared one so only one runs.
+            # Later browser work (Crunchbase refreshes) relaunches it on demand.
+            ph_bot.close()
+            if cb_bot:
+                cb_bot.close()
+            manager.close()
+            pipeline = LeadPipeline(
+                analyzer,
+                lambda lead_data, on_sent: notify_target(notifier, lead_data, on_sent),
+                ph_bot,
+                cb_bot=cb_bot,
+                crawl_state=crawl_state,
+                lead_log=get_lead_log(),
+                checkpoint=checkpoint,
+                should_stop=shutdown.is_set,
+                scrape_workers=PH_CONCURRENCY,
+                analyze_workers=ANALYZER_WORKERS,
+                queue_size=PIPELINE_QUEUE_SIZE,
+                ph_policy=ph_policy,
+                cb_policy=cb_bot.resource_policy if cb_bot else None
+            )
+            results = pipeline.run(new_products)
+            print(f"Pipeline stages:\n{pipeline.summary()}", flush=True)
+        else:
+            results = process_products(
+                ph_bot, cb_bot, analyzer, notifier, new_products, crawl_state, get_lead_log(),
+                checkpoint=checkpoint, should_stop=shutdown.is_set
+            )
+        if shutdown.is_set():
+            print("Cycle interrupted; progress is checkpointed and resumes after restart.", flush=True)
+        else:
+            checkpoint.finish()
+        cache_stats = analyzer.cache.stats()
+        print(f"Website cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {analyzer.revalidated} revalidated (304)", flush=True)
+        if analyzer.renderer:
+            print(f"Rendered {analyzer.rendered} JavaScript-only websites in the browser.", flush=True)
+        print(f"Maker cache: {ph_bot.maker_cache_hits} hits, {ph_bot.maker_cache_misses} misses", flush=True)
+        print(f"Pacing: {pacer.summary()}", flush=True)
+        print(f"Telegram: {dispatcher.sent} sent, {dispatcher.queue.qsize()} queued, {dispatcher.rate_limited} rate-limited, {dispatcher.failed} failed", flush=True)
+        print(f"Resource blocking: {ph_policy.summary()}", flush=True)
+        if cb_bot:
+            print(f"Resource blocking: {cb_bot.resource_policy.summary()}", flush=True)
         
-        target_leads = [r for r in results if r.get('website_status') in ['No Website', 'Bad', 'Potentially Bad']]
-        bot_state['total_leads_found'] += len(target_leads)
+        target_leads = [r for r in results if r.get('website_status') in TARGET_STATUSES]
+        total_leads_found = bot_state.add_leads(len(target_leads))
+        for kind, count in (("analyzed", len(results)), ("target", len(target_leads))):
+            LEADS_PER_CYCLE.observe(count, kind=kind)
+            LEADS_TOTAL.inc(count, kind=kind)
             
-        if results:
+        if results and not shutdown.is_set():
             print(f"Cycle complete. Analyzed {len(results)} products.", flush=True)
             telegram_bot.send_status_with_buttons(
-                f"✅ *Cycle #{bot_state['total_cycles']} Complete!*\n\n"
+                f"✅ *Cycle #{cycle_number} Complete!*\n\n"
                 f"📊 Analyzed: {len(results)} products\n"
                 f"🎯 Target Leads: {len(target_leads)}\n"
-                f"📈 Total Leads Found: {bot_state['total_leads_found']}\n"
-                f"⏰ Next cycle in 4 hours"
+                f"📈 Total Leads Found: {total_leads_found}\n"
+                f"⏰ Next cycle in {next_cycle_hours}"
             )
-        else:
+        elif not results:
             print("Cycle complete. No products found.", flush=True)
+        
+        # Stale Crunchbase entries are refreshed by the crunchbase_refresh job, not here
+        if cb_bot and cb_bot.stale_names:
+            stale_companies.update(cb_bot.stale_names)
             
     except Exception as e:
         print(f"An error occurred during cycle: {e}", flush=True)
-        telegram_bot.send_message(f"⚠️ *Bot Error in Cycle #{bot_state['total_cycles']}*\n\n`{str(e)}`")
+        telegram_bot.send_message(f"⚠️ *Bot Error in Cycle #{cycle_number}*\n\n`{str(e)}`")
     finally:
         ph_bot.close()
         if cb_bot:
             cb_bot.close()
-        telegram_bot.send_message("🔴 Browser closed. Waiting 4 hours for next cycle...")
+        if analyzer.renderer:
+            analyzer.renderer.close()
+        # Parquet rows sit in a buffer until a batch fills; write this cycle's out now
+        get_lead_log().flush()
+        CYCLE_SECONDS.observe(time.monotonic() - cycle_started)
+        save_recording()
+        if shutdown.is_set():
+            telegram_bot.send_message("⏹️ Shutting down mid-cycle. It will resume after the restart.")
+        else:
+            telegram_bot.send_message(f"🔴 Cycle finished. Waiting {next_cycle_hours} for next cycle...")
+
+def refresh_crunchbase():
+    """
+    Background job: re-run up to CB_REFRESH_PER_RUN stale Crunchbase lookups.
+    It shares the scheduler thread (and so the browser) with the cycles and
+    is registered after them, so it only runs when no cycle is due.
+    """
+    if not stale_companies or shutdown.is_set():
+        return
+    cb_bot = new_crunchbase_bot()
+    cb_bot.stale_names = stale_companies
+    try:
+        cb_bot.start(auth_content=CRUNCHBASE_COOKIES, browser_manager=get_browser_manager())
+        refreshed = cb_bot.refresh_stale(limit=CB_REFRESH_PER_RUN)
+        print(f"Refreshed {refreshed} stale Crunchbase entries, {len(stale_companies)} left.", flush=True)
+    finally:
+        cb_bot.close()
 
 app = Flask(__name__)
 
@@ -269,96 +468,190 @@ app = Flask(__name__)
 def home():
     return "Product Hunt Bot is running!"
 
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route(TELEGRAM_WEBHOOK_PATH, methods=['POST'])
+def telegram_webhook():
+    # Telegram echoes the secret given to setWebhook; anything else isn't from Telegram
+    received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not TELEGRAM_WEBHOOK_SECRET or not hmac.compare_digest(received, TELEGRAM_WEBHOOK_SECRET):
+        return "Forbidden", 403
+    update = request.get_json(silent=True)
+    if update:
+        try:
+            handle_update(webhook_bot, update)
+        except Exception as e:
+            print(f"Error handling webhook update: {e}", flush=True)
+    # Always 200 so Telegram doesn't redeliver an update we couldn't handle
+    return "OK"
+
 def run_flask():
     port = int(os.environ.get("PORT", 10000))
     app.run(host='0.0.0.0', port=port)
 
+def handle_update(telegram_bot, update):
+    """Act on one Telegram update, whether it arrived by webhook or long poll"""
+    if "callback_query" not in update:
+        return
+    callback = update["callback_query"]
+    data = callback.get("data")
+    # Acknowledge first and reply urgently: lead messages queued during a cycle shouldn't delay either
+    telegram_bot.answer_callback(callback["id"])
+    
+    state = bot_state.snapshot()
+    
+    if data == "start_cycle":
+        if state["paused"]:
+            telegram_bot.send_message("⏸️ Bot is paused. Resume it to start a cycle.", urgent=True)
+        elif scheduler.request_run("producthunt"):
+            telegram_bot.send_message("▶️ Starting new cycle immediately...", urgent=True)
+        else:
+            telegram_bot.send_message("⏳ A cycle is already running.", urgent=True)
+        
+    elif data == "get_status":
+        status = (
+            f"📊 *Bot Status*\n\n"
+            f"🔄 Total Cycles: {state['total_cycles']}\n"
+            f"🎯 Total Leads Found: {state['total_leads_found']}\n"
+            f"⏰ Last Cycle: {state['last_cycle_time'] or 'Not started'}\n"
+            f"⏸️ Paused: {'Yes' if state['paused'] else 'No'}"
+        )
+        telegram_bot.send_status_with_buttons(status, urgent=True)
+        
+    elif data == "view_stats":
+        telegram_bot.send_message(
+            f"📈 *Detailed Statistics*\n\n"
+            f"Total Cycles Run: {state['total_cycles']}\n"
+            f"Total Target Leads: {state['total_leads_found']}\n"
+            f"Average per Cycle: {state['total_leads_found'] / max(state['total_cycles'], 1):.1f}",
+            urgent=True
+        )
+        
+    elif data == "pause_bot":
+        paused = scheduler.toggle_pause()
+        status = "⏸️ Bot Paused" if paused else "▶️ Bot Resumed"
+        telegram_bot.send_message(status, urgent=True)
+
+POLL_BACKOFF_MIN = 5  # Seconds to wait after a failed getUpdates, doubled per failure
+POLL_BACKOFF_MAX = 300
+
 def listen_for_commands():
-    global bot_state
-    telegram_bot = TelegramBot(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+    """Long-poll fallback for when no webhook URL is configured"""
+    telegram_bot = TelegramBot(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, dispatcher=dispatcher)
+    telegram_bot.delete_webhook()
     
+    backoff = POLL_BACKOFF_MIN
     while True:
         try:
+            # getUpdates holds the request open until something arrives, so no extra sleep
             updates = telegram_bot.get_updates()
-            
+            if updates is None:
+                # Failed calls return at once; without a pause the loop would hammer the API
+                time.sleep(backoff)
+                backoff = min(backoff * 2, POLL_BACKOFF_MAX)
+                continue
+            backoff = POLL_BACKOFF_MIN
             for update in updates:
                 telegram_bot.last_update_id = update.get("update_id", 0)
-                
-                if "callback_query" in update:
-                    callback = update["callback_query"]
-                    data = callback.get("data")
-                    
-                    if data == "start_cycle":
-                        bot_state["force_run"] = True
-                        telegram_bot.send_message("▶️ Starting new cycle immediately...")
-                        
-                    elif data == "get_status":
-                        status = (
-                            f"📊 *Bot Status*\n\n"
-                            f"🔄 Total Cycles: {bot_state['total_cycles']}\n"
-                            f"🎯 Total Leads Found: {bot_state['total_leads_found']}\n"
-                            f"⏰ Last Cycle: {bot_state['last_cycle_time'] or 'Not started'}\n"
-                            f"⏸️ Paused: {'Yes' if bot_state['paused'] else 'No'}"
-                        )
-                        telegram_bot.send_status_with_buttons(status)
-                        
-                    elif data == "view_stats":
-                        telegram_bot.send_message(
-                            f"📈 *Detailed Statistics*\n\n"
-                            f"Total Cycles Run: {bot_state['total_cycles']}\n"
-                            f"Total Target Leads: {bot_state['total_leads_found']}\n"
-                            f"Average per Cycle: {bot_state['total_leads_found'] / max(bot_state['total_cycles'], 1):.1f}"
-                        )
-                        
-                    elif data == "pause_bot":
-                        bot_state["paused"] = not bot_state["paused"]
-                        status = "⏸️ Bot Paused" if bot_state["paused"] else "▶️ Bot Resumed"
-                        telegram_bot.send_message(status)
-                    
-                    requests.post(
-                        f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/answerCallbackQuery",
-                        json={"callback_query_id": callback["id"]}
-                    )
+                handle_update(telegram_bot, update)
                     
         except Exception as e:
             print(f"Error in command listener: {e}", flush=True)
-            time.sleep(5)
-        
-        time.sleep(2)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, POLL_BACKOFF_MAX)
+
+def start_webhook():
+    """Register the Flask webhook with Telegram; False means fall back to long polling"""
+    if not TELEGRAM_WEBHOOK_URL:
+        return False
+    if not TELEGRAM_WEBHOOK_SECRET:
+        print("TELEGRAM_WEBHOOK_SECRET is not set, using long polling instead of the webhook.", flush=True)
+        return False
+    url = TELEGRAM_WEBHOOK_URL.rstrip("/") + TELEGRAM_WEBHOOK_PATH
+    if webhook_bot.set_webhook(url, TELEGRAM_WEBHOOK_SECRET):
+        print(f"Receiving Telegram commands via webhook at {url}", flush=True)
+        return True
+    print("Could not register the webhook, using long polling.", flush=True)
+    return False
+
+def request_shutdown(signum, frame):
+    """SIGTERM/SIGINT: stop taking new work and let the cycle thread wind down"""
+    global shutdown_deadline
+    if shutdown.is_set():
+        return
+    shutdown_deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+    print(f"Received signal {signum}, shutting down within {SHUTDOWN_TIMEOUT:.0f}s...", flush=True)
+    shutdown.set()
+    scheduler.stop()
+    threading.Thread(target=shutdown_watchdog, args=(shutdown_deadline,), daemon=True).start()
+
+def shutdown_watchdog(deadline):
+    """Hard exit if the graceful shutdown overruns its budget"""
+    time.sleep(max(0, deadline - time.monotonic()))
+    print("Shutdown took too long, exiting now.", flush=True)
+    os._exit(1)
+
+def close_resources(flush_timeout):
+    """Send queued Telegram messages, close the browser, HTTP session and on-disk state"""
+    if shutdown_deadline is not None:
+        # Leave a few seconds of the shutdown budget for closing the browser
+        flush_timeout = min(flush_timeout, max(1.0, shutdown_deadline - time.monotonic() - 3))
+    drained = dispatcher.stop(timeout=flush_timeout)
+    if not drained:
+        print(f"{dispatcher.queue.qsize()} Telegram messages were still queued at shutdown; their leads stay unprocessed and are sent again after the restart.", flush=True)
+    if browser_manager:
+        browser_manager.close()
+    close_session()
+    if probe:
+        probe.close()
+    for store in caches.values():
+        store.close()
+    print("Shutdown complete.", flush=True)
 
 def main():
-    global bot_state
-    
     sys.stdout.reconfigure(line_buffering=True)
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "--export":
+        # python main.py --export [leads.xlsx] [since YYYY-MM-DD]
+        export_leads(
+            sys.argv[2] if len(sys.argv) > 2 else f"leads-{time.strftime('%Y-%m-%d')}.xlsx",
+            since=sys.argv[3] if len(sys.argv) > 3 else None
+        )
+        return
+    
     print("=== Product Hunt Lead Gen Bot (24/7 Cloud Mode) ===", flush=True)
     
     threading.Thread(target=run_flask, daemon=True).start()
-    threading.Thread(target=listen_for_commands, daemon=True).start()
+    if har.replaying():
+        # Telegram is stubbed out while replaying, so no commands can arrive
+        print("HAR replay: Telegram calls are answered locally and commands are off.", flush=True)
+    elif not start_webhook():
+        threading.Thread(target=listen_for_commands, daemon=True).start()
     
-    telegram_bot = TelegramBot(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+    telegram_bot = TelegramBot(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, dispatcher=dispatcher)
     telegram_bot.send_status_with_buttons(
         "🚀 *Product Hunt Bot Started on Render!*\n\n"
         "Scraping daily launches for potential clients."
     )
     
+    # Each source runs on its own interval; the scheduler sleeps until one is due
+    # or a command wakes it, and never starts a source while it is still running
+    scheduler.add_job("producthunt", cycle_interval(), run_cycle)
+    if USE_CRUNCHBASE:
+        scheduler.add_job("crunchbase_refresh", CB_REFRESH_INTERVAL, refresh_crunchbase, run_immediately=False)
+    
     if len(sys.argv) > 1 and sys.argv[1] == "--once":
-        run_cycle()
+        scheduler.run_job("producthunt")
+        close_resources(flush_timeout=120)
         return
 
-    while True:
-        if bot_state["force_run"]:
-            bot_state["force_run"] = False
-            run_cycle()
-        else:
-            run_cycle()
-        
-        print("Sleeping for 4 hours...", flush=True)
-        
-        for _ in range(1440):
-            if bot_state["force_run"]:
-                print("Force run requested, breaking sleep...", flush=True)
-                break
-            time.sleep(10)
+    # Returns once a shutdown signal stops the scheduler and the running cycle has wound down
+    scheduler.run_forever()
+    close_resources(flush_timeout=SHUTDOWN_TIMEOUT)
 
 if __name__ == "__main__":
     main()
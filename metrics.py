@@ -0,0 +1,161 @@
+import time
+import bisect
+import threading
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.setdefault(key, [0] * (len(self.buckets) + 2))
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager / decorator recording the elapsed seconds of a block"""
+        return Span(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self.series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', _format_number(bound)))} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', '+Inf'))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_number(series[-1])}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}"
+
+class Span:
+    """Times a block (with) or every call of a function (decorator) into a histogram"""
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.monotonic() - self.started, **self.labels)
+        return False
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(self.histogram, self.labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+CYCLE_SECONDS = REGISTRY.histogram(
+    "leadbot_cycle_duration_seconds", "Wall time of run_cycle",
+    buckets=(30, 60, 120, 300, 600, 900, 1800, 3600)
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "leadbot_stage_duration_seconds", "Time spent in one call of a scraping, enrichment or notification step",
+    labels=("stage",)
+)
+NAVIGATION_SECONDS = REGISTRY.histogram(
+    "leadbot_page_navigation_seconds", "Time to load a page until it is ready to extract",
+    labels=("source", "transport")
+)
+ANALYSIS_SECONDS = REGISTRY.histogram(
+    "leadbot_website_analysis_seconds", "WebsiteAnalyzer.analyze latency by verdict and where it came from",
+    labels=("outcome", "source")
+)
+LEADS_PER_CYCLE = REGISTRY.histogram(
+    "leadbot_leads_per_cycle", "Products analyzed and target leads found per cycle",
+    labels=("kind",), buckets=(0, 1, 2, 5, 10, 20, 50, 100)
+)
+LEADS_TOTAL = REGISTRY.counter(
+    "leadbot_leads_total", "Products analyzed and target leads found since start",
+    labels=("kind",)
+)
+BYTES_FETCHED = REGISTRY.counter(
+    "leadbot_bytes_fetched_total", "Response body bytes read over plain HTTP",
+    labels=("source",)
+)
+TELEGRAM_REQUESTS = REGISTRY.counter(
+    "leadbot_telegram_requests_total", "Telegram Bot API calls by method and result",
+    labels=("method", "result")
+)
+WEBSITE_TIERS = REGISTRY.counter(
+    "leadbot_website_analysis_tier_total", "Website verdicts by the tier that produced them (a rendered shell counts only as rendered)",
+    labels=("tier",)
+)
@@ -0,0 +1,78 @@
+import time
+import random
+import threading
+from urllib.parse import urlparse
+
+class PacingScheduler:
+    """
+    Central per-domain request pacing. Callers ask before each request and
+    are only delayed by whatever is left of the domain's minimum interval,
+    so a page that took a while to become ready is not slowed further.
+    Time spent waiting here is reported separately from the rest of the cycle.
+    """
+    def __init__(self, min_interval=1.0, intervals=None, jitter=0.0):
+        self.min_interval = min_interval
+        self.intervals = dict(intervals or {})  # domain -> seconds, overrides min_interval
+        self.jitter = jitter  # Extra random fraction of the interval, 0.25 = up to +25%
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    @staticmethod
+    def domain(url):
+        host = (urlparse(url).hostname if '://' in url else url) or ''
+        host = host.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def interval_for(self, domain):
+        return self.intervals.get(domain, self.min_interval)
+
+    def wait(self, url, sleep=time.sleep):
+        """
+        Block until a request to url's domain is allowed. Browser callers pass
+        a sleep that keeps Playwright's event loop running (see browser_sleep),
+        since time.sleep stalls every tab that is still loading.
+        """
+        domain = self.domain(url)
+        interval = self.interval_for(domain)
+        if self.jitter:
+            interval *= 1 + random.uniform(0, self.jitter)
+
+        # Reserve the next slot under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(domain, 0))
+            self._next_allowed[domain] = start + interval
+            self.requests += 1
+
+        delay = start - now
+        if delay > 0:
+            sleep(delay)
+            with self._lock:
+                self.pacing_time += delay
+        return delay
+
+    @staticmethod
+    def browser_sleep(page):
+        """A sleep for wait() that lets page's Playwright connection keep dispatching events meanwhile"""
+        return lambda seconds: page.wait_for_timeout(seconds * 1000)
+
+    def reset(self):
+        """Start a new accounting period (one per cycle)"""
+        with self._lock:
+            self.started_at = time.monotonic()
+            self.pacing_time = 0.0
+            self.requests = 0
+
+    def report(self):
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'elapsed': elapsed,
+            'pacing': self.pacing_time,
+            'work': max(elapsed - self.pacing_time, 0.0),
+            'requests': self.requests
+        }
+
+    def summary(self):
+        r = self.report()
+        return f"{r['elapsed']:.1f}s total, {r['pacing']:.1f}s pacing, {r['work']:.1f}s work over {r['requests']} paced requests"
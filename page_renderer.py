@@ -0,0 +1,48 @@
+import threading
+from browser_manager import visit_batch
+
+# Visible text and title of a rendered page, capped so a huge page stays cheap to ship back
+RENDERED_TEXT_SCRIPT = """limit => ({
+    title: document.title || null,
+    text: document.body ? document.body.innerText.slice(0, limit) : ''
+})"""
+
+class PageRenderer:
+    """
+    Renders pages in headless Chromium for WebsiteAnalyzer's render tier.
+    Uses a "renderer" context on the shared BrowserManager with at most
+    pool_size tabs, so rendering never holds more than that many pages open.
+    Like the manager, it only works on the thread that created it;
+    can_render() tells other threads to leave rendering to that one.
+    """
+    def __init__(self, browser_manager, pool_size=2, resource_policy=None, pacer=None, max_chars=200000, network_quiet=2000):
+        self.browser_manager = browser_manager
+        self.pool_size = max(1, pool_size)
+        self.resource_policy = resource_policy  # Optional ResourcePolicy; images and fonts never change the text
+        self.pacer = pacer
+        self.max_chars = max_chars
+        self.network_quiet = network_quiet  # SPAs fetch their content after load; wait this long for the network to settle
+        self.rendered = 0
+        self._thread = threading.get_ident()
+
+    def can_render(self):
+        return threading.get_ident() == self._thread
+
+    def render_many(self, urls):
+        """
+        Render urls pool_size at a time. Returns {'title', 'text'} per url,
+        aligned with urls, or None where the page failed to load.
+        """
+        results = []
+        for i in range(0, len(urls), self.pool_size):
+            batch = urls[i:i + self.pool_size]
+            pages = self.browser_manager.pages("renderer", len(batch), resource_policy=self.resource_policy)
+            results.extend(visit_batch(pages, batch, self._extract, pacer=self.pacer, source="render", network_quiet=self.network_quiet))
+        self.rendered += sum(1 for r in results if r is not None)
+        return results
+
+    def _extract(self, page, url):
+        return page.evaluate(RENDERED_TEXT_SCRIPT, self.max_chars)
+
+    def close(self):
+        self.browser_manager.close_context("renderer")
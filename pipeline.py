@@ -0,0 +1,298 @@
+import time
+import asyncio
+import threading
+from playwright.async_api import async_playwright
+from producthunt_extract import PRODUCT_SCRIPT, MAKER_SCRIPT, parse_product, parse_maker
+from crunchbase_bot import COMPANY_SCRIPT, SEARCH_STATE_SCRIPT, SearchNotLoaded, parse_company, parse_search
+from leads import new_lead, add_crunchbase, add_analysis, mark_no_website, lead_settled
+from metrics import STAGE_SECONDS, NAVIGATION_SECONDS
+import har
+
+class StageStats:
+    """Throughput and queue-depth counters for one pipeline stage"""
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_time = 0.0
+        self.max_queue_depth = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def summary(self):
+        elapsed = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        rate = self.processed / elapsed * 60 if elapsed > 0 else 0.0
+        return (
+            f"{self.name}: {self.processed} done, {self.failed} failed, "
+            f"{rate:.1f}/min over {elapsed:.1f}s ({self.workers} workers, "
+            f"busy {self.busy_time:.1f}s, max queue {self.max_queue_depth})"
+        )
+
+class LeadPipeline:
+    """
+    Runs scrape -> Crunchbase enrich -> website analysis -> Telegram notify as
+    concurrent asyncio stages connected by bounded queues, so the stages
+    overlap across products instead of running in series per product.
+
+    Browser stages use Playwright's async API on a browser of their own (the
+    sync BrowserManager can't be driven from an event loop), so the caller
+    should close the shared browser before run(). Contexts reuse the bots'
+    storage_state, so their cookies apply here too. The HTTP-first
+    Product Hunt client, WebsiteAnalyzer and notifications are blocking code
+    and run in worker threads.
+    """
+    def __init__(self, analyzer, notify, ph_bot, cb_bot=None, crawl_state=None, lead_log=None,
+                 checkpoint=None, should_stop=None, scrape_workers=3, enrich_workers=1, analyze_workers=5, notify_workers=1,
+                 queue_size=5, headless=True, ph_policy=None, cb_policy=None):
+        self.analyzer = analyzer
+        self.notify = notify  # Callable(lead_data, on_sent), blocking; on_sent(outcome) runs once delivered or given up on
+        self.ph_bot = ph_bot  # Source of the HTTP client, maker cache and pacer
+        self.cb_bot = cb_bot  # Source of the Crunchbase cache and cookies
+        self.crawl_state = crawl_state
+        self.lead_log = lead_log  # Optional LeadLog every finished lead is appended to
+        self.checkpoint = checkpoint  # Optional CycleCheckpoint for resuming after a restart
+        self.should_stop = should_stop or (lambda: False)  # Checked before scraping each product
+        self.queue_size = queue_size
+        self.headless = headless
+        self.ph_policy = ph_policy
+        self.cb_policy = cb_policy
+        self.stats = {
+            'scrape': StageStats('scrape', scrape_workers),
+            'enrich': StageStats('enrich', enrich_workers if cb_bot else 1),
+            'analyze': StageStats('analyze', analyze_workers),
+            'notify': StageStats('notify', notify_workers),
+        }
+
+    def run(self, products):
+        """
+        Blocking entry point: process products and return lead records in
+        product order. The event loop runs on its own thread so it never
+        collides with the sync Playwright loop of the calling thread.
+        """
+        outcome = {}
+        def target():
+            try:
+                outcome['results'] = asyncio.run(self.run_async(products))
+            except BaseException as e:
+                outcome['error'] = e
+        thread = threading.Thread(target=target, name="lead-pipeline")
+        thread.start()
+        thread.join()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['results']
+
+    async def run_async(self, products):
+        results = {}
+        async with async_playwright() as playwright:
+            self._playwright = playwright
+            self._browser = None
+            self._ph_context = None
+            self._cb_context = None
+            self._context_lock = asyncio.Lock()
+            try:
+                inbox = asyncio.Queue()
+                for index, product in enumerate(products):
+                    inbox.put_nowait((index, product, None))
+
+                scraped = asyncio.Queue(maxsize=self.queue_size)
+                enriched = asyncio.Queue(maxsize=self.queue_size)
+                analyzed = asyncio.Queue(maxsize=self.queue_size)
+
+                try:
+                    await asyncio.gather(
+                        self._stage('scrape', inbox, scraped, 'enrich', self._scrape),
+                        self._stage('enrich', scraped, enriched, 'analyze', self._enrich),
+                        self._stage('analyze', enriched, analyzed, 'notify', self._analyze),
+                        self._stage('notify', analyzed, None, None, lambda item: self._notify(item, results)),
+                    )
+                finally:
+                    for context in (self._ph_context, self._cb_context):
+                        if context:
+                            await context.close()
+            finally:
+                if self._browser:
+                    await self._browser.close()
+
+        return [results[i] for i in sorted(results)]
+
+    async def _stage(self, name, inbox, outbox, downstream, handler):
+        """Run a stage's workers until they each receive the end-of-stream marker"""
+        stats = self.stats[name]
+        stats.started_at = time.monotonic()
+        if name == 'scrape':
+            # The product list is complete up front; one end marker per worker
+            for _ in range(stats.workers):
+                inbox.put_nowait(None)
+
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is None:
+                    return
+                if name == 'scrape' and self.should_stop():
+                    # Stop feeding the pipeline; later stages drain what's in flight
+                    continue
+                started = time.monotonic()
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    print(f"Pipeline {name} failed for item {item[0]}: {e}", flush=True)
+                    stats.failed += 1
+                    result = None
+                else:
+                    stats.processed += 1
+                elapsed = time.monotonic() - started
+                stats.busy_time += elapsed
+                STAGE_SECONDS.observe(elapsed, stage=f"pipeline_{name}")
+                if outbox is not None and result is not None:
+                    await outbox.put(result)
+                    stats.max_queue_depth = max(stats.max_queue_depth, outbox.qsize())
+
+        await asyncio.gather(*(worker() for _ in range(stats.workers)))
+        stats.finished_at = time.monotonic()
+        if outbox is not None:
+            for _ in range(self.stats[downstream].workers):
+                await outbox.put(None)
+
+    async def _new_context(self, source, policy, storage_state=None):
+        if self._browser is None:
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        context = await self._browser.new_context(
+            storage_state=storage_state,
+            viewport={"width": 1920, "height": 1080},
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            **har.context_options(source)
+        )
+        await har.attach_replay_async(context, source)
+        if policy:
+            await policy.attach_async(context)
+        return context
+
+    async def _load(self, context_attr, policy, url, selector, script, arg=None):
+        """
+        Open url in a fresh tab of the given context, wait for selector (if any)
+        and run an extraction script. Returns None when selector never showed:
+        a login wall or bot check is a failed load, not an empty page.
+        """
+        async with self._context_lock:
+            if getattr(self, context_attr) is None:
+                # Archived apart from the sync bots' contexts so neither overwrites the other
+                source = "pipeline-crunchbase" if context_attr == '_cb_context' else "pipeline-producthunt"
+                bot = self.cb_bot if context_attr == '_cb_context' else self.ph_bot
+                storage_state = getattr(bot, 'storage_state', None)
+                setattr(self, context_attr, await self._new_context(source, policy, storage_state))
+        context = getattr(self, context_attr)
+        await asyncio.to_thread(self.ph_bot.pacer.wait, url)
+        page = await context.new_page()
+        try:
+            with NAVIGATION_SECONDS.time(source="crunchbase" if context_attr == '_cb_context' else "producthunt", transport="browser"):
+                await page.goto(url, wait_until="domcontentloaded")
+                if selector:
+                    try:
+                        await page.wait_for_selector(selector, timeout=10000)
+                    except Exception:
+                        print(f"{url} never showed {selector} (landed on {page.url})", flush=True)
+                        return None
+            return await page.evaluate(script, arg)
+        finally:
+            await page.close()
+
+    async def _scrape(self, item):
+        index, product, _ = item
+        url = product['url']
+        if self.checkpoint:
+            lead_data = self.checkpoint.scraped_lead(url)
+            if lead_data:
+                # Scraped (and enriched, which the cache makes free to repeat) before a restart
+                return index, product, lead_data
+        details = None
+        if self.ph_bot.http:
+            details = await asyncio.to_thread(self.ph_bot.http.get_product_details, url)
+        if details is None:
+            data = await self._load('_ph_context', self.ph_policy, url, 'h1', PRODUCT_SCRIPT)
+            if data is None:
+                # Not marked done, so the next cycle tries the product again
+                raise RuntimeError(f"{url} did not load")
+            details = parse_product(data, url)
+
+        for maker in details['makers']:
+            if not maker['profile_url']:
+                continue
+            info = await asyncio.to_thread(self.ph_bot.cached_maker, maker['profile_url'])
+            if info is None:
+                if self.ph_bot.http:
+                    info = await asyncio.to_thread(self.ph_bot.http.get_maker_details, maker['profile_url'])
+                if info is None:
+                    hrefs = await self._load('_ph_context', self.ph_policy, maker['profile_url'], 'h1', MAKER_SCRIPT)
+                    info = parse_maker(hrefs) if hrefs is not None else None
+                await asyncio.to_thread(self.ph_bot.remember_maker, maker['profile_url'], info)
+            self.ph_bot.fill_maker(maker, info or {})
+
+        print(f"Scraped {details['name'] or product['name']}", flush=True)
+        return index, product, new_lead(product, details)
+
+    async def _enrich(self, item):
+        index, product, lead_data = item
+        if self.cb_bot:
+            hit, cb_details = await asyncio.to_thread(self.cb_bot.cached, lead_data['name'])
+            if not hit:
+                try:
+                    cb_details = await self._crunchbase_lookup(lead_data['name'])
+                    await asyncio.to_thread(self.cb_bot.remember, lead_data['name'], cb_details)
+                except Exception as e:
+                    # Enrichment is optional; pass the lead on without it
+                    print(f"  ⚠️ Crunchbase lookup failed (non-critical): {e}", flush=True)
+                    cb_details = None
+            if cb_details:
+                add_crunchbase(lead_data, cb_details)
+        if self.checkpoint:
+            await asyncio.to_thread(self.checkpoint.save, product['url'], 'scraped', lead_data)
+        return item
+
+    async def _crunchbase_lookup(self, company_name):
+        search_url = f"https://www.crunchbase.com/textsearch?q={company_name.replace(' ', '+')}"
+        state = await self._load('_cb_context', self.cb_policy, search_url, None, SEARCH_STATE_SCRIPT, 8000)
+        # Raises when the page never loaded, so _enrich doesn't cache a "not found"
+        company_url = parse_search(state, search_url)
+        if not company_url:
+            return None
+        data = await self._load('_cb_context', self.cb_policy, company_url, 'h1', COMPANY_SCRIPT)
+        if data is None:
+            raise SearchNotLoaded(f"{company_url} did not load")
+        return parse_company(data, company_url)
+
+    async def _analyze(self, item):
+        index, product, lead_data = item
+        if lead_data['website']:
+            # Same per-host limit as analyze_many, so workers don't pile onto one host
+            analysis = await asyncio.to_thread(self.analyzer._analyze_limited, lead_data['website'])
+            is_target = add_analysis(lead_data, analysis)
+            print(f"  {lead_data['name']}: {lead_data['website']} -> {analysis['status']} (Score: {analysis['score']})", flush=True)
+        else:
+            mark_no_website(lead_data)
+            is_target = True
+        return index, product, lead_data, is_target
+
+    async def _notify(self, item, results):
+        index, product, lead_data, is_target = item
+        if self.lead_log:
+            await asyncio.to_thread(self.lead_log.append, lead_data, is_target)
+        if is_target:
+            # Marked done from the delivery callback, so leads still queued at shutdown are sent after the restart
+            await asyncio.to_thread(self.notify, lead_data, lambda outcome: lead_settled(lead_data, outcome) and self._mark_done(product))
+        else:
+            await asyncio.to_thread(self._mark_done, product)
+        results[index] = lead_data
+        return None
+
+    def _mark_done(self, product):
+        """Record product as finished (blocking; runs in a worker or the dispatcher thread)"""
+        if self.crawl_state:
+            self.crawl_state.mark_processed(product)
+        if self.checkpoint:
+            self.checkpoint.save(product['url'], 'done')
+
+    def summary(self):
+        return "\n".join(stats.summary() for stats in self.stats.values())
@@ -1,22 +1,33 @@
-from playwright.sync_api import sync_playwright
-import time
-import random
+from browser_manager import BrowserManager, wait_for_ready, visit_batch
+from pacing import PacingScheduler
+from producthunt_http import ProductHuntHttpClient
+from producthunt_extract import PH_BASE_URL, LAUNCHES_SCRIPT, PRODUCT_SCRIPT, MAKER_SCRIPT, parse_launches, parse_product, parse_maker
+from metrics import STAGE_SECONDS, NAVIGATION_SECONDS
 import json
 import os
 
 class ProductHuntBot:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, maker_cache=None, maker_cache_ttl=7 * 24 * 3600, concurrency=3, resource_policy=None, pacer=None, http_first=False):
         self.headless = headless
-        self.playwright = None
-        self.browser = None
-        self.context = None
-        self.page = None
+        self.pacer = pacer or PacingScheduler(min_interval=1.0)  # Shared per-domain request pacing
+        # Try plain HTTP + server-rendered HTML first; the browser is only opened for pages that fail
+        self.http = ProductHuntHttpClient(pacer=self.pacer) if http_first else None
+        self.resource_policy = resource_policy  # Optional ResourcePolicy applied to the context
+        self.concurrency = max(1, concurrency)  # Tabs used by get_products_details
+        self.maker_cache = maker_cache  # Optional PersistentCache keyed by maker profile URL
+        self.maker_cache_ttl = maker_cache_ttl
+        self.maker_cache_hits = 0
+        self.maker_cache_misses = 0
+        self.browser_manager = None
+        self._owns_browser = False
+        self.storage_state = None
         self.auth_file = "ph_auth.json"
         
-    def start(self, auth_content=None):
-        """Initialize browser with optional authentication"""
+    def start(self, auth_content=None, browser_manager=None):
+        """Open a browser context with optional authentication (on a shared browser if given)"""
         print("Initializing Product Hunt bot...", flush=True)
-        self.playwright = sync_playwright().start()
+        self._owns_browser = browser_manager is None
+        self.browser_manager = browser_manager or BrowserManager(headless=self.headless)
         
         # Load authentication if available
         storage_state = None
@@ -31,15 +42,22 @@ class ProductHuntBot:
             storage_state = self.auth_file
             print("Loaded saved authentication.", flush=True)
         
-        # Launch browser
-        self.browser = self.playwright.chromium.launch(headless=self.headless)
-        self.context = self.browser.new_context(
-            storage_state=storage_state,
+        self.storage_state = storage_state
+        if not self.http:
+            self._pages()
+    
+    def _pages(self, count=1):
+        """Return count tabs in the producthunt context (see BrowserManager.pages)"""
+        return self.browser_manager.pages(
+            "producthunt",
+            count,
+            resource_policy=self.resource_policy,
+            storage_state=self.storage_state,
             viewport={"width": 1920, "height": 1080},
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         )
-        self.page = self.context.new_page()
         
+    @STAGE_SECONDS.time(stage="launches")
     def get_daily_launches(self, date=None):
         """
         Scrape products launched on Product Hunt.
@@ -48,56 +66,36 @@ class ProductHuntBot:
         print("Fetching Product Hunt launches...", flush=True)
         
         # Navigate to Product Hunt
-        url = "https://www.producthunt.com"
+        url = PH_BASE_URL
         if date:
             url += f"?date={date}"
-            
-        self.page.goto(url, wait_until="domcontentloaded")
-        time.sleep(random.uniform(3, 5))
+        
+        if self.http:
+            products = self.http.get_daily_launches(url)
+            if products:
+                print(f"Extracted {len(products)} products over HTTP.", flush=True)
+                return products
+            print("HTTP launch parsing failed, falling back to browser...", flush=True)
+        
+        page = self._pages()[0]
+        
+        self.pacer.wait(url)
+        with NAVIGATION_SECONDS.time(source="producthunt", transport="browser"):
+            page.goto(url, wait_until="domcontentloaded")
+            wait_for_ready(page, '[data-test="post-item"], article')
         
         products = []
         
         try:
             # Scroll to load more products
             for _ in range(3):
-                self.page.evaluate("window.scrollBy(0, 1000)")
-                time.sleep(random.uniform(1, 2))
-            
-            # Find all product cards
-            product_elements = self.page.query_selector_all('[data-test="post-item"]')
+                page.evaluate("window.scrollBy(0, 1000)")
+                wait_for_ready(page, network_quiet=1500)
             
-            if not product_elements:
-                # Fallback selector
-                product_elements = self.page.query_selector_all('article')
-            
-            print(f"Found {len(product_elements)} products on the page.", flush=True)
-            
-            for element in product_elements[:20]:  # Limit to top 20
-                try:
-                    # Extract product link
-                    link_elem = element.query_selector('a[href^="/posts/"]')
-                    if not link_elem:
-                        continue
-                        
-                    product_url = "https://www.producthunt.com" + link_elem.get_attribute('href')
-                    
-                    # Extract product name
-                    name_elem = element.query_selector('h3, strong')
-                    product_name = name_elem.inner_text() if name_elem else "Unknown"
-                    
-                    # Extract tagline
-                    tagline_elem = element.query_selector('[class*="tagline"], p')
-                    tagline = tagline_elem.inner_text() if tagline_elem else ""
-                    
-                    products.append({
-                        'name': product_name.strip(),
-                        'tagline': tagline.strip(),
-                        'url': product_url
-                    })
-                    
-                except Exception as e:
-                    print(f"Error extracting product: {e}", flush=True)
-                    continue
+            # Read all product cards in one round-trip (top 20)
+            data = page.evaluate(LAUNCHES_SCRIPT, 20)
+            print(f"Found {data['count']} products on the page.", flush=True)
+            products = parse_launches(data)
             
             print(f"Successfully extracted {len(products)} products.", flush=True)
             
@@ -106,84 +104,34 @@ class ProductHuntBot:
         
         return products
     
+    @STAGE_SECONDS.time(stage="product_details")
     def get_product_details(self, product_url):
         """Extract detailed information from a product page"""
         print(f"Fetching details for: {product_url}", flush=True)
         
+        if self.http:
+            details = self.http.get_product_details(product_url)
+            if details:
+                for maker in details['makers']:
+                    if maker['profile_url']:
+                        self.fill_maker(maker, self.get_maker_details(maker['profile_url']))
+                return details
+        
         try:
-            self.page.goto(product_url, wait_until="domcontentloaded")
-            time.sleep(random.uniform(2, 4))
-            
-            details = {
-                'url': product_url,
-                'name': '',
-                'description': '',
-                'website': None,
-                'makers': [],
-                'twitter': None,
-                'linkedin': None,
-                'facebook': None,
-                'instagram': None,
-                'email': None
-            }
+            page = self._pages()[0]
+            self.pacer.wait(product_url)
+            with NAVIGATION_SECONDS.time(source="producthunt", transport="browser"):
+                page.goto(product_url, wait_until="domcontentloaded")
+                ready = wait_for_ready(page, 'h1')
+            if not ready:
+                # A login wall or bot check, not a product without makers or website
+                print(f"{product_url} never showed its heading (landed on {page.url})", flush=True)
+                return None
             
-            # Get product name
-            name_elem = self.page.query_selector('h1')
-            if name_elem:
-                details['name'] = name_elem.inner_text().strip()
-            
-            # Get description
-            desc_elem = self.page.query_selector('[data-test="product-description"], .description, p')
-            if desc_elem:
-                details['description'] = desc_elem.inner_text().strip()
-            
-            # Get website link
-            website_elem = self.page.query_selector('a[data-test="product-website"], a[href*="http"]:has-text("Visit")')
-            if website_elem:
-                details['website'] = website_elem.get_attribute('href')
-            
-            # Get all social links
-            all_links = self.page.query_selector_all('a[href]')
-            for link in all_links:
-                href = link.get_attribute('href')
-                if not href:
-                    continue
-                    
-                # Twitter/X
-                if 'twitter.com' in href or 'x.com' in href:
-                    details['twitter'] = href
-                # LinkedIn
-                elif 'linkedin.com' in href:
-                    details['linkedin'] = href
-                # Facebook
-                elif 'facebook.com' in href:
-                    details['facebook'] = href
-                # Instagram
-                elif 'instagram.com' in href:
-                    details['instagram'] = href
-                # Email
-                elif href.startswith('mailto:'):
-                    details['email'] = href.replace('mailto:', '')
-            
-            # Get makers with their profiles
-            maker_elements = self.page.query_selector_all('[data-test="makers-list"] a, .makers a')
-            for maker_elem in maker_elements[:3]:  # Limit to 3 makers
-                maker_name = maker_elem.inner_text().strip()
-                maker_url = maker_elem.get_attribute('href')
-                if maker_url and not maker_url.startswith('http'):
-                    maker_url = "https://www.producthunt.com" + maker_url
-                
-                # Get maker details
-                maker_info = self.get_maker_details(maker_url) if maker_url else {}
-                    
-                details['makers'].append({
-                    'name': maker_name,
-                    'profile_url': maker_url,
-                    'twitter': maker_info.get('twitter'),
-                    'linkedin': maker_info.get('linkedin'),
-                    'website': maker_info.get('website'),
-                    'email': maker_info.get('email')
-                })
+            details = self._extract_product_details(page, product_url)
+            for maker in details['makers']:
+                if maker['profile_url']:
+                    self.fill_maker(maker, self.get_maker_details(maker['profile_url']))
             
             return details
             
@@ -191,51 +139,133 @@ class ProductHuntBot:
             print(f"Error getting product details: {e}", flush=True)
             return None
     
+    @STAGE_SECONDS.time(stage="product_details_batch")
+    def get_products_details(self, product_urls):
+        """
+        Fetch details for several products at once using a pool of pages.
+        Returns a list aligned with product_urls (None where a page failed).
+        """
+        print(f"Fetching details for {len(product_urls)} products ({self.concurrency} at a time)...", flush=True)
+        results = self._fetch_many(product_urls, self.http and self.http.get_product_details, self._extract_product_details)
+        
+        # Resolve every maker once, across all products, skipping cached ones
+        maker_infos = {}
+        pending = []
+        for details in results:
+            for maker in (details or {}).get('makers', []):
+                url = maker['profile_url']
+                if not url or url in maker_infos or url in pending:
+                    continue
+                cached = self.cached_maker(url)
+                if cached is not None:
+                    maker_infos[url] = cached
+                else:
+                    pending.append(url)
+        
+        for url, info in zip(pending, self._fetch_many(pending, self.http and self.http.get_maker_details, self._extract_maker_details)):
+            maker_infos[url] = info or {}
+            self.remember_maker(url, info)
+        
+        for details in results:
+            for maker in (details or {}).get('makers', []):
+                self.fill_maker(maker, maker_infos.get(maker['profile_url'], {}))
+        
+        return results
+    
+    @STAGE_SECONDS.time(stage="maker_details")
     def get_maker_details(self, maker_url):
         """Extract contact details from maker's profile"""
+        cached = self.cached_maker(maker_url)
+        if cached is not None:
+            return cached
+        
+        if self.http:
+            maker_info = self.http.get_maker_details(maker_url)
+            if maker_info is not None:
+                self.remember_maker(maker_url, maker_info)
+                return maker_info
+        
         try:
-            self.page.goto(maker_url, wait_until="domcontentloaded")
-            time.sleep(random.uniform(1, 2))
+            page = self._pages()[0]
+            self.pacer.wait(maker_url)
+            with NAVIGATION_SECONDS.time(source="producthunt", transport="browser"):
+                page.goto(maker_url, wait_until="domcontentloaded")
+                ready = wait_for_ready(page, 'h1')
+            if not ready:
+                # Nothing cached, so the profile is read again next time
+                print(f"{maker_url} never showed its heading (landed on {page.url})", flush=True)
+                return {}
             
-            maker_info = {
-                'twitter': None,
-                'linkedin': None,
-                'website': None,
-                'email': None
-            }
-            
-            # Get all links from profile
-            all_links = self.page.query_selector_all('a[href]')
-            for link in all_links:
-                href = link.get_attribute('href')
-                if not href:
-                    continue
-                
-                if 'twitter.com' in href or 'x.com' in href:
-                    maker_info['twitter'] = href
-                elif 'linkedin.com' in href:
-                    maker_info['linkedin'] = href
-                elif href.startswith('mailto:'):
-                    maker_info['email'] = href.replace('mailto:', '')
-                elif href.startswith('http') and 'producthunt.com' not in href:
-                    # Likely personal website
-                    if not maker_info['website']:
-                        maker_info['website'] = href
+            maker_info = self._extract_maker_details(page, maker_url)
             
+            self.remember_maker(maker_url, maker_info)
             return maker_info
             
         except Exception as e:
             print(f"Error getting maker details: {e}", flush=True)
             return {}
     
+    def cached_maker(self, maker_url):
+        """Return cached maker info (None on a miss), counting the hit or miss"""
+        if self.maker_cache is None:
+            return None
+        cached = self.maker_cache.get(maker_url, ttl=self.maker_cache_ttl)
+        if cached is not None:
+            self.maker_cache_hits += 1
+        else:
+            self.maker_cache_misses += 1
+        return cached
+    
+    def remember_maker(self, maker_url, maker_info):
+        """Cache maker info read from a profile that loaded; None (the page never did) is not cached"""
+        if self.maker_cache is not None and maker_info is not None:
+            self.maker_cache.put(maker_url, maker_info)
+    
+    def _fetch_many(self, urls, http_fetch, extract):
+        """
+        Fetch urls over HTTP when enabled and load only the failures in the
+        browser. Returns results aligned with urls.
+        """
+        results = [http_fetch(url) for url in urls] if http_fetch else [None] * len(urls)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            if http_fetch:
+                print(f"{len(missing)} of {len(urls)} pages need the browser.", flush=True)
+            browser_results = self._visit_many([urls[i] for i in missing], extract, ready_selector='h1')
+            for i, result in zip(missing, browser_results):
+                results[i] = result
+        return results
+    
+    def _visit_many(self, urls, extract, ready_selector=None):
+        """
+        Load urls in batches of self.concurrency tabs and run extract(page, url)
+        on each once ready_selector is present (see visit_batch).
+        """
+        results = []
+        for i in range(0, len(urls), self.concurrency):
+            batch = urls[i:i + self.concurrency]
+            pages = self._pages(len(batch))
+            results.extend(visit_batch(pages, batch, extract, ready_selector, pacer=self.pacer, source="producthunt"))
+        return results
+    
+    def fill_maker(self, maker, maker_info):
+        """Copy a profile's contact links onto a product's maker entry"""
+        maker['twitter'] = maker_info.get('twitter')
+        maker['linkedin'] = maker_info.get('linkedin')
+        maker['website'] = maker_info.get('website')
+        maker['email'] = maker_info.get('email')
+    
+    def _extract_product_details(self, page, product_url):
+        """Read product fields and maker profile links from a loaded product page"""
+        return parse_product(page.evaluate(PRODUCT_SCRIPT), product_url)
+    
+    def _extract_maker_details(self, page, maker_url):
+        """Read contact links from a loaded maker profile page"""
+        return parse_maker(page.evaluate(MAKER_SCRIPT))
+    
     def close(self):
-        """Close browser"""
-        if self.context:
-            try:
-                self.context.storage_state(path=self.auth_file)
-            except:
-                pass
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
+        """Save the session and close this bot's context (and the browser if the bot owns it)"""
+        if self.browser_manager:
+            self.browser_manager.close_context("producthunt", storage_path=self.auth_file)
+            if self._owns_browser:
+                self.browser_manager.close()
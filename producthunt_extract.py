@@ -0,0 +1,95 @@
+import os
+from link_classifier import classify_links
+
+# Site root; overridden to point the bots at a local stand-in (see bench/)
+PH_BASE_URL = os.environ.get("PH_BASE_URL", "https://www.producthunt.com").rstrip('/')
+
+# In-page extraction scripts: each collects everything a parser needs in one
+# evaluate() round-trip instead of one IPC call per element
+
+LAUNCHES_SCRIPT = """(limit) => {
+    let cards = [...document.querySelectorAll('[data-test="post-item"]')];
+    if (!cards.length) cards = [...document.querySelectorAll('article')];
+    const text = el => el ? el.innerText : '';
+    return {
+        count: cards.length,
+        items: cards.slice(0, limit).map(card => {
+            const link = card.querySelector('a[href^="/posts/"]');
+            return {
+                href: link ? link.getAttribute('href') : null,
+                name: card.querySelector('h3, strong') ? text(card.querySelector('h3, strong')) : 'Unknown',
+                tagline: text(card.querySelector('[class*="tagline"], p'))
+            };
+        })
+    };
+}"""
+
+PRODUCT_SCRIPT = """() => {
+    const text = el => el ? el.innerText.trim() : '';
+    const website = document.querySelector('a[data-test="product-website"]')
+        || [...document.querySelectorAll('a[href*="http"]')].find(a => /visit/i.test(a.textContent));
+    return {
+        name: text(document.querySelector('h1')),
+        description: text(document.querySelector('[data-test="product-description"], .description, p')),
+        website: website ? website.getAttribute('href') : null,
+        hrefs: [...document.querySelectorAll('a[href]')].map(a => a.getAttribute('href')),
+        makers: [...document.querySelectorAll('[data-test="makers-list"] a, .makers a')].slice(0, 3)
+            .map(a => ({name: a.innerText.trim(), href: a.getAttribute('href')}))
+    };
+}"""
+
+MAKER_SCRIPT = """() => [...document.querySelectorAll('a[href]')].map(a => a.getAttribute('href'))"""
+
+PH_HOSTS = ('producthunt.com',)
+
+def parse_launches(data):
+    """Turn LAUNCHES_SCRIPT output into product dicts"""
+    products = []
+    for item in data['items']:
+        if not item.get('href'):
+            continue
+        products.append({
+            'name': item['name'].strip(),
+            'tagline': item['tagline'].strip(),
+            'url': PH_BASE_URL + item['href']
+        })
+    return products
+
+def parse_product(data, product_url):
+    """Turn PRODUCT_SCRIPT output into the product details dict (makers not yet resolved)"""
+    links = classify_links(data['hrefs'], ignore_hosts=PH_HOSTS)
+    details = {
+        'url': product_url,
+        'name': data['name'],
+        'description': data['description'],
+        'website': data['website'],
+        'makers': [],
+        'twitter': links.get('twitter', [None])[-1],
+        'linkedin': links.get('linkedin', [None])[-1],
+        'facebook': links.get('facebook', [None])[-1],
+        'instagram': links.get('instagram', [None])[-1],
+        'email': links.get('email', [None])[-1]
+    }
+    for maker in data['makers']:
+        maker_url = maker['href']
+        if maker_url and not maker_url.startswith('http'):
+            maker_url = PH_BASE_URL + maker_url
+        details['makers'].append({
+            'name': maker['name'],
+            'profile_url': maker_url,
+            'twitter': None,
+            'linkedin': None,
+            'website': None,
+            'email': None
+        })
+    return details
+
+def parse_maker(hrefs):
+    """Pick a maker's contact links out of their profile's hrefs"""
+    links = classify_links(hrefs, ignore_hosts=PH_HOSTS)
+    return {
+        'twitter': links.get('twitter', [None])[-1],
+        'linkedin': links.get('linkedin', [None])[-1],
+        'website': links.get('website', [None])[0],
+        'email': links.get('email', [None])[-1]
+    }
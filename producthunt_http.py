@@ -0,0 +1,199 @@
+import json
+from collections import deque
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from http_transport import get_session, DEFAULT_TIMEOUT
+from producthunt_extract import parse_launches, parse_product, parse_maker
+from metrics import NAVIGATION_SECONDS, BYTES_FETCHED
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+
+def _embedded_json(soup):
+    """Yield JSON documents embedded in the page (Next.js/Apollo state)"""
+    for script in soup.find_all('script'):
+        if script.get('id') == '__NEXT_DATA__' or script.get('type') == 'application/json':
+            try:
+                yield json.loads(script.string or '')
+            except ValueError:
+                continue
+
+def _walk(node):
+    """Yield every dict nested in a JSON document, in document order per level"""
+    queue = deque([node])
+    while queue:
+        current = queue.popleft()
+        if isinstance(current, dict):
+            yield current
+            queue.extend(current.values())
+        elif isinstance(current, list):
+            queue.extend(current)
+
+def _objects_by_type(soup, typename):
+    """Return {id-or-key: object} for Apollo-style objects of the given __typename"""
+    found = {}
+    for document in _embedded_json(soup):
+        for obj in _walk(document):
+            if obj.get('__typename') == typename:
+                found.setdefault(obj.get('id') or obj.get('slug') or len(found), obj)
+    return found
+
+def _refs(soup):
+    """Map Apollo cache keys ('User:123') to objects for __ref resolution"""
+    refs = {}
+    for document in _embedded_json(soup):
+        for obj in _walk(document):
+            for key, value in obj.items():
+                if isinstance(value, dict) and ':' in key and value.get('__typename'):
+                    refs[key] = value
+    return refs
+
+def _text(el):
+    return el.get_text().strip() if el else ''
+
+def launches_from_html(html, limit=20):
+    """Launch list from a homepage's post cards (ranked order) or, failing that, its embedded state"""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    items = []
+    cards = soup.select('[data-test="post-item"]') or soup.select('article')
+    for card in cards:
+        link = card.select_one('a[href^="/posts/"]')
+        name_el = card.select_one('h3, strong')
+        items.append({
+            'href': link.get('href') if link else None,
+            'name': _text(name_el) if name_el else 'Unknown',
+            'tagline': _text(card.select_one('[class*="tagline"], p'))
+        })
+    
+    if not any(item['href'] for item in items):
+        items = []
+        for post in _objects_by_type(soup, 'Post').values():
+            if post.get('slug') and post.get('name'):
+                items.append({'href': f"/posts/{post['slug']}", 'name': post['name'], 'tagline': post.get('tagline') or ''})
+    
+    products = parse_launches({'count': len(items), 'items': items[:limit]})
+    return products or None
+
+def product_from_html(html, product_url):
+    """
+    Product details from a product page, or None if the page doesn't look
+    like one or no website link is in the server-rendered HTML. Only the
+    browser can tell "no website" (the top lead signal) from "not rendered".
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    name = _text(soup.select_one('h1'))
+    slug = product_url.rstrip('/').rsplit('/', 1)[-1]
+    post = next((p for p in _objects_by_type(soup, 'Post').values() if p.get('slug') == slug), None)
+    if not name and not post:
+        return None
+    
+    website_el = soup.select_one('a[data-test="product-website"]')
+    if not website_el:
+        website_el = next((a for a in soup.select('a[href*="http"]') if 'visit' in a.get_text().lower()), None)
+    
+    makers = [{'name': _text(a), 'href': a.get('href')} for a in soup.select('[data-test="makers-list"] a, .makers a')[:3]]
+    description = _text(soup.select_one('[data-test="product-description"], .description, p'))
+    website = website_el.get('href') if website_el else None
+    
+    # Embedded state is more reliable than markup when present
+    if post:
+        refs = _refs(soup)
+        name = post.get('name') or name
+        description = post.get('description') or post.get('tagline') or description
+        website = post.get('website') or post.get('websiteUrl') or website
+        state_makers = []
+        for maker in (post.get('makers') or [])[:3]:
+            if isinstance(maker, dict) and '__ref' in maker:
+                maker = refs.get(maker['__ref'], {})
+            if isinstance(maker, dict) and maker.get('username'):
+                state_makers.append({'name': maker.get('name') or maker['username'], 'href': f"/@{maker['username']}"})
+        makers = state_makers or makers
+    
+    if not website:
+        return None
+    
+    data = {
+        'name': name,
+        'description': description,
+        'website': website,
+        'hrefs': [a.get('href') for a in soup.select('a[href]')],
+        'makers': makers
+    }
+    return parse_product(data, product_url)
+
+def _profile_username(url):
+    """'jane' for https://www.producthunt.com/@jane, else None"""
+    path = urlparse(url or '').path.rstrip('/')
+    return path[2:].lower() if path.startswith('/@') and len(path) > 2 else None
+
+def _is_profile_of(soup, username):
+    """True if the page identifies itself as username's profile (canonical URL or embedded User state)"""
+    for el in soup.select('link[rel="canonical"], meta[property="og:url"]'):
+        if _profile_username(el.get('href') or el.get('content')) == username:
+            return True
+    return any((user.get('username') or '').lower() == username for user in _objects_by_type(soup, 'User').values())
+
+def maker_from_html(html, maker_url):
+    """
+    Maker contact links from a profile page, or None if it isn't maker_url's
+    profile (login walls and bot checks have headings and links too).
+    """
+    username = _profile_username(maker_url)
+    soup = BeautifulSoup(html, 'html.parser')
+    if not username or not _is_profile_of(soup, username):
+        return None
+    return parse_maker([a.get('href') for a in soup.select('a[href]')])
+
+class ProductHuntHttpClient:
+    """
+    Fetches Product Hunt pages over plain HTTP and parses the server-rendered
+    HTML. Every method returns None when the page can't be fetched or parsed,
+    so callers can fall back to the browser.
+    """
+    def __init__(self, pacer=None):
+        self.pacer = pacer
+        self.fetched = 0
+        self.failed = 0
+
+    def _get(self, url):
+        if self.pacer:
+            self.pacer.wait(url)
+        try:
+            with NAVIGATION_SECONDS.time(source="producthunt", transport="http"):
+                response = get_session().get(url, headers=BROWSER_HEADERS, timeout=DEFAULT_TIMEOUT)
+        except Exception as e:
+            print(f"HTTP fetch failed for {url}: {e}", flush=True)
+            self.failed += 1
+            return None
+        BYTES_FETCHED.inc(len(response.content), source="producthunt")
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', ''):
+            self.failed += 1
+            return None
+        self.fetched += 1
+        return response.text
+
+    def _parse(self, url, parser, *args):
+        html = self._get(url)
+        if html is None:
+            return None
+        try:
+            result = parser(html, *args)
+        except Exception as e:
+            print(f"Could not parse {url}: {e}", flush=True)
+            result = None
+        if result is None:
+            self.failed += 1
+        return result
+
+    def get_daily_launches(self, url, limit=20):
+        return self._parse(url, launches_from_html, limit)
+
+    def get_product_details(self, product_url):
+        return self._parse(product_url, product_from_html, product_url)
+
+    def get_maker_details(self, maker_url):
+        return self._parse(maker_url, maker_from_html, maker_url)
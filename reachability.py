@@ -0,0 +1,195 @@
+import time
+import socket
+import ipaddress
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urlparse
+from requests.utils import get_environ_proxies
+import har
+
+# Address blocks of domain-parking networks: a host resolving here is parked
+DEFAULT_PARKED_NETWORKS = {
+    "91.195.240.0/23": "Sedo",
+    "199.59.240.0/22": "Bodis",
+}
+
+# getaddrinfo errors that mean the name does not exist (anything else may be transient)
+NXDOMAIN_ERRORS = tuple(code for code in (getattr(socket, 'EAI_NONAME', None), getattr(socket, 'EAI_NODATA', None)) if code is not None)
+
+# status: "ok", "dead", "parked", "timeout" (no address answered in time) or
+# "unknown" (the probe couldn't tell); on "timeout" and "unknown" the GET decides.
+# detail explains anything but "ok"; address is the IP probed
+ProbeResult = namedtuple("ProbeResult", ["status", "detail", "address"])
+
+def parse_networks(value):
+    """Parse "91.195.240.0/23=Sedo,199.59.240.0/22" into {network: label}"""
+    networks = {}
+    for part in (value or "").split(","):
+        cidr, _, label = part.strip().partition("=")
+        if cidr:
+            networks[cidr.strip()] = label.strip() or "parking network"
+    return networks
+
+class ReachabilityProbe:
+    """
+    Cheap first tier for WebsiteAnalyzer: resolves the host and opens a TCP
+    connection to its port with short budgets, so domains that don't exist,
+    refuse connections on every address, or resolve into a parking network
+    are classified without a GET. Lookups and connections that merely run
+    out of time are not dead on their own: slow is not dead, so the GET
+    decides. When the GET then times out connecting too, the caller reports
+    it with confirm_timeout() and the host is skipped for timeout_ttl.
+
+    Resolutions are cached for dns_ttl seconds and dead hosts for dead_ttl,
+    so later checks of the same host (across cycles when the probe is
+    shared) cost nothing. Expired entries are pruned as checks go by.
+    Thread-safe.
+    """
+    PRUNE_EVERY = 256  # Checks between sweeps of expired cache entries
+
+    def __init__(self, dns_timeout=1.5, connect_timeout=2.0, dns_ttl=300, dead_ttl=6 * 3600, timeout_ttl=4 * 3600, parked_networks=None, max_addresses=2, resolver_workers=16):
+        self.dns_timeout = dns_timeout
+        self.connect_timeout = connect_timeout
+        self.dns_ttl = dns_ttl
+        self.dead_ttl = dead_ttl
+        self.timeout_ttl = timeout_ttl  # Shorter than dead_ttl: a host that only went silent may come back
+        self.max_addresses = max_addresses  # Addresses tried before a host counts as unreachable
+        networks = DEFAULT_PARKED_NETWORKS if parked_networks is None else parked_networks
+        self.parked_networks = [(ipaddress.ip_network(cidr, strict=False), label) for cidr, label in networks.items()]
+        self.dns_hits = 0
+        self.dead_hits = 0
+        self._dns = {}  # host -> (expires_at, addresses)
+        self._dead = {}  # (host, port) -> (expires_at, ProbeResult)
+        self._lock = threading.Lock()
+        self._checks = 0
+        # getaddrinfo has no timeout of its own; a stuck lookup keeps its worker, not the caller.
+        # Size it to at least the analyzer's workers so lookups rarely queue.
+        self._resolver = ThreadPoolExecutor(max_workers=resolver_workers, thread_name_prefix="dns")
+
+    def check(self, url):
+        """ProbeResult for url's host; "ok" when the probe is skipped"""
+        if not url.startswith('http'):
+            url = 'https://' + url
+        host, port = self._target(url)
+        if not host or har.replaying() or get_environ_proxies(url):
+            # Replays are offline and proxied requests never connect to the host directly
+            return ProbeResult("ok", None, None)
+
+        now = time.monotonic()
+        with self._lock:
+            self._checks += 1
+            if self._checks % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            dead = self._dead.get((host, port))
+            if dead and dead[0] > now:
+                self.dead_hits += 1
+                return dead[1]
+
+        result = self._probe(host, port)
+        if result.status in ("dead", "parked"):
+            with self._lock:
+                self._dead[(host, port)] = (time.monotonic() + self.dead_ttl, result)
+        return result
+
+    def confirm_timeout(self, url, detail):
+        """
+        The GET for url timed out connecting after the probe reported
+        "timeout": remember the host as dead for timeout_ttl so later checks
+        skip both waits.
+        """
+        if not url.startswith('http'):
+            url = 'https://' + url
+        host, port = self._target(url)
+        if not host:
+            return
+        with self._lock:
+            self._dead[(host, port)] = (time.monotonic() + self.timeout_ttl, ProbeResult("dead", detail, None))
+
+    def _target(self, url):
+        parsed = urlparse(url)
+        return (parsed.hostname or '').lower(), parsed.port or (443 if parsed.scheme == 'https' else 80)
+
+    def _prune(self, now):
+        """Drop expired resolutions and dead hosts (caller holds the lock)"""
+        for cache in (self._dns, self._dead):
+            for key in [key for key, (expires_at, _) in cache.items() if expires_at <= now]:
+                del cache[key]
+
+    def _probe(self, host, port):
+        try:
+            addresses = self.resolve(host, port)
+        except socket.gaierror as e:
+            status = "dead" if e.errno in NXDOMAIN_ERRORS else "unknown"
+            return ProbeResult(status, f"DNS lookup failed: {e.strerror or e}", None)
+        except FutureTimeout:
+            return ProbeResult("unknown", f"DNS lookup took over {self.dns_timeout}s", None)
+        if not addresses:
+            return ProbeResult("unknown", "DNS lookup returned no addresses", None)
+
+        for address in addresses:
+            label = self.parking_network(address)
+            if label:
+                return ProbeResult("parked", f"Parked domain ({address} is on {label})", address)
+
+        errors = []
+        refused = timed_out = True
+        for address in addresses[:self.max_addresses]:
+            try:
+                socket.create_connection((address, port), timeout=self.connect_timeout).close()
+                return ProbeResult("ok", None, address)
+            except ConnectionRefusedError as e:
+                timed_out = False
+                errors.append(f"{address}: {e.strerror or e}")
+            except socket.timeout:
+                refused = False
+                errors.append(f"{address}: no answer in {self.connect_timeout}s")
+            except OSError as e:
+                refused = timed_out = False
+                errors.append(f"{address}: {e.strerror or e}")
+        # Only a refusal from every address tried is conclusive; silence and routing errors can be transient
+        status = "dead" if refused else "timeout" if timed_out else "unknown"
+        return ProbeResult(status, f"Port {port} unreachable ({'; '.join(errors)})", addresses[0])
+
+    def resolve(self, host, port):
+        """
+        Addresses for host, from the cache while fresh. Raises socket.gaierror
+        when the name doesn't resolve and FutureTimeout when the lookup runs
+        past dns_timeout. The budget starts when the lookup does, so time
+        queued behind other lookups doesn't count.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dns.get(host)
+            if cached and cached[0] > now:
+                self.dns_hits += 1
+                return cached[1]
+
+        started = threading.Event()
+        def lookup():
+            started.set()
+            return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        future = self._resolver.submit(lookup)
+        if not started.wait(timeout=self.dns_timeout * 4):
+            # Every resolver worker is stuck on slow lookups
+            future.cancel()
+            raise FutureTimeout()
+        infos = future.result(timeout=self.dns_timeout)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._dns[host] = (time.monotonic() + self.dns_ttl, addresses)
+        return addresses
+
+    def parking_network(self, address):
+        """Label of the parking network address belongs to, or None"""
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return None
+        for network, label in self.parked_networks:
+            if ip.version == network.version and ip in network:
+                return label
+        return None
+
+    def close(self):
+        self._resolver.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,93 @@
+from urllib.parse import urlparse
+
+# Resource types the scrapers never read (they only use text and href attributes)
+DEFAULT_BLOCKED_TYPES = ('image', 'media', 'font')
+
+# Third-party analytics, ads and chat widgets
+DEFAULT_BLOCKED_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'facebook.net', 'connect.facebook.com', 'segment.io', 'segment.com', 'hotjar.com',
+    'mixpanel.com', 'amplitude.com', 'intercom.io', 'intercomcdn.com', 'sentry.io',
+    'clarity.ms', 'fullstory.com', 'hubspot.com', 'hs-analytics.net', 'ads-twitter.com'
+)
+
+# Aborted requests never transfer anything, so bytes saved are estimated from
+# typical transfer sizes per resource type
+ESTIMATED_BYTES = {
+    'image': 40 * 1024,
+    'media': 500 * 1024,
+    'font': 30 * 1024,
+    'script': 60 * 1024,
+    'stylesheet': 20 * 1024,
+}
+DEFAULT_ESTIMATED_BYTES = 5 * 1024
+
+class ResourcePolicy:
+    """
+    Aborts requests a scraping context does not need, by resource type and
+    by domain blocklist, through Playwright request routing. Keeps counters
+    of what was blocked.
+    """
+    def __init__(self, name, block_types=DEFAULT_BLOCKED_TYPES, block_domains=DEFAULT_BLOCKED_DOMAINS):
+        self.name = name
+        self.block_types = set(block_types)
+        self.block_domains = tuple(d.lower().lstrip('.') for d in block_domains)
+        self.reset()
+
+    @classmethod
+    def from_config(cls, name, types_value=None, domains_value=None):
+        """Build a policy from comma-separated settings (None keeps the defaults, '' blocks nothing)"""
+        block_types = DEFAULT_BLOCKED_TYPES if types_value is None else [t.strip() for t in types_value.split(',') if t.strip()]
+        block_domains = DEFAULT_BLOCKED_DOMAINS if domains_value is None else [d.strip() for d in domains_value.split(',') if d.strip()]
+        return cls(name, block_types, block_domains)
+
+    def reset(self):
+        self.requests_blocked = 0
+        self.requests_allowed = 0
+        self.bytes_blocked = 0  # Estimated
+        self.blocked_by_type = {}
+
+    def _blocked_domain(self, url):
+        host = (urlparse(url).hostname or '').lower()
+        return any(host == d or host.endswith('.' + d) for d in self.block_domains)
+
+    def should_block(self, resource_type, url):
+        return resource_type in self.block_types or self._blocked_domain(url)
+
+    def attach(self, context):
+        """Install the policy on a browser context"""
+        context.route("**/*", self._handle_route)
+
+    async def attach_async(self, context):
+        """Install the policy on a playwright.async_api browser context"""
+        await context.route("**/*", self._handle_route_async)
+
+    def _record(self, request):
+        """Count the request and return True if it should be aborted"""
+        resource_type = request.resource_type
+        # Never block the document itself, even on a blocklisted domain
+        if resource_type != 'document' and self.should_block(resource_type, request.url):
+            self.requests_blocked += 1
+            self.bytes_blocked += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            return True
+        self.requests_allowed += 1
+        return False
+
+    def _handle_route(self, route):
+        if self._record(route.request):
+            route.abort()
+        else:
+            route.fallback()
+
+    async def _handle_route_async(self, route):
+        if self._record(route.request):
+            await route.abort()
+        else:
+            await route.fallback()
+
+    def summary(self):
+        return (
+            f"{self.name}: blocked {self.requests_blocked} requests "
+            f"(~{self.bytes_blocked / (1024 * 1024):.1f} MB), allowed {self.requests_allowed}"
+        )
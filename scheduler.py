@@ -0,0 +1,141 @@
+import time
+import threading
+
+class BotState:
+    """Counters and the pause flag, shared by the cycle thread, Flask and the command handlers"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paused = False
+        self.total_cycles = 0
+        self.total_leads_found = 0
+        self.last_cycle_time = None
+
+    def snapshot(self):
+        """Consistent copy of the state for status messages"""
+        with self._lock:
+            return {
+                "paused": self.paused,
+                "total_cycles": self.total_cycles,
+                "total_leads_found": self.total_leads_found,
+                "last_cycle_time": self.last_cycle_time,
+            }
+
+    def begin_cycle(self):
+        """Count a new cycle and return its number"""
+        with self._lock:
+            self.total_cycles += 1
+            self.last_cycle_time = time.strftime('%H:%M:%S')
+            return self.total_cycles
+
+    def add_leads(self, count):
+        """Add target leads and return the running total"""
+        with self._lock:
+            self.total_leads_found += count
+            return self.total_leads_found
+
+    def set_paused(self, paused):
+        with self._lock:
+            self.paused = paused
+
+class Job:
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = time.monotonic()
+        self.forced = False
+        self.running = threading.Lock()  # Held while the job runs, so runs never overlap
+
+class Scheduler:
+    """
+    Runs each registered source on its own interval from a single thread.
+    The loop sleeps on a condition variable until the next job is due, so a
+    force-run, pause/resume or stop request wakes it immediately instead of
+    being noticed on the next poll.
+    """
+    def __init__(self, state):
+        self.state = state
+        self.jobs = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+
+    def add_job(self, name, interval, func, run_immediately=True):
+        with self._cond:
+            job = Job(name, interval, func)
+            if not run_immediately:
+                job.next_run += interval
+            self.jobs[name] = job
+            self._cond.notify_all()
+        return job
+
+    def request_run(self, name=None):
+        """Run a job (or every job) as soon as possible. Returns False if it's already running."""
+        with self._cond:
+            jobs = [self.jobs[name]] if name else list(self.jobs.values())
+            if any(job.running.locked() for job in jobs):
+                return False
+            for job in jobs:
+                job.forced = True
+            self._cond.notify_all()
+        return True
+
+    def is_running(self, name):
+        return self.jobs[name].running.locked()
+
+    def toggle_pause(self):
+        """Flip the pause flag and return the new value"""
+        with self._cond:
+            paused = not self.state.paused
+            self.state.set_paused(paused)
+            self._cond.notify_all()
+        return paused
+
+    def seconds_until(self, name):
+        with self._cond:
+            return max(0.0, self.jobs[name].next_run - time.monotonic())
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def run_job(self, name):
+        """Run one job now in the calling thread, unless it is already running. Returns True if it ran."""
+        job = self.jobs[name]
+        if not job.running.acquire(blocking=False):
+            print(f"{name} is already running, skipping.", flush=True)
+            return False
+        try:
+            job.func()
+        except Exception as e:
+            print(f"Scheduled job {name} failed: {e}", flush=True)
+        finally:
+            with self._cond:
+                job.forced = False
+                job.next_run = time.monotonic() + job.interval
+            job.running.release()
+        return True
+
+    def _next_due(self):
+        """Wait until a job is due and return it, or None once stopping"""
+        with self._cond:
+            while not self._stopping:
+                now = time.monotonic()
+                timeout = None
+                if not self.state.paused:
+                    for job in self.jobs.values():
+                        if job.forced or job.next_run <= now:
+                            return job
+                    if self.jobs:
+                        timeout = min(job.next_run for job in self.jobs.values()) - now
+                self._cond.wait(timeout)
+            return None
+
+    def run_forever(self):
+        """Run due jobs until stop() is called"""
+        while True:
+            job = self._next_due()
+            if job is None:
+                return
+            self.run_job(job.name)
+            print(f"Next {job.name} run in {self.seconds_until(job.name) / 3600:.1f} hours.", flush=True)
@@ -1,16 +1,15 @@
-import requests
-import threading
-import time
+from http_transport import get_session, DEFAULT_TIMEOUT, timeout
 
 class TelegramBot:
-    def __init__(self, token, chat_id):
+    def __init__(self, token, chat_id, dispatcher=None):
         self.token = token
+        self.dispatcher = dispatcher  # Optional TelegramDispatcher for non-blocking sends
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{self.token}"
         self.last_update_id = 0
         
-    def send_message(self, text, buttons=None):
-        """Send a message with optional inline buttons"""
+    def send_message(self, text, buttons=None, urgent=False):
+        """Send a message with optional inline buttons; urgent ones skip ahead of queued leads"""
         url = f"{self.base_url}/sendMessage"
         payload = {
             "chat_id": self.chat_id,
@@ -21,15 +20,19 @@ class TelegramBot:
         if buttons:
             keyboard = {"inline_keyboard": buttons}
             payload["reply_markup"] = keyboard
+        
+        if self.dispatcher:
+            self.dispatcher.submit("sendMessage", payload, urgent=urgent)
+            return None
             
         try:
-            response = requests.post(url, json=payload)
+            response = get_session().post(url, json=payload, timeout=DEFAULT_TIMEOUT)
             return response.json()
         except Exception as e:
             print(f"Error sending message: {e}")
             return None
     
-    def send_status_with_buttons(self, status_text):
+    def send_status_with_buttons(self, status_text, urgent=False):
         """Send status message with control buttons"""
         buttons = [
             [
@@ -41,23 +44,64 @@ class TelegramBot:
                 {"text": "⏸️ Pause Bot", "callback_data": "pause_bot"}
             ]
         ]
-        self.send_message(status_text, buttons)
+        self.send_message(status_text, buttons, urgent=urgent)
     
     def get_updates(self):
-        """Get pending updates from Telegram"""
+        """Get pending updates from Telegram, or None if the call failed (e.g. 409 while a webhook is set)"""
         url = f"{self.base_url}/getUpdates"
         params = {"offset": self.last_update_id + 1, "timeout": 30}
         
         try:
-            response = requests.get(url, params=params, timeout=35)
+            # Read budget must outlast Telegram's 30s long-poll hold
+            response = get_session().get(url, params=params, timeout=timeout(read=35))
             data = response.json()
             
             if data.get("ok"):
                 return data.get("result", [])
+            print(f"Error getting updates: {data.get('error_code')} {data.get('description')}")
         except Exception as e:
             print(f"Error getting updates: {e}")
         
-        return []
+        return None
+    
+    def set_webhook(self, url, secret_token=None):
+        """Have Telegram push updates to url instead of waiting for getUpdates"""
+        payload = {"url": url, "allowed_updates": ["callback_query", "message"]}
+        if secret_token:
+            payload["secret_token"] = secret_token
+        try:
+            data = get_session().post(f"{self.base_url}/setWebhook", json=payload, timeout=DEFAULT_TIMEOUT).json()
+            if not data.get("ok"):
+                print(f"Error setting webhook: {data.get('description')}")
+            return bool(data.get("ok"))
+        except Exception as e:
+            print(f"Error setting webhook: {e}")
+            return False
+    
+    def delete_webhook(self):
+        """Remove any webhook; getUpdates is refused while one is set"""
+        try:
+            data = get_session().post(f"{self.base_url}/deleteWebhook", timeout=DEFAULT_TIMEOUT).json()
+            return bool(data.get("ok"))
+        except Exception as e:
+            print(f"Error deleting webhook: {e}")
+            return False
+    
+    def answer_callback(self, callback_id):
+        """Acknowledge a button press so Telegram stops the loading spinner"""
+        payload = {"callback_query_id": callback_id}
+        if self.dispatcher:
+            # The user is watching a spinner; don't wait behind queued leads
+            self.dispatcher.submit("answerCallbackQuery", payload, urgent=True)
+            return
+        try:
+            get_session().post(
+                f"{self.base_url}/answerCallbackQuery",
+                json=payload,
+                timeout=DEFAULT_TIMEOUT
+            )
+        except Exception as e:
+            print(f"Error answering callback: {e}")
     
     def process_callback(self, callback_data):
         """Process button clicks"""
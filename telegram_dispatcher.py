@@ -0,0 +1,177 @@
+import time
+import queue
+import itertools
+import threading
+from http_transport import get_session, DEFAULT_TIMEOUT
+from metrics import STAGE_SECONDS, TELEGRAM_REQUESTS
+
+# Outcomes passed to on_done callbacks
+SENT = "sent"  # Telegram accepted the call
+REJECTED = "rejected"  # Telegram refused it for good (e.g. unparseable Markdown); retrying won't help
+UNDELIVERED = "undelivered"  # Retries ran out or the queue was full; it may go through later
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class TelegramDispatcher:
+    """
+    Background sender for Telegram Bot API calls. Callers enqueue and return
+    immediately; one worker thread sends in order, paced by token buckets
+    matching Telegram's limits (about 1 message/second per chat, 20/minute in
+    groups, 30/second overall). HTTP 429 responses are retried after the
+    `retry_after` Telegram returns; network and 5xx errors are retried with
+    exponential backoff. A Markdown message Telegram can't parse is sent
+    once more as plain text. Urgent calls (button acknowledgements, replies
+    to commands) jump ahead of everything queued but still respect the
+    per-chat bucket. A call's on_done(outcome) callback runs on the worker
+    with SENT, REJECTED or UNDELIVERED; calls still queued when the
+    dispatcher stops never get one.
+    """
+    def __init__(self, token, per_chat_rate=20 / 60, per_chat_burst=3, global_rate=30, max_retries=5, max_queue=1000):
+        self.base_url = f"https://api.telegram.org/bot{token}"
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_buckets = {}
+        self.max_retries = max_retries
+        self.queue = queue.PriorityQueue(maxsize=max_queue)
+        self._order = itertools.count()  # Keeps calls of the same priority in FIFO order
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, method, payload, on_done=None, urgent=False):
+        """Queue a Bot API call (e.g. "sendMessage") without waiting for it"""
+        self.start()
+        try:
+            self.queue.put_nowait((0 if urgent else 1, next(self._order), method, payload, on_done))
+        except queue.Full:
+            self.failed += 1
+            print("Telegram queue full, dropping message.", flush=True)
+            self._done(on_done, UNDELIVERED)
+
+    def flush(self, timeout=30):
+        """Wait until everything queued so far has been sent (or given up). Returns True if drained."""
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=30):
+        """Drain the queue within timeout, then stop the worker"""
+        drained = self.flush(timeout)
+        self._stopping.set()
+        return drained
+
+    def _bucket_for(self, chat_id):
+        if chat_id not in self.chat_buckets:
+            self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+        return self.chat_buckets[chat_id]
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                _, _, method, payload, on_done = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            outcome = UNDELIVERED
+            try:
+                if method == "sendMessage":
+                    self._bucket_for(payload.get("chat_id")).acquire()
+                self.global_bucket.acquire()
+                with STAGE_SECONDS.time(stage="telegram_send"):
+                    outcome = self._send(method, payload)
+            except Exception as e:
+                self.failed += 1
+                print(f"Error sending Telegram {method}: {e}", flush=True)
+            finally:
+                self._done(on_done, outcome)
+                self.queue.task_done()
+
+    def _done(self, on_done, outcome):
+        if on_done is None:
+            return
+        try:
+            on_done(outcome)
+        except Exception as e:
+            print(f"Error in Telegram delivery callback: {e}", flush=True)
+
+    def _send(self, method, payload):
+        """Make the call with retries; returns SENT, REJECTED or UNDELIVERED"""
+        backoff = 1.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = get_session().post(f"{self.base_url}/{method}", json=payload, timeout=DEFAULT_TIMEOUT)
+            except Exception as e:
+                print(f"Telegram {method} failed ({e}), retrying in {backoff:.0f}s", flush=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+
+            if response.status_code == 200:
+                self.sent += 1
+                TELEGRAM_REQUESTS.inc(method=method, result="sent")
+                return SENT
+            if response.status_code == 429:
+                self.rate_limited += 1
+                TELEGRAM_REQUESTS.inc(method=method, result="rate_limited")
+                try:
+                    retry_after = response.json().get("parameters", {}).get("retry_after", backoff)
+                except ValueError:
+                    retry_after = backoff
+                print(f"Telegram rate limit hit, waiting {retry_after}s", flush=True)
+                time.sleep(retry_after)
+                continue
+            if response.status_code >= 500:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+
+            if response.status_code == 400 and payload.get("parse_mode") and "parse" in response.text:
+                # Markdown broken by the text itself (e.g. an underscore in a product name)
+                print(f"Telegram couldn't parse the message, sending it as plain text: {response.text}", flush=True)
+                payload = {key: value for key, value in payload.items() if key != "parse_mode"}
+                continue
+
+            # Other 4xx errors (chat not found, text too long) won't succeed on retry
+            self.failed += 1
+            TELEGRAM_REQUESTS.inc(method=method, result="rejected")
+            print(f"Telegram rejected the message: {response.text}", flush=True)
+            return REJECTED
+
+        self.failed += 1
+        TELEGRAM_REQUESTS.inc(method=method, result="failed")
+        print(f"Giving up on Telegram {method} after {self.max_retries + 1} attempts.", flush=True)
+        return UNDELIVERED
@@ -1,19 +1,53 @@
-import requests
+from http_transport import get_session, DEFAULT_TIMEOUT
+from telegram_dispatcher import SENT, REJECTED, UNDELIVERED
 
 class TelegramNotifier:
-    def __init__(self, token, chat_id):
+    def __init__(self, token, chat_id, dispatcher=None):
         self.token = token
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        self.dispatcher = dispatcher  # Optional TelegramDispatcher; sends become non-blocking
 
-    def send_lead(self, lead_data):
+    def send_message(self, text, on_sent=None):
         """
-        Formats and sends a lead to Telegram.
+        Sends a Markdown message to the configured chat. With a dispatcher
+        the message is queued and this returns immediately. on_sent(outcome)
+        is called with SENT, REJECTED (Telegram refused it for good) or
+        UNDELIVERED (it may go through on a later try).
         """
         if not self.token or not self.chat_id:
             print("Telegram token or chat ID missing. Skipping notification.")
+            if on_sent:
+                on_sent(UNDELIVERED)
             return
 
+        payload = {
+            "chat_id": self.chat_id,
+            "text": text,
+            "parse_mode": "Markdown"
+        }
+        if self.dispatcher:
+            self.dispatcher.submit("sendMessage", payload, on_done=on_sent)
+            return
+
+        outcome = UNDELIVERED
+        try:
+            response = get_session().post(self.base_url, json=payload, timeout=DEFAULT_TIMEOUT)
+            if response.status_code == 200:
+                outcome = SENT
+            else:
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    outcome = REJECTED
+                print(f"Failed to send Telegram message: {response.text}")
+        except Exception as e:
+            print(f"Error sending Telegram message: {e}")
+        if on_sent:
+            on_sent(outcome)
+
+    def send_lead(self, lead_data):
+        """
+        Formats and sends a lead to Telegram.
+        """
         message = (
             f"🚀 **New Lead Found!**\n\n"
             f"👤 **Name:** {lead_data.get('name', 'N/A')}\n"
@@ -24,18 +58,7 @@ class TelegramNotifier:
             f"🔗 **Website:** {lead_data.get('website', 'N/A')}\n"
             f"📝 **Notes:** {lead_data.get('website_notes', '')}\n"
         )
-
-        try:
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": "Markdown"
-            }
-            response = requests.post(self.base_url, json=payload)
-            if response.status_code != 200:
-                print(f"Failed to send Telegram message: {response.text}")
-        except Exception as e:
-            print(f"Error sending Telegram message: {e}")
+        self.send_message(message)
 
 if __name__ == "__main__":
     # Test
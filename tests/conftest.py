@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,104 @@
+from browser_manager import BrowserManager, visit_batch
+
+class FakeTab:
+    """Tab that logs navigation and waits into a shared event list"""
+    def __init__(self, events, ready=True):
+        self.events = events
+        self.ready = ready
+        self.url = None
+    def goto(self, url, wait_until=None):
+        self.events.append(("goto", url, wait_until))
+        self.url = url
+    def wait_for_load_state(self, state, timeout=None):
+        if state == "domcontentloaded":
+            self.events.append(("loaded", self.url))
+    def wait_for_selector(self, selector, timeout=None):
+        if not self.ready:
+            raise TimeoutError(selector)
+
+URLS = ["https://a.example/", "https://b.example/", "https://c.example/"]
+
+def test_every_tab_starts_navigating_before_any_is_waited_on():
+    events = []
+    tabs = [FakeTab(events) for _ in URLS]
+    results = visit_batch(tabs, URLS, lambda page, url: url.upper(), ready_selector="h1", network_quiet=0)
+    assert results == [url.upper() for url in URLS]
+    assert [kind for kind, *_ in events] == ["goto"] * 3 + ["loaded"] * 3
+    assert all(wait_until == "commit" for kind, _, wait_until in events[:3])
+
+def test_tabs_that_never_get_ready_or_fail_to_extract_are_none():
+    events = []
+    tabs = [FakeTab(events), FakeTab(events, ready=False), FakeTab(events)]
+    def extract(page, url):
+        if url == URLS[2]:
+            raise ValueError("script error")
+        return url
+    assert visit_batch(tabs, URLS, extract, ready_selector="h1", network_quiet=0) == [URLS[0], None, None]
+
+class FakeContext:
+    def __init__(self, options):
+        self.options = options
+        self.tabs = []
+        self.closed = False
+    def new_page(self):
+        self.tabs.append(object())
+        return self.tabs[-1]
+    def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+    def is_connected(self):
+        return self.connected
+    def new_context(self, **options):
+        self.contexts.append(FakeContext(options))
+        return self.contexts[-1]
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers = []
+    def launch(self, headless=True):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+class RecordingPolicy:
+    def __init__(self):
+        self.attached = []
+    def attach(self, context):
+        self.attached.append(context)
+
+def fake_manager():
+    manager = BrowserManager()
+    manager.playwright = FakePlaywright()
+    return manager
+
+def test_pages_reuses_tabs_and_opens_more_as_needed():
+    manager = fake_manager()
+    policy = RecordingPolicy()
+    first = manager.pages("producthunt", resource_policy=policy, user_agent="UA")
+    more = manager.pages("producthunt", 3, resource_policy=policy, user_agent="UA")
+    assert more[0] is first[0] and len(more) == 3
+    [context] = manager.playwright.chromium.browsers[0].contexts
+    assert context.options["user_agent"] == "UA"
+    assert policy.attached == [context]
+
+def test_pages_reopens_the_context_after_a_relaunch():
+    manager = fake_manager()
+    before = manager.pages("crunchbase")
+    manager.browser.connected = False
+    after = manager.pages("crunchbase")
+    assert after[0] is not before[0]
+    assert len(manager.playwright.chromium.browsers) == 2
+
+def test_closed_context_gets_fresh_tabs():
+    manager = fake_manager()
+    before = manager.pages("renderer", 2)
+    manager.close_context("renderer")
+    assert manager.playwright.chromium.browsers[0].contexts[0].closed
+    assert manager.pages("renderer")[0] not in before
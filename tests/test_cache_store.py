@@ -0,0 +1,48 @@
+import cache_store
+from cache_store import PersistentCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+    def time(self):
+        return self.now
+
+def clocked(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_store.time, "time", clock.time)
+    return clock
+
+def test_values_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache.db")
+    PersistentCache(path).put("https://acme.io", {"status": "Bad"})
+    assert PersistentCache(path).get("https://acme.io") == {"status": "Bad"}
+
+def test_ttl_is_per_read_and_stale_reads_count_as_misses(monkeypatch, tmp_path):
+    clock = clocked(monkeypatch)
+    cache = PersistentCache(str(tmp_path / "cache.db"))
+    cache.put("key", 1)
+    clock.now += 60
+    assert cache.get("key", ttl=120) == 1
+    assert cache.get("key", ttl=30) is None
+    assert cache.get_entry("key").age == 60  # Stale entries stay readable for revalidation
+    assert cache.stats() == {"hits": 2, "misses": 1}
+
+def test_entries_past_max_age_are_gone(monkeypatch, tmp_path):
+    clock = clocked(monkeypatch)
+    cache = PersistentCache(str(tmp_path / "cache.db"), max_age=100)
+    cache.put("key", 1)
+    clock.now += 101
+    assert cache.get_entry("key") is None
+    cache.evict()
+    assert cache.keys_older_than(0) == []
+
+def test_least_recently_used_entries_are_evicted(monkeypatch, tmp_path):
+    clock = clocked(monkeypatch)
+    cache = PersistentCache(str(tmp_path / "cache.db"), max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+        clock.now += 1
+    cache.get("a")  # Touch a, so b is now the least recently used
+    cache.evict()
+    assert cache.get("a") == "a" and cache.get("c") == "c"
+    assert cache.get("b") is None
@@ -0,0 +1,46 @@
+import time
+import checkpoint as checkpoint_module
+from checkpoint import CycleCheckpoint
+
+LAUNCHES = [{"url": "https://www.producthunt.com/posts/acme", "name": "Acme"},
+            {"url": "https://www.producthunt.com/posts/bolt", "name": "Bolt"}]
+ACME_URL = LAUNCHES[0]["url"]
+
+def test_unfinished_cycle_resumes_after_a_restart(tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    checkpoint = CycleCheckpoint(path)
+    checkpoint.begin(LAUNCHES)
+    checkpoint.save(ACME_URL, "scraped", {"name": "Acme", "website": "https://acme.io"})
+    checkpoint.close()
+
+    restarted = CycleCheckpoint(path)
+    assert restarted.resume(max_age=3600) == LAUNCHES
+    assert restarted.scraped_lead(ACME_URL) == {"name": "Acme", "website": "https://acme.io"}
+    assert restarted.scraped_lead(LAUNCHES[1]["url"]) is None
+
+def test_done_keeps_the_scraped_lead(tmp_path):
+    checkpoint = CycleCheckpoint(str(tmp_path / "checkpoint.db"))
+    checkpoint.begin(LAUNCHES)
+    checkpoint.save(ACME_URL, "scraped", {"name": "Acme"})
+    checkpoint.save(ACME_URL, "done")
+    assert checkpoint.stages() == {"done": 1}
+    assert checkpoint.scraped_lead(ACME_URL) == {"name": "Acme"}
+
+def test_finished_or_old_cycles_do_not_resume(tmp_path, monkeypatch):
+    checkpoint = CycleCheckpoint(str(tmp_path / "checkpoint.db"))
+    checkpoint.begin(LAUNCHES)
+    now = time.time()
+    monkeypatch.setattr(checkpoint_module.time, "time", lambda: now + 7200)
+    assert checkpoint.resume(max_age=3600) is None
+    monkeypatch.undo()
+    checkpoint.finish()
+    assert checkpoint.resume(max_age=3600) is None
+    assert checkpoint.stages() == {}
+
+def test_begin_discards_previous_progress(tmp_path):
+    checkpoint = CycleCheckpoint(str(tmp_path / "checkpoint.db"))
+    checkpoint.begin(LAUNCHES)
+    checkpoint.save(ACME_URL, "done")
+    checkpoint.begin(LAUNCHES[1:])
+    assert checkpoint.resume(max_age=3600) == LAUNCHES[1:]
+    assert checkpoint.stages() == {}
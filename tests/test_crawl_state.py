@@ -0,0 +1,28 @@
+import time
+from crawl_state import CrawlState
+
+ACME = {"url": "https://www.producthunt.com/posts/acme", "name": "Acme", "tagline": "Plan your work"}
+BOLT = {"url": "https://www.producthunt.com/posts/bolt", "name": "Bolt", "tagline": "Ship faster"}
+
+def test_processed_launches_are_skipped(tmp_path):
+    state = CrawlState(str(tmp_path / "crawl.db"))
+    state.mark_processed(ACME)
+    assert state.filter_new([ACME, BOLT]) == [BOLT]
+    assert CrawlState(str(tmp_path / "crawl.db")).filter_new([ACME]) == []
+
+def test_edited_listing_is_processed_again(tmp_path):
+    state = CrawlState(str(tmp_path / "crawl.db"))
+    state.mark_processed(ACME)
+    edited = {**ACME, "tagline": "Plan and track your work"}
+    assert state.filter_new([edited]) == [edited]
+
+def test_fingerprint_ignores_case_and_surrounding_space():
+    assert CrawlState.fingerprint(ACME) == CrawlState.fingerprint({**ACME, "name": " ACME ", "tagline": "plan your work"})
+    assert CrawlState.fingerprint(ACME) != CrawlState.fingerprint(BOLT)
+
+def test_forgotten_launches_are_new_again(tmp_path):
+    state = CrawlState(str(tmp_path / "crawl.db"))
+    state.mark_processed(ACME)
+    time.sleep(0.01)
+    state.forget_older_than(0)
+    assert state.filter_new([ACME]) == [ACME]
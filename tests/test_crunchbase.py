@@ -0,0 +1,71 @@
+import pytest
+
+from crunchbase_bot import SearchNotLoaded, parse_search, parse_company, normalize_company_name
+
+SEARCH_URL = "https://www.crunchbase.com/textsearch?q=Acme"
+
+def test_search_hit():
+    assert parse_search({'href': "/organization/acme"}, SEARCH_URL) == "https://www.crunchbase.com/organization/acme"
+
+def test_search_loaded_without_hits_is_not_found():
+    assert parse_search({'href': None}, SEARCH_URL) is None
+
+def test_search_page_that_never_loaded_raises():
+    # Bot checks and login walls must not be cached as "not on Crunchbase"
+    with pytest.raises(SearchNotLoaded):
+        parse_search(None, SEARCH_URL)
+
+def test_parse_company_reads_page_text():
+    details = parse_company({
+        'body': "Acme raised $1.5M. 11-50 Employees. Founded 2019.",
+        'location': "Berlin, Germany",
+        'description': "Planning tools",
+        'hrefs': ["https://www.linkedin.com/company/acme"]
+    }, "https://www.crunchbase.com/organization/acme")
+    assert details['funding'] == "$1.5M"
+    assert details['employees'] == "11-50"
+    assert details['founded'] == "2019"
+    assert details['location'] == "Berlin, Germany"
+
+def test_normalize_company_name_drops_suffixes():
+    assert normalize_company_name("Acme, Inc.") == normalize_company_name("acme")
+
+class StuckPage:
+    """Search finds the company, but its page never shows a heading"""
+    url = "https://www.crunchbase.com/challenge"
+    def goto(self, url, **kwargs):
+        pass
+    def evaluate(self, script, *args):
+        if args:
+            return {'href': "/organization/acme"}
+        raise AssertionError("extracted a page that never loaded")
+    def wait_for_selector(self, selector, timeout=None):
+        raise TimeoutError(f"{selector} never appeared")
+    def wait_for_load_state(self, state, timeout=None):
+        pass
+
+def test_company_page_that_never_loaded_is_not_cached(tmp_path):
+    from cache_store import PersistentCache
+    from crunchbase_bot import CrunchbaseBot
+    from pacing import PacingScheduler
+    bot = CrunchbaseBot(cache=PersistentCache(str(tmp_path / "crunchbase.db")), pacer=PacingScheduler(min_interval=0))
+    bot._page = StuckPage
+    assert bot.enrich("Acme") is None
+    assert bot.cached("Acme") == (False, None)
+
+def test_refresh_stale_takes_a_bounded_batch_and_drops_failures(tmp_path):
+    from cache_store import PersistentCache
+    from crunchbase_bot import CrunchbaseBot
+    bot = CrunchbaseBot(cache=PersistentCache(str(tmp_path / "crunchbase.db")))
+    bot.stale_names = {normalize_company_name(name): name for name in ("Acme", "Broken", "Inkwell")}
+    looked_up = []
+    def lookup(name):
+        looked_up.append(name)
+        if name == "Broken":
+            raise SearchNotLoaded(name)
+        return {'name': name}
+    bot._lookup = lookup
+    assert bot.refresh_stale(limit=2) == 1
+    assert looked_up == ["Acme", "Broken"]
+    assert list(bot.stale_names.values()) == ["Inkwell"]
+    assert bot.cached("Acme") == (True, {'name': "Acme"})
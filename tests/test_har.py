@@ -0,0 +1,100 @@
+import json
+import datetime
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from conftest import FIXTURES
+from har import HarRecorder, HarReplayAdapter
+
+FIXTURE_HAR = f"{FIXTURES}/har/http.har"
+
+def replay_session(path=FIXTURE_HAR, fallback=None):
+    session = requests.Session()
+    adapter = HarReplayAdapter(path, fallback=fallback)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def test_replays_recorded_page():
+    response = replay_session().get("https://acme.test/")
+    assert response.status_code == 200
+    assert response.text == "<html><title>Acme</title><p>Café launch</p></html>"
+    # The body is stored decoded, so its original encoding headers no longer apply
+    assert "Content-Encoding" not in response.headers and "Content-Length" not in response.headers
+
+def test_repeated_requests_get_recorded_responses_in_order_then_the_last():
+    session = replay_session()
+    assert [session.get("https://acme.test/status").text for _ in range(3)] == ["first", "second", "second"]
+
+def test_status_and_binary_bodies():
+    session = replay_session()
+    assert session.get("https://acme.test/missing").status_code == 404
+    assert session.get("https://acme.test/logo.png").content == b"\x89PNG\r\n\x1a\n\x00\x01"
+
+def test_miss_raises_connection_error():
+    with pytest.raises(requests.ConnectionError):
+        replay_session().get("https://acme.test/not-recorded")
+
+class Network(BaseAdapter):
+    """Stands in for the real transport and records anything that reaches it"""
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+    def send(self, request, **kwargs):
+        self.sent.append(request.url)
+        raise requests.ConnectionError("offline")
+    def close(self):
+        pass
+
+def test_replay_answers_telegram_locally(monkeypatch):
+    import har
+    import telegram_dispatcher
+    monkeypatch.setattr(har, "HAR_MODE", "replay")
+    monkeypatch.setattr(har, "HAR_DIR", f"{FIXTURES}/har")
+    monkeypatch.setattr(har, "HAR_NOT_FOUND", "fallback")
+    network = Network()
+    session = requests.Session()
+    session.mount("https://", network)
+    har.install(session, network)
+    monkeypatch.setattr(telegram_dispatcher, "get_session", lambda: session)
+
+    dispatcher = telegram_dispatcher.TelegramDispatcher("token")
+    assert dispatcher._send("sendMessage", {"chat_id": 1, "text": "lead"}) == telegram_dispatcher.SENT
+    assert session.get("https://api.telegram.org/botX/getUpdates").json() == {"ok": True, "result": []}
+    assert session.get("https://acme.test/").status_code == 200
+    assert network.sent == []
+
+def recorded_response(url, body):
+    response = requests.Response()
+    response.request = requests.Request("GET", url).prepare()
+    response.url = url
+    response.status_code = 200
+    response.reason = "OK"
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    response.encoding = "utf-8"
+    response._content = body.encode("utf-8")
+    response.elapsed = datetime.timedelta(milliseconds=20)
+    return response
+
+def test_recording_replays_and_each_save_starts_a_fresh_archive(tmp_path):
+    path = str(tmp_path / "http.har")
+    recorder = HarRecorder(path)
+    recorder.hook(recorded_response("https://acme.test/", "cycle one"))
+    recorder.hook(recorded_response("https://api.telegram.org/botX/sendMessage", "secret"))
+    recorder.save()
+    assert recorder.entries == []
+    assert replay_session(path).get("https://acme.test/").text == "cycle one"
+
+    recorder.hook(recorded_response("https://acme.test/next", "cycle two"))
+    recorder.save()
+    with open(path, encoding="utf-8") as f:
+        urls = [entry["request"]["url"] for entry in json.load(f)["log"]["entries"]]
+    assert urls == ["https://acme.test/next"]
+
+def test_saving_nothing_keeps_the_last_archive(tmp_path):
+    path = str(tmp_path / "http.har")
+    recorder = HarRecorder(path)
+    recorder.hook(recorded_response("https://acme.test/", "kept"))
+    recorder.save()
+    recorder.save()
+    assert replay_session(path).get("https://acme.test/").text == "kept"
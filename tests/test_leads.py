@@ -0,0 +1,11 @@
+from leads import lead_settled
+from telegram_dispatcher import SENT, REJECTED, UNDELIVERED
+
+def test_sent_and_rejected_leads_are_settled():
+    lead = {"name": "Acme"}
+    assert lead_settled(lead, SENT)
+    # Sending it again every cycle wouldn't help
+    assert lead_settled(lead, REJECTED)
+
+def test_undelivered_leads_are_sent_again():
+    assert not lead_settled({"name": "Acme"}, UNDELIVERED)
@@ -0,0 +1,34 @@
+from link_classifier import classify_link, classify_links, host_matches
+
+def test_host_matches_whole_labels_only():
+    assert host_matches("x.com", "x.com")
+    assert host_matches("mobile.x.com", "x.com")
+    assert not host_matches("box.com", "x.com")
+
+def test_social_links():
+    assert classify_link("https://x.com/acme") == ("twitter", "https://x.com/acme")
+    assert classify_link("https://www.linkedin.com/company/acme") == ("linkedin", "https://www.linkedin.com/company/acme")
+    assert classify_link("//fb.me/acme") == ("facebook", "//fb.me/acme")
+    assert classify_link("https://instagr.am/acme") == ("instagram", "https://instagr.am/acme")
+
+def test_email_and_phone():
+    assert classify_link("mailto:hi@acme.io?subject=Hello") == ("email", "hi@acme.io")
+    assert classify_link("MAILTO:") == (None, None)
+    assert classify_link(" tel:+1 555 0100 ") == ("phone", "+1 555 0100")
+
+def test_relative_in_page_and_ignored_links():
+    assert classify_link("/about") == (None, None)
+    assert classify_link("#top") == (None, None)
+    assert classify_link("") == (None, None)
+    assert classify_link("https://www.producthunt.com/posts/acme", ignore_hosts=("producthunt.com",)) == (None, None)
+
+def test_other_hosts_are_websites():
+    assert classify_link("https://dropbox.com/acme") == ("website", "https://dropbox.com/acme")
+
+def test_classify_links_groups_in_page_order():
+    hrefs = ["https://acme.io", "/pricing", "https://x.com/acme", "https://acme.dev", "mailto:a@acme.io"]
+    assert classify_links(hrefs) == {
+        "website": ["https://acme.io", "https://acme.dev"],
+        "twitter": ["https://x.com/acme"],
+        "email": ["a@acme.io"],
+    }
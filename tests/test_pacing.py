@@ -0,0 +1,31 @@
+from pacing import PacingScheduler
+
+def test_first_request_is_not_delayed():
+    slept = []
+    assert PacingScheduler(min_interval=5).wait("https://example.com/a", sleep=slept.append) == 0
+    assert slept == []
+
+def test_same_domain_waits_out_the_interval_through_the_given_sleep():
+    pacer = PacingScheduler(min_interval=5)
+    slept = []
+    pacer.wait("https://www.example.com/a", sleep=slept.append)
+    pacer.wait("https://example.com/b", sleep=slept.append)
+    assert len(slept) == 1 and 4.9 < slept[0] <= 5
+    assert pacer.report()['requests'] == 2
+
+def test_domains_are_paced_independently():
+    pacer = PacingScheduler(min_interval=5, intervals={'slow.com': 10})
+    slept = []
+    pacer.wait("https://fast.com/", sleep=slept.append)
+    pacer.wait("https://slow.com/", sleep=slept.append)
+    assert slept == []
+    assert pacer.interval_for('slow.com') == 10
+
+def test_browser_sleep_uses_wait_for_timeout():
+    class Page:
+        waited = None
+        def wait_for_timeout(self, ms):
+            self.waited = ms
+    page = Page()
+    PacingScheduler.browser_sleep(page)(1.5)
+    assert page.waited == 1500
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from cache_store import PersistentCache
+from pipeline import LeadPipeline
+from producthunt_bot import ProductHuntBot
+
+PRODUCT = {"name": "Acme", "url": "https://www.producthunt.com/posts/acme", "tagline": "Plan your work"}
+MAKER_URL = "https://www.producthunt.com/@jane"
+
+PRODUCT_DATA = {
+    "name": "Acme", "description": "Plan your work", "website": "https://acme.io",
+    "makers": [{"name": "Jane", "href": "/@jane"}], "hrefs": [],
+}
+
+def pipeline_with(tmp_path, pages):
+    """A pipeline whose browser loads answer from pages (url -> script result, None for a failed load)"""
+    bot = ProductHuntBot(maker_cache=PersistentCache(str(tmp_path / "makers.db")))
+    pipeline = LeadPipeline(analyzer=None, notify=None, ph_bot=bot)
+    async def load(context_attr, policy, url, selector, script, arg=None):
+        return pages[url]
+    pipeline._load = load
+    return pipeline, bot
+
+def scrape(pipeline):
+    return asyncio.run(pipeline._scrape((0, PRODUCT, None)))
+
+def test_maker_page_that_never_loaded_is_not_cached(tmp_path):
+    pipeline, bot = pipeline_with(tmp_path, {PRODUCT["url"]: PRODUCT_DATA, MAKER_URL: None})
+    _, _, lead = scrape(pipeline)
+    assert lead["website"] == "https://acme.io"
+    assert bot.maker_cache.get(MAKER_URL) is None
+
+def test_maker_page_that_loaded_is_cached(tmp_path):
+    hrefs = ["https://twitter.com/jane", "https://jane.dev"]
+    pipeline, bot = pipeline_with(tmp_path, {PRODUCT["url"]: PRODUCT_DATA, MAKER_URL: hrefs})
+    scrape(pipeline)
+    assert bot.maker_cache.get(MAKER_URL)["twitter"] == "https://twitter.com/jane"
+
+def test_product_page_that_never_loaded_fails_the_scrape(tmp_path):
+    pipeline, _ = pipeline_with(tmp_path, {PRODUCT["url"]: None})
+    with pytest.raises(RuntimeError, match="did not load"):
+        scrape(pipeline)
@@ -0,0 +1,60 @@
+from cache_store import PersistentCache
+from pacing import PacingScheduler
+from producthunt_bot import ProductHuntBot
+
+MAKER_URL = "https://www.producthunt.com/@jane"
+
+class FakePage:
+    """A tab whose pages either show their heading or never get past a wall"""
+    def __init__(self, ready, result=None):
+        self.ready = ready
+        self.result = result
+        self.url = None
+        self.evaluated = 0
+    def goto(self, url, **kwargs):
+        self.url = url if self.ready else "https://www.producthunt.com/login"
+    def wait_for_selector(self, selector, timeout=None):
+        if not self.ready:
+            raise TimeoutError(f"{selector} never appeared")
+    def wait_for_load_state(self, state, timeout=None):
+        pass
+    def evaluate(self, script, *args):
+        self.evaluated += 1
+        return self.result
+
+def browser_bot(tmp_path, page):
+    bot = ProductHuntBot(maker_cache=PersistentCache(str(tmp_path / "makers.db")), pacer=PacingScheduler(min_interval=0))
+    bot._pages = lambda count=1: [page] * count
+    return bot
+
+def test_product_page_behind_a_wall_is_a_failed_load(tmp_path):
+    page = FakePage(ready=False)
+    bot = browser_bot(tmp_path, page)
+    assert bot.get_product_details("https://www.producthunt.com/posts/acme") is None
+    assert page.evaluated == 0
+
+def test_maker_page_behind_a_wall_is_not_cached(tmp_path):
+    bot = browser_bot(tmp_path, FakePage(ready=False))
+    assert bot.get_maker_details(MAKER_URL) == {}
+    assert bot.maker_cache.get(MAKER_URL) is None
+
+def test_maker_page_that_loaded_is_cached(tmp_path):
+    bot = browser_bot(tmp_path, FakePage(ready=True, result=["https://twitter.com/jane"]))
+    assert bot.get_maker_details(MAKER_URL)["twitter"] == "https://twitter.com/jane"
+    assert bot.cached_maker(MAKER_URL)["twitter"] == "https://twitter.com/jane"
+
+def test_cached_maker_skips_the_page_and_counts_hits(tmp_path):
+    page = FakePage(ready=True, result=["https://twitter.com/jane"])
+    bot = browser_bot(tmp_path, page)
+    first = bot.get_maker_details(MAKER_URL)
+    assert bot.get_maker_details(MAKER_URL) == first
+    assert page.evaluated == 1
+    assert (bot.maker_cache_hits, bot.maker_cache_misses) == (1, 1)
+
+def test_maker_past_its_ttl_is_read_again(tmp_path):
+    page = FakePage(ready=True, result=["https://twitter.com/jane"])
+    bot = browser_bot(tmp_path, page)
+    bot.get_maker_details(MAKER_URL)
+    bot.maker_cache_ttl = -1
+    bot.get_maker_details(MAKER_URL)
+    assert page.evaluated == 2
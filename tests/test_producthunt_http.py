@@ -0,0 +1,57 @@
+from conftest import read_fixture
+from producthunt_http import launches_from_html, product_from_html, maker_from_html
+
+PRODUCT_URL = "https://www.producthunt.com/posts/acme-planner"
+MAKER_URL = "https://www.producthunt.com/@jane"
+
+def test_launches_in_page_order_skipping_cards_without_links():
+    launches = launches_from_html(read_fixture("producthunt", "homepage.html"))
+    assert [p['name'] for p in launches] == ["Acme Planner", "Inkwell"]
+    assert launches[0]['url'].endswith("/posts/acme-planner")
+    assert launches[0]['tagline'] == "Plan your week"
+
+def test_launches_none_without_cards():
+    assert launches_from_html(read_fixture("producthunt", "login.html")) is None
+
+def test_product_from_markup():
+    details = product_from_html(read_fixture("producthunt", "product.html"), PRODUCT_URL)
+    assert details['name'] == "Acme Planner"
+    assert details['website'] == "https://acmeplanner.io/?ref=producthunt"
+    assert details['twitter'] == "https://twitter.com/acmeplanner"
+    assert [m['profile_url'] for m in details['makers']] == [
+        "https://www.producthunt.com/@jane", "https://www.producthunt.com/@sam"
+    ]
+
+def test_product_from_embedded_state():
+    details = product_from_html(read_fixture("producthunt", "product_state.html"), PRODUCT_URL)
+    assert details['website'] == "https://acmeplanner.io"
+    assert details['description'] == "Plan your week"
+    assert details['makers'][0]['name'] == "Jane Doe"
+    assert details['makers'][0]['profile_url'] == "https://www.producthunt.com/@jane"
+
+def test_product_without_website_link_falls_back_to_browser():
+    # A client-rendered website button must not read as "no website"
+    assert product_from_html(read_fixture("producthunt", "product_no_website.html"), PRODUCT_URL) is None
+
+def test_product_none_for_non_product_pages():
+    assert product_from_html(read_fixture("producthunt", "login.html"), PRODUCT_URL) is None
+    assert product_from_html(read_fixture("producthunt", "challenge.html"), PRODUCT_URL) is None
+
+def test_maker_profile():
+    maker = maker_from_html(read_fixture("producthunt", "maker.html"), MAKER_URL)
+    assert maker == {
+        'twitter': "https://twitter.com/janedoe",
+        'linkedin': "https://www.linkedin.com/in/janedoe",
+        'website': "https://janedoe.dev",
+        'email': None
+    }
+
+def test_maker_from_embedded_user_state():
+    html = read_fixture("producthunt", "product_state.html")
+    assert maker_from_html(html, MAKER_URL) is not None
+    assert maker_from_html(html, "https://www.producthunt.com/@sam") is None
+
+def test_maker_none_for_other_pages():
+    assert maker_from_html(read_fixture("producthunt", "login.html"), MAKER_URL) is None
+    assert maker_from_html(read_fixture("producthunt", "challenge.html"), MAKER_URL) is None
+    assert maker_from_html(read_fixture("producthunt", "maker.html"), "https://www.producthunt.com/@sam") is None
@@ -0,0 +1,128 @@
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import reachability
+from reachability import ReachabilityProbe, parse_networks
+
+@pytest.fixture(autouse=True)
+def no_proxy(monkeypatch):
+    # The probe stands aside for proxied URLs
+    monkeypatch.setattr(reachability, "get_environ_proxies", lambda url: {})
+
+def closed_port():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+@pytest.fixture
+def listener():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    s.listen(16)
+    yield s.getsockname()[1]
+    s.close()
+
+def fake_getaddrinfo(delay=0.0, address='127.0.0.1', error=None):
+    def getaddrinfo(host, port, *args, **kwargs):
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port))]
+    return getaddrinfo
+
+def test_parse_networks():
+    assert parse_networks("91.195.240.0/23=Sedo, 199.59.240.0/22") == {
+        "91.195.240.0/23": "Sedo", "199.59.240.0/22": "parking network"
+    }
+    assert parse_networks("") == {}
+
+def test_reachable(listener):
+    assert ReachabilityProbe().check(f"http://127.0.0.1:{listener}/").status == "ok"
+
+def test_refused_is_dead_and_cached():
+    probe = ReachabilityProbe()
+    url = f"http://127.0.0.1:{closed_port()}/"
+    assert probe.check(url).status == "dead"
+    assert probe.check(url).status == "dead"
+    assert probe.dead_hits == 1
+
+def test_nxdomain_is_dead(monkeypatch):
+    monkeypatch.setattr(reachability.socket, "getaddrinfo",
+                        fake_getaddrinfo(error=socket.gaierror(socket.EAI_NONAME, "Name or service not known")))
+    assert ReachabilityProbe().check("https://gone.example").status == "dead"
+
+def test_transient_dns_failure_is_unknown(monkeypatch):
+    monkeypatch.setattr(reachability.socket, "getaddrinfo",
+                        fake_getaddrinfo(error=socket.gaierror(socket.EAI_AGAIN, "Temporary failure")))
+    probe = ReachabilityProbe()
+    assert probe.check("https://flaky.example").status == "unknown"
+    assert not probe._dead
+
+def test_slow_dns_is_unknown_not_dead(monkeypatch):
+    monkeypatch.setattr(reachability.socket, "getaddrinfo", fake_getaddrinfo(delay=0.5))
+    probe = ReachabilityProbe(dns_timeout=0.1)
+    assert probe.check("https://slow.example").status == "unknown"
+    assert not probe._dead
+
+def test_queued_lookups_get_their_full_budget(monkeypatch, listener):
+    # More concurrent checks than resolver workers, each lookup inside the budget
+    monkeypatch.setattr(reachability.socket, "getaddrinfo", fake_getaddrinfo(delay=0.3))
+    probe = ReachabilityProbe(dns_timeout=0.5, resolver_workers=4)
+    urls = [f"http://host{i}.example:{listener}/" for i in range(10)]
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        statuses = list(pool.map(lambda url: probe.check(url).status, urls))
+    assert statuses == ["ok"] * 10
+
+def test_parking_network(monkeypatch):
+    monkeypatch.setattr(reachability.socket, "getaddrinfo", fake_getaddrinfo(address='91.195.240.10'))
+    result = ReachabilityProbe().check("https://for-sale.example")
+    assert result.status == "parked"
+    assert "Sedo" in result.detail
+
+def silent_connect(monkeypatch):
+    def create_connection(address, timeout=None):
+        raise socket.timeout("timed out")
+    monkeypatch.setattr(reachability.socket, "create_connection", create_connection)
+
+def test_silent_host_times_out_and_is_dead_once_confirmed(monkeypatch):
+    monkeypatch.setattr(reachability.socket, "getaddrinfo", fake_getaddrinfo(address='203.0.113.7'))
+    silent_connect(monkeypatch)
+    probe = ReachabilityProbe(connect_timeout=0.1)
+    assert probe.check("https://blackhole.example").status == "timeout"
+    assert not probe._dead
+    probe.confirm_timeout("https://blackhole.example/pricing", "no answer")
+    assert probe.check("https://blackhole.example").status == "dead"
+    assert probe.dead_hits == 1
+
+def test_analyzer_confirms_a_timeout_when_the_get_times_out_too(monkeypatch):
+    import requests
+    import website_analyzer
+    monkeypatch.setattr(reachability.socket, "getaddrinfo", fake_getaddrinfo(address='203.0.113.7'))
+    silent_connect(monkeypatch)
+    timeouts = []
+    class Session:
+        def get(self, url, timeout=None, **kwargs):
+            timeouts.append(timeout)
+            raise requests.exceptions.ConnectTimeout("connect timed out")
+    monkeypatch.setattr(website_analyzer, "get_session", lambda: Session())
+    probe = ReachabilityProbe(connect_timeout=0.1)
+    analyzer = website_analyzer.WebsiteAnalyzer(probe=probe)
+    assert analyzer.analyze("https://blackhole.example")['tier'] == "static"
+    assert timeouts[0][0] == 0.1  # The GET waits no longer than the probe did
+    second = analyzer.analyze("https://blackhole.example")
+    assert second['tier'] == "probe" and second['status'] == "Bad"
+    assert len(timeouts) == 1
+
+def test_expired_entries_are_pruned(listener):
+    probe = ReachabilityProbe()
+    probe.PRUNE_EVERY = 1
+    probe._dead[("gone.example", 443)] = (time.monotonic() - 1, None)
+    probe._dns["old.example"] = (time.monotonic() - 1, ["192.0.2.1"])
+    probe.check(f"http://127.0.0.1:{listener}/")
+    assert ("gone.example", 443) not in probe._dead
+    assert "old.example" not in probe._dns
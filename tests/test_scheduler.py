@@ -0,0 +1,70 @@
+import threading
+import time
+from scheduler import BotState, Scheduler
+
+def started(scheduler):
+    thread = threading.Thread(target=scheduler.run_forever, daemon=True)
+    thread.start()
+    return thread
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def test_due_job_runs_and_then_waits_its_interval():
+    scheduler = Scheduler(BotState())
+    runs = []
+    scheduler.add_job("producthunt", 3600, lambda: runs.append(1))
+    thread = started(scheduler)
+    wait_for(lambda: runs == [1])
+    assert 3590 < scheduler.seconds_until("producthunt") <= 3600
+    scheduler.stop()
+    thread.join(timeout=1)
+    assert not thread.is_alive() and runs == [1]
+
+def test_request_run_wakes_the_sleeping_loop_at_once():
+    scheduler = Scheduler(BotState())
+    runs = []
+    scheduler.add_job("producthunt", 3600, lambda: runs.append(1), run_immediately=False)
+    thread = started(scheduler)
+    assert scheduler.request_run("producthunt")
+    wait_for(lambda: runs == [1])
+    scheduler.stop()
+    thread.join(timeout=1)
+
+def test_paused_scheduler_runs_nothing_until_resumed():
+    state = BotState()
+    scheduler = Scheduler(state)
+    runs = []
+    scheduler.toggle_pause()
+    scheduler.add_job("producthunt", 3600, lambda: runs.append(1))
+    thread = started(scheduler)
+    time.sleep(0.05)
+    assert runs == []
+    assert scheduler.toggle_pause() is False
+    wait_for(lambda: runs == [1])
+    scheduler.stop()
+    thread.join(timeout=1)
+
+def test_running_job_is_not_started_twice():
+    scheduler = Scheduler(BotState())
+    release = threading.Event()
+    scheduler.add_job("producthunt", 3600, release.wait)
+    thread = started(scheduler)
+    wait_for(lambda: scheduler.is_running("producthunt"))
+    assert scheduler.request_run("producthunt") is False
+    assert scheduler.run_job("producthunt") is False
+    release.set()
+    scheduler.stop()
+    thread.join(timeout=1)
+
+def test_failing_job_is_rescheduled():
+    scheduler = Scheduler(BotState())
+    def fail():
+        raise RuntimeError("boom")
+    scheduler.add_job("producthunt", 60, fail)
+    assert scheduler.run_job("producthunt") is True
+    assert not scheduler.is_running("producthunt")
+    assert 50 < scheduler.seconds_until("producthunt") <= 60
@@ -0,0 +1,116 @@
+import telegram_dispatcher
+from telegram_dispatcher import TelegramDispatcher, TokenBucket, SENT, REJECTED, UNDELIVERED
+
+def queued_dispatcher(**kwargs):
+    dispatcher = TelegramDispatcher("token", **kwargs)
+    dispatcher.start = lambda: dispatcher  # Keep calls queued instead of sending them
+    return dispatcher
+
+def test_urgent_calls_jump_ahead_of_queued_ones():
+    dispatcher = queued_dispatcher()
+    dispatcher.submit("sendMessage", {"text": "lead 1"})
+    dispatcher.submit("sendMessage", {"text": "lead 2"})
+    dispatcher.submit("answerCallbackQuery", {"callback_query_id": "1"}, urgent=True)
+    dispatcher.submit("sendMessage", {"text": "reply"}, urgent=True)
+    order = [dispatcher.queue.get_nowait()[2:4] for _ in range(4)]
+    assert order == [
+        ("answerCallbackQuery", {"callback_query_id": "1"}),
+        ("sendMessage", {"text": "reply"}),
+        ("sendMessage", {"text": "lead 1"}),
+        ("sendMessage", {"text": "lead 2"}),
+    ]
+
+def test_full_queue_reports_the_call_as_not_sent():
+    dispatcher = queued_dispatcher(max_queue=1)
+    results = []
+    dispatcher.submit("sendMessage", {"text": "a"})
+    dispatcher.submit("sendMessage", {"text": "b"}, on_done=results.append)
+    assert results == [UNDELIVERED]
+    assert dispatcher.failed == 1
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+    def monotonic(self):
+        return self.now
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def test_token_bucket_allows_a_burst_then_paces(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(telegram_dispatcher.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(telegram_dispatcher.time, "sleep", clock.sleep)
+    bucket = TokenBucket(rate=0.5, capacity=2)
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    assert bucket.acquire() == 2.0
+    assert clock.slept == [2.0]
+
+def test_token_bucket_refills_up_to_capacity(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(telegram_dispatcher.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(telegram_dispatcher.time, "sleep", clock.sleep)
+    bucket = TokenBucket(rate=1, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == 1.0
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+    def json(self):
+        return self.body
+
+def scripted_session(monkeypatch, *responses):
+    """Make the dispatcher's session answer with responses in order; returns the payloads posted"""
+    posted = []
+    class Session:
+        def post(self, url, json=None, timeout=None):
+            posted.append(json)
+            return responses[len(posted) - 1]
+    monkeypatch.setattr(telegram_dispatcher, "get_session", lambda: Session())
+    monkeypatch.setattr(telegram_dispatcher.time, "sleep", lambda seconds: None)
+    return posted
+
+def test_unparseable_markdown_is_resent_as_plain_text(monkeypatch):
+    posted = scripted_session(
+        monkeypatch,
+        FakeResponse(400, {"ok": False, "description": "Bad Request: can't parse entities"}),
+        FakeResponse(200, {"ok": True}),
+    )
+    payload = {"chat_id": 1, "text": "my_product", "parse_mode": "Markdown"}
+    assert TelegramDispatcher("token")._send("sendMessage", payload) == SENT
+    assert "parse_mode" in posted[0] and "parse_mode" not in posted[1]
+
+def test_permanent_rejection_is_reported_apart_from_undelivered(monkeypatch):
+    scripted_session(monkeypatch, FakeResponse(400, {"ok": False, "description": "Bad Request: chat not found"}))
+    dispatcher = TelegramDispatcher("token")
+    assert dispatcher._send("sendMessage", {"chat_id": 1, "text": "hi"}) == REJECTED
+
+    scripted_session(monkeypatch, *[FakeResponse(502, {}) for _ in range(3)])
+    assert TelegramDispatcher("token", max_retries=2)._send("sendMessage", {"chat_id": 1, "text": "hi"}) == UNDELIVERED
+
+def test_rate_limited_calls_wait_out_retry_after(monkeypatch):
+    posted = scripted_session(
+        monkeypatch,
+        FakeResponse(429, {"ok": False, "parameters": {"retry_after": 7}}),
+        FakeResponse(200, {"ok": True}),
+    )
+    slept = []
+    monkeypatch.setattr(telegram_dispatcher.time, "sleep", slept.append)
+    dispatcher = TelegramDispatcher("token")
+    assert dispatcher._send("sendMessage", {"chat_id": 1, "text": "hi"}) == SENT
+    assert slept == [7]
+    assert len(posted) == 2 and dispatcher.rate_limited == 1
+
+def test_server_errors_back_off_exponentially(monkeypatch):
+    scripted_session(monkeypatch, FakeResponse(502, {}), FakeResponse(503, {}), FakeResponse(200, {"ok": True}))
+    slept = []
+    monkeypatch.setattr(telegram_dispatcher.time, "sleep", slept.append)
+    assert TelegramDispatcher("token")._send("sendMessage", {"chat_id": 1, "text": "hi"}) == SENT
+    assert slept == [1.0, 2.0]
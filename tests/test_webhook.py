@@ -0,0 +1,34 @@
+import pytest
+import main
+
+@pytest.fixture
+def client(monkeypatch):
+    handled = []
+    monkeypatch.setattr(main, "TELEGRAM_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr(main, "handle_update", lambda bot, update: handled.append(update))
+    client = main.app.test_client()
+    client.handled = handled
+    return client
+
+UPDATE = {"update_id": 1, "callback_query": {"id": "7", "data": "get_status"}}
+
+def test_update_with_the_secret_is_handled(client):
+    response = client.post(main.TELEGRAM_WEBHOOK_PATH, json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"})
+    assert response.status_code == 200
+    assert client.handled == [UPDATE]
+
+@pytest.mark.parametrize("headers", [{}, {"X-Telegram-Bot-Api-Secret-Token": "guess"}])
+def test_update_without_the_secret_is_refused(client, headers):
+    assert client.post(main.TELEGRAM_WEBHOOK_PATH, json=UPDATE, headers=headers).status_code == 403
+    assert client.handled == []
+
+def test_no_secret_configured_refuses_everything(client, monkeypatch):
+    monkeypatch.setattr(main, "TELEGRAM_WEBHOOK_SECRET", "")
+    assert client.post(main.TELEGRAM_WEBHOOK_PATH, json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": ""}).status_code == 403
+
+def test_failing_handler_still_answers_200(client, monkeypatch):
+    def fail(bot, update):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(main, "handle_update", fail)
+    # Telegram would redeliver the update forever otherwise
+    assert client.post(main.TELEGRAM_WEBHOOK_PATH, json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"}).status_code == 200
@@ -0,0 +1,186 @@
+import time
+import threading
+from website_analyzer import WebsiteAnalyzer, PageScanner, normalize_url, MIN_CONTENT_LENGTH
+
+def scan(*chunks):
+    scanner = PageScanner()
+    for chunk in chunks:
+        scanner.feed(chunk)
+    scanner.close()
+    return scanner
+
+def test_title_and_visible_text():
+    scanner = scan("<html><head><title>Acme</title></head><body><p>Hello world</p></body></html>")
+    assert scanner.title == "Acme"
+    assert scanner.text_length == len("Acme") + len("Hello world")
+
+def test_script_style_and_template_text_is_skipped():
+    scanner = scan("<body><script>var coming_soon = 'coming soon';</script><style>p{}</style>"
+                   "<template>lorem ipsum</template><p>Hi</p></body>")
+    assert scanner.text_length == 2
+    assert scanner.found_keywords == set()
+
+def test_keyword_split_across_chunks():
+    scanner = scan("<p>This site is Coming ", "Soon, stay tuned</p>")
+    assert scanner.found_keywords == {"coming soon"}
+
+def test_only_first_title_counts():
+    assert scan("<title>First</title><svg><title>Icon</title></svg>").title == "First"
+
+def test_unterminated_title_keeps_its_text():
+    scanner = scan("<title>Half a title")
+    assert scanner.title == "Half a title" and scanner.title_done
+
+def test_spa_shell():
+    assert scan('<div id="root"></div><script src="/app.js"></script>').spa_shell()
+    assert scan('<script src="/app.js"></script><p>' + "x" * MIN_CONTENT_LENGTH + '</p>').spa_shell() is False
+    # Placeholder pages are Bad whether or not they are apps
+    assert scan('<div id="root">Coming soon</div>').spa_shell() is False
+
+def test_verdict_certain_needs_keyword_length_and_title():
+    text = "<title>t</title><p>under construction " + "x" * MIN_CONTENT_LENGTH + "</p>"
+    assert scan(text).verdict_certain()
+    assert not scan("<p>under construction " + "x" * MIN_CONTENT_LENGTH + "</p>").verdict_certain()
+
+def test_normalize_url():
+    assert normalize_url("WWW.Example.com/pricing/#plans") == "https://example.com/pricing"
+    assert normalize_url("http://example.com:8080/?a=1") == "http://example.com:8080?a=1"
+    assert normalize_url("https://example.com:443/") == "https://example.com"
+
+class CountingAnalyzer(WebsiteAnalyzer):
+    """Records how many checks of each host overlap instead of fetching anything"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = {}
+        self.peak = {}
+        self.guard = threading.Lock()
+
+    def analyze(self, url):
+        host = url.split('/')[2].removeprefix('www.')
+        with self.guard:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        time.sleep(0.05)
+        with self.guard:
+            self.active[host] -= 1
+        return {'url': url, 'status': 'Good', 'details': [], 'score': 80}
+
+def test_analyze_many_limits_checks_per_host():
+    analyzer = CountingAnalyzer(max_workers=8, max_per_host=2)
+    urls = [f"https://shared.example/{i}" for i in range(6)] + [f"https://www.shared.example/w{i}" for i in range(2)]
+    urls += [f"https://other{i}.example/" for i in range(4)]
+    results = dict(analyzer.analyze_many(urls))
+    assert set(results) == set(urls)
+    assert analyzer.peak["shared.example"] == 2
+    assert all(analyzer.peak[f"other{i}.example"] == 1 for i in range(4))
+
+def test_analyze_many_dedupes_and_skips_empty_urls():
+    analyzer = CountingAnalyzer()
+    assert [url for url, _ in analyzer.analyze_many(["https://a.example", "", None, "https://a.example"])] == ["https://a.example"]
+
+class FakeResponse:
+    """Streamed response serving body in 16 KiB chunks and counting what was read"""
+    def __init__(self, body=b"", status_code=200, headers=None, url="https://acme.example/"):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'text/html; charset=utf-8', **(headers or {})}
+        self.encoding = 'utf-8'
+        self.url = url
+        self.bytes_read = 0
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            self.bytes_read = min(i + chunk_size, len(self.body))
+            yield self.body[i:i + chunk_size]
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+def fetching(monkeypatch, *responses):
+    import website_analyzer
+    session = FakeSession(*responses)
+    monkeypatch.setattr(website_analyzer, "get_session", lambda: session)
+    return session
+
+def test_stream_stops_at_max_bytes(monkeypatch):
+    response = FakeResponse(b"<title>Acme</title><p>" + b"plan your work " * 20000 + b"</p>")
+    fetching(monkeypatch, response)
+    result = WebsiteAnalyzer(max_bytes=32 * 1024).analyze("https://acme.example")
+    assert response.bytes_read == 32 * 1024
+    assert result['status'] == 'Potentially Bad' and result['tier'] == 'static'
+
+def test_stream_stops_once_the_verdict_is_certain(monkeypatch):
+    response = FakeResponse(b"<title>Soon</title><p>Coming soon " + b"x" * 20000 + b"</p>" + b"<p>more</p>" * 20000)
+    fetching(monkeypatch, response)
+    result = WebsiteAnalyzer().analyze("https://acme.example")
+    assert response.bytes_read == 16 * 1024  # The first chunk has the keyword, the title and enough text
+    assert result['status'] == 'Bad'
+
+def test_binary_bodies_are_not_read(monkeypatch):
+    response = FakeResponse(b"\x89PNG" * 1000, headers={'Content-Type': 'image/png'})
+    fetching(monkeypatch, response)
+    WebsiteAnalyzer().analyze("https://acme.example/logo.png")
+    assert response.bytes_read == 0
+
+def test_stale_verdicts_are_revalidated_with_their_validators(monkeypatch, tmp_path):
+    from cache_store import PersistentCache
+    page = b"<title>Acme</title><p>" + b"plan your work " * 40 + b"</p>"
+    session = fetching(
+        monkeypatch,
+        FakeResponse(page, headers={'ETag': '"v1"', 'Last-Modified': 'Tue, 01 Sep 2026 10:00:00 GMT'}),
+        FakeResponse(status_code=304),
+    )
+    analyzer = WebsiteAnalyzer(cache=PersistentCache(str(tmp_path / "analysis.db")), cache_ttl=3600)
+    first = analyzer.analyze("https://acme.example")
+    assert analyzer.analyze("https://www.acme.example/")['tier'] == 'cache'  # Fresh: no request at all
+    assert len(session.requests) == 1
+
+    analyzer.cache_ttl = 0
+    again = analyzer.analyze("https://acme.example")
+    assert session.requests[1] == {**analyzer.headers, 'If-None-Match': '"v1"', 'If-Modified-Since': 'Tue, 01 Sep 2026 10:00:00 GMT'}
+    assert again['status'] == first['status'] and again['tier'] == 'cache'
+    assert analyzer.revalidated == 1
+
+class FakeRenderer:
+    pool_size = 2
+    def __init__(self, pages, on_this_thread=True):
+        self.pages = pages
+        self.on_this_thread = on_this_thread
+    def can_render(self):
+        return self.on_this_thread
+    def render_many(self, urls):
+        return [self.pages.get(url) for url in urls]
+
+SHELL = b'<div id="root"></div><script src="/app.js"></script>'
+
+def tier_counts():
+    from metrics import WEBSITE_TIERS
+    return {tier: WEBSITE_TIERS.values.get((tier,), 0) for tier in ('static', 'rendered')}
+
+def counted_since(before):
+    return {tier: count - before[tier] for tier, count in tier_counts().items()}
+
+def test_rendered_shell_counts_once_as_rendered(monkeypatch):
+    fetching(monkeypatch, FakeResponse(SHELL))
+    analyzer = WebsiteAnalyzer()
+    analyzer.renderer = FakeRenderer({"https://acme.example": {'title': "Acme", 'text': "plan your work " * 40}})
+    before = tier_counts()
+    assert analyzer.analyze("https://acme.example")['tier'] == 'rendered'
+    assert counted_since(before) == {'static': 0, 'rendered': 1}
+
+def test_shell_that_fails_to_render_counts_once_as_static(monkeypatch):
+    fetching(monkeypatch, FakeResponse(SHELL))
+    analyzer = WebsiteAnalyzer()
+    analyzer.renderer = FakeRenderer({}, on_this_thread=False)
+    before = tier_counts()
+    [(_, result)] = analyzer.analyze_many(["https://acme.example"])
+    assert result['tier'] == 'static'
+    assert counted_since(before) == {'static': 1, 'rendered': 0}
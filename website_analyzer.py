@@ -1,23 +1,323 @@
 import requests
 from bs4 import BeautifulSoup
 import urllib3
+from http_transport import get_session, DEFAULT_TIMEOUT
+from metrics import ANALYSIS_SECONDS, BYTES_FETCHED, STAGE_SECONDS, WEBSITE_TIERS
+import time
+import threading
+import codecs
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, urlunparse
 
 # Disable warnings for self-signed certs if we decide to allow them (optional)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-class WebsiteAnalyzer:
+# Heuristics for "Bad" or "New" websites
+BAD_KEYWORDS = ['coming soon', 'under construction', 'domain for sale', 'buy this domain', 'wordpress default', 'lorem ipsum']
+MIN_CONTENT_LENGTH = 200
+
+# Element ids single-page apps mount into (React, Vue, Next.js, Nuxt, Gatsby, Svelte)
+SPA_MOUNT_IDS = ('root', 'app', '__next', '__nuxt', '___gatsby', 'svelte')
+
+# Analysis tier reported for each place _analyze() can get a result from
+TIER_BY_SOURCE = {'probe': 'probe', 'fetched': 'static', 'cache': 'cache', 'revalidated': 'cache'}
+
+# Content types that are never parsed as a page
+BINARY_CONTENT_PREFIXES = ('image/', 'video/', 'audio/', 'font/', 'application/octet-stream', 'application/zip', 'application/pdf')
+
+def normalize_url(url):
+    """Canonical cache key for a website URL (scheme, lowercase host, no www/fragment/trailing slash)"""
+    if not url.startswith('http'):
+        url = 'https://' + url
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parsed.port and parsed.port not in (80, 443):
+        host += f":{parsed.port}"
+    path = parsed.path.rstrip('/')
+    return urlunparse((parsed.scheme.lower(), host, path, '', parsed.query, ''))
+
+class PageScanner(HTMLParser):
+    """
+    Single-pass scanner that collects only what the heuristics need: the
+    first <title>, the visible text length and which bad keywords appear.
+    Text inside script/style/template is skipped, like BeautifulSoup's get_text().
+    Also notes the markers of a JavaScript app shell: external scripts and
+    a mount point such as <div id="root">.
+    """
+    SKIP_TAGS = ('script', 'style', 'template')
+
     def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_length = 0
+        self.found_keywords = set()
+        self.title = None
+        self.title_done = False
+        self._in_title = False
+        self._title_parts = []
+        self._skip_depth = 0
+        self.script_count = 0
+        self.mount_point = False
+        self._tail = ''
+        self._tail_size = max(len(kw) for kw in BAD_KEYWORDS) - 1
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script' and attrs.get('src'):
+            self.script_count += 1
+        elif attrs.get('id') in SPA_MOUNT_IDS:
+            self.mount_point = True
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'title' and not self.title_done:
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title_done = True
+            self.title = ''.join(self._title_parts) or None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self._title_parts.append(data)
+
+        self.text_length += len(data)
+        # Search across chunk boundaries by keeping the end of the previous text
+        window = self._tail + data.lower()
+        for kw in BAD_KEYWORDS:
+            if kw not in self.found_keywords and kw in window:
+                self.found_keywords.add(kw)
+        self._tail = window[-self._tail_size:]
+
+    def spa_shell(self):
+        """
+        True for a page that is little more than a script-rendered app shell.
+        Pages already showing placeholder text are Bad either way, so they don't count.
+        """
+        return self.text_length < MIN_CONTENT_LENGTH and not self.found_keywords and (self.mount_point or self.script_count > 0)
+
+    def verdict_certain(self):
+        """True once reading more of the page cannot change the score"""
+        return bool(self.found_keywords) and self.text_length >= MIN_CONTENT_LENGTH and self.title_done
+
+    def close(self):
+        super().close()
+        if self._in_title:
+            # Unterminated title: keep whatever text it collected
+            self._in_title = False
+            self.title_done = True
+            self.title = ''.join(self._title_parts) or None
+
+class WebsiteAnalyzer:
+    def __init__(self, max_workers=10, max_per_host=2, stream=True, max_bytes=512 * 1024, cache=None, cache_ttl=24 * 3600, probe=None, renderer=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.stream = stream  # Scan the body incrementally instead of building a DOM
+        self.max_bytes = max_bytes  # Stop reading a page after this many bytes
+        self.cache = cache  # Optional PersistentCache of results keyed by normalized URL
+        self.cache_ttl = cache_ttl  # Serve cached results without any request for this long
+        self.probe = probe  # Optional ReachabilityProbe run before the GET (share one across analyzers)
+        self.renderer = renderer  # Optional PageRenderer; JavaScript shells are re-scored from the rendered page
+        self.revalidated = 0
+        self.rendered = 0
+        self._host_locks = {}
+        self._host_locks_guard = threading.Lock()
+
+    def _host_semaphore(self, url):
+        """Return the semaphore limiting concurrent requests to url's host"""
+        if not url.startswith('http'):
+            url = 'https://' + url
+        host = (urlparse(url).hostname or '').lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        with self._host_locks_guard:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_locks[host]
+
+    def _analyze_limited(self, url):
+        with self._host_semaphore(url):
+            return self.analyze(url)
+
+    def analyze_many(self, urls):
+        """
+        Analyzes many websites concurrently and yields (url, result) pairs
+        as each one finishes. At most max_workers sites are checked at once
+        and at most max_per_host of them share a host. Closing the generator
+        early waits for the checks in flight and cancels the rest.
+
+        With a renderer, JavaScript shells are held back and rendered here,
+        in the caller's thread, renderer.pool_size at a time while the
+        workers keep checking the other sites.
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)))
+        shells = []
+        try:
+            futures = {executor.submit(self._analyze_limited, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {
+                        'url': url,
+                        'status': 'Error',
+                        'details': [f"Analysis failed: {e}"],
+                        'score': 0,
+                        'tier': None
+                    }
+                if self._can_render(result):
+                    shells.append((url, result))
+                    if len(shells) >= self.renderer.pool_size:
+                        yield from zip([u for u, _ in shells], self._render_shells(shells))
+                        shells = []
+                    continue
+                yield url, result
+            if shells:
+                yield from zip([u for u, _ in shells], self._render_shells(shells))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def analyze(self, url):
         """
         Analyzes a website and returns a dictionary with status and details.
+        With a cache, fresh results are reused and stale ones are revalidated
+        with a conditional request before re-downloading the page.
+
+        result['tier'] says what produced the verdict: "probe" (dead or parked,
+        no GET), "static" (the served HTML), "rendered" (a JavaScript shell
+        rendered in the browser) or "cache". Shells come back from the
+        static tier with needs_render set; they are rendered here when
+        called on the renderer's thread, otherwise by analyze_many. Each
+        verdict is counted in WEBSITE_TIERS once, under its final tier.
         """
+        started = time.monotonic()
+        result, source = self._analyze(url)
+        result['tier'] = TIER_BY_SOURCE[source]
+        ANALYSIS_SECONDS.observe(time.monotonic() - started, outcome=result['status'], source=source)
+        if self._can_render(result):
+            # Counted by _render_shells, once the tier is final
+            if self.renderer.can_render():
+                result = self._render_shells([(url, result)])[0]
+            return result
+        WEBSITE_TIERS.inc(tier=result['tier'])
+        return result
+
+    def _analyze(self, url):
+        """analyze() body; returns (result, source) with source one of fetched/cache/revalidated/probe"""
         if not url.startswith('http'):
             url = 'https://' + url
 
+        if self.cache is None:
+            probed, timed_out = self._probe(url)
+            if probed:
+                return probed, 'probe'
+            return self._fetch_and_score(url, probe_timed_out=timed_out)[0], 'fetched'
+
+        key = normalize_url(url)
+        entry = self.cache.get_entry(key)
+        if entry and entry.age < self.cache_ttl:
+            return entry.value['result'], 'cache'
+
+        # Dead and parked verdicts stay out of the result cache; the probe's dead-host cache expires them sooner
+        probed, timed_out = self._probe(url)
+        if probed:
+            return probed, 'probe'
+
+        conditional_headers = {}
+        if entry:
+            if entry.value.get('etag'):
+                conditional_headers['If-None-Match'] = entry.value['etag']
+            if entry.value.get('last_modified'):
+                conditional_headers['If-Modified-Since'] = entry.value['last_modified']
+
+        result, validators = self._fetch_and_score(url, conditional_headers, probe_timed_out=timed_out)
+        if result is None:
+            # 304 Not Modified: the cached verdict still holds
+            self.revalidated += 1
+            self.cache.put(key, entry.value)
+            return entry.value['result'], 'revalidated'
+        if validators is not None:
+            self.cache.put(key, {'result': result, **validators})
+        return result, 'fetched'
+
+    def _can_render(self, result):
+        return self.renderer is not None and result.get('needs_render', False)
+
+    @STAGE_SECONDS.time(stage="website_render")
+    def _render_shells(self, shells):
+        """
+        Re-score (url, static_result) pairs from their rendered pages. Pages
+        that fail to render keep the static verdict. Rendered verdicts
+        replace the static ones in the cache.
+        """
+        rendered = self.renderer.render_many([result['url'] for _, result in shells])
+        results = []
+        for (_, static_result), page in zip(shells, rendered):
+            if page is None:
+                WEBSITE_TIERS.inc(tier=static_result['tier'])
+                results.append(static_result)
+                continue
+            text = (page.get('text') or '').lower()
+            insecure = "Redirected to HTTP (Insecure)" in static_result['details']
+            result = {
+                'url': static_result['url'],
+                'status': 'Unknown',
+                'details': ["Redirected to HTTP (Insecure)"] if insecure else [],
+                'score': -20 if insecure else 0
+            }
+            self._apply_heuristics(result, len(text), [kw for kw in BAD_KEYWORDS if kw in text], page.get('title'))
+            if self.cache is not None:
+                key = normalize_url(static_result['url'])
+                entry = self.cache.get_entry(key)
+                if entry:
+                    self.cache.put(key, {**entry.value, 'result': result})
+            result['tier'] = 'rendered'
+            WEBSITE_TIERS.inc(tier='rendered')
+            self.rendered += 1
+            results.append(result)
+        return results
+
+    def _probe(self, url):
+        """
+        (result, timed_out): result for a dead or parked site from the
+        reachability probe, or None to go on with the GET; timed_out when no
+        address answered the probe in time.
+        """
+        if not self.probe:
+            return None, False
+        verdict = self.probe.check(url)
+        if verdict.status not in ('dead', 'parked'):
+            return None, verdict.status == 'timeout'
+        return {
+            'url': url,
+            'status': 'Bad',
+            'details': [f"Connection Error: {verdict.detail}" if verdict.status == 'dead' else verdict.detail],
+            'score': 0
+        }, False
+
+    def _fetch_and_score(self, url, conditional_headers=None, probe_timed_out=False):
+        """
+        Fetches and scores url. Returns (result, validators) where validators
+        holds the response's ETag/Last-Modified, or is None if no HTTP
+        response was received. result is None on a 304 Not Modified.
+        After a probe timeout the GET only waits as long as the probe did to
+        connect, and a second silence marks the host dead in the probe.
+        """
         result = {
             'url': url,
             'status': 'Unknown', # Good, Bad, Error
@@ -26,58 +326,113 @@ class WebsiteAnalyzer:
         }
 
         try:
-            response = requests.get(url, headers=self.headers, timeout=10, verify=False) # verify=False to catch bad SSL too
+            headers = {**self.headers, **(conditional_headers or {})}
+            timeout = (self.probe.connect_timeout, DEFAULT_TIMEOUT[1]) if probe_timed_out else DEFAULT_TIMEOUT
+            response = get_session().get(url, headers=headers, timeout=timeout, verify=False, stream=self.stream) # verify=False to catch bad SSL too
             
-            # Check Status Code
-            if response.status_code >= 400:
-                result['status'] = 'Bad'
-                result['details'].append(f"HTTP Error: {response.status_code}")
-                result['score'] = 10
-                return result
-
-            # Check for SSL (if we requested https and got it)
-            if url.startswith('https') and response.url.startswith('http:'):
-                 result['details'].append("Redirected to HTTP (Insecure)")
-                 result['score'] -= 20
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text_content = soup.get_text().lower()
-
-            # Heuristics for "Bad" or "New" websites
-            bad_keywords = ['coming soon', 'under construction', 'domain for sale', 'buy this domain', 'wordpress default', 'lorem ipsum']
-            
-            found_keywords = [kw for kw in bad_keywords if kw in text_content]
-            if found_keywords:
-                result['status'] = 'Bad'
-                result['details'].append(f"Found placeholder text: {', '.join(found_keywords)}")
-                result['score'] -= 50
-
-            # Check content length (very short pages might be empty)
-            if len(text_content) < 200:
-                result['status'] = 'Bad'
-                result['details'].append("Very little content on page")
-                result['score'] -= 30
-
-            # Title check
-            if not soup.title or not soup.title.string:
-                 result['details'].append("Missing title tag")
-                 result['score'] -= 10
-            elif 'test' in soup.title.string.lower() or 'home' == soup.title.string.lower().strip():
-                 result['details'].append("Generic title tag")
-                 result['score'] -= 10
-
-            if result['score'] <= 50 and result['status'] == 'Unknown':
-                result['status'] = 'Potentially Bad'
-            elif result['status'] == 'Unknown':
-                result['status'] = 'Good'
-                result['score'] = 80 # Default good score
+            with response:
+                validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+                if response.status_code == 304 and conditional_headers:
+                    return None, validators
+
+                # Check Status Code
+                if response.status_code >= 400:
+                    result['status'] = 'Bad'
+                    result['details'].append(f"HTTP Error: {response.status_code}")
+                    result['score'] = 10
+                    return result, validators
+
+                # Check for SSL (if we requested https and got it)
+                if url.startswith('https') and response.url.startswith('http:'):
+                     result['details'].append("Redirected to HTTP (Insecure)")
+                     result['score'] -= 20
+
+                if self.stream:
+                    text_length, found_keywords, title, spa_shell = self._scan_stream(response)
+                else:
+                    BYTES_FETCHED.inc(len(response.content), source="website")
+                    soup = BeautifulSoup(response.text, 'html.parser')
+                    text_content = soup.get_text().lower()
+                    text_length = len(text_content)
+                    found_keywords = [kw for kw in BAD_KEYWORDS if kw in text_content]
+                    title = soup.title.string if soup.title else None
+                    spa_shell = text_length < MIN_CONTENT_LENGTH and not found_keywords and bool(
+                        soup.find('script', src=True) or soup.find(id=list(SPA_MOUNT_IDS))
+                    )
+
+            self._apply_heuristics(result, text_length, found_keywords, title)
+            if spa_shell:
+                # The served HTML is an app shell; its real content only exists once rendered
+                result['needs_render'] = True
+            return result, validators
 
         except requests.exceptions.RequestException as e:
             result['status'] = 'Bad'
             result['details'].append(f"Connection Error: {str(e)}")
             result['score'] = 0
+            if probe_timed_out and isinstance(e, requests.exceptions.ConnectTimeout):
+                self.probe.confirm_timeout(url, f"No answer to the probe or the GET ({e})")
         
-        return result
+        return result, None
+
+    def _scan_stream(self, response):
+        """
+        Reads at most max_bytes of the body through PageScanner, stopping as
+        soon as the verdict can no longer change.
+        Returns (text_length, found_keywords, title, spa_shell).
+        """
+        scanner = PageScanner()
+        content_type = response.headers.get('Content-Type', '').lower()
+
+        if not content_type.startswith(BINARY_CONTENT_PREFIXES):
+            try:
+                decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+            bytes_read = 0
+            for chunk in response.iter_content(chunk_size=16 * 1024):
+                bytes_read += len(chunk)
+                scanner.feed(decoder.decode(chunk))
+                if bytes_read >= self.max_bytes or scanner.verdict_certain():
+                    break
+            else:
+                scanner.feed(decoder.decode(b'', final=True))
+            BYTES_FETCHED.inc(bytes_read, source="website")
+        scanner.close()
+
+        found_keywords = [kw for kw in BAD_KEYWORDS if kw in scanner.found_keywords]
+        return scanner.text_length, found_keywords, scanner.title, scanner.spa_shell()
+
+    def _apply_heuristics(self, result, text_length, found_keywords, title):
+        """Scores a fetched page from its text length, placeholder keywords and title"""
+        if found_keywords:
+            result['status'] = 'Bad'
+            result['details'].append(f"Found placeholder text: {', '.join(found_keywords)}")
+            result['score'] -= 50
+
+        # Check content length (very short pages might be empty)
+        if text_length < MIN_CONTENT_LENGTH:
+            result['status'] = 'Bad'
+            result['details'].append("Very little content on page")
+            result['score'] -= 30
+
+        # Title check
+        if not title:
+             result['details'].append("Missing title tag")
+             result['score'] -= 10
+        elif 'test' in title.lower() or 'home' == title.lower().strip():
+             result['details'].append("Generic title tag")
+             result['score'] -= 10
+
+        if result['score'] <= 50 and result['status'] == 'Unknown':
+            result['status'] = 'Potentially Bad'
+        elif result['status'] == 'Unknown':
+            result['status'] = 'Good'
+            result['score'] = 80 # Default good score
 
 if __name__ == "__main__":
     # Test